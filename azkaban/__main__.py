@@ -4,34 +4,155 @@
 """Azkaban CLI: a lightweight command line interface for Azkaban.
 
 Usage:
+  azkaban analyze [-a ALIAS | -u URL] EXECUTION
+  azkaban backfill [-kp PROJECT] [-a ALIAS | -u URL] [-m MODE] [-o OPTION ...]
+                   [--max-running=MAX] [--retries=RETRIES] [--state=PATH]
+                   FLOW START END [JOB ...]
   azkaban build [-cp PROJECT] [-a ALIAS | -u URL | [-r] ZIP] [-o OPTION ...]
+                [--force] [--in-memory]
+  azkaban cron [--count=COUNT] CRON
+  azkaban (cancel | pause | resume) [-p PROJECT] [-a ALIAS | -u URL]
+                                    [--flows=PATTERN] [--workers=WORKERS]
+                                    [--dry-run]
+  azkaban eta [-a ALIAS | -u URL] [--limit=LIMIT] [--percentile=PERCENT]
+              EXECUTION
+  azkaban grep [-p PROJECT] [-a ALIAS | -u URL] [--limit=LIMIT]
+               [--workers=WORKERS] PATTERN FLOW [JOB ...]
+  azkaban history sync [-p PROJECT] [-a ALIAS | -u URL] [--limit=LIMIT]
+                       [--workers=WORKERS] [FLOW]
   azkaban info [-p PROJECT] [-f | -o OPTION ... | [-i] JOB ...]
+  azkaban inventory refresh [-a ALIAS | -u URL] [--workers=WORKERS]
+                            [--rate=RATE] [--max-age=AGE]
+  azkaban inventory query [-a ALIAS | -u URL] [--type=TYPE] [JOB ...]
   azkaban log [-a ALIAS | -u URL] EXECUTION [JOB]
+  azkaban running [-a ALIAS | -u URL] [--workers=WORKERS] [--max-age=AGE]
   azkaban run [-jkp PROJECT] [-a ALIAS | -u URL] [-b | -m MODE] [-e EMAIL ...]
-              [-o OPTION ...] FLOW [JOB ...]
+              [-o OPTION ...] [-w | --follow] FLOW [JOB ...]
+  azkaban run [-kp PROJECT] [-a ALIAS | -u URL] [-b | -m MODE] [-e EMAIL ...]
+              [-o OPTION ...] [--workers=WORKERS] [--max-running=MAX]
+              [--max-per-project=MAX] [--max-per-flow=MAX] --batch=FILE
+  azkaban run [-k] [-a ALIAS | -u URL] [-b | -m MODE] [-e EMAIL ...]
+              [-o OPTION ...] [-w | --follow] --rerun=EXECUTION
   azkaban schedule [-jknp PROJECT] [-a ALIAS | -u URL] [-b | -m MODE]
                    [-e EMAIL ...] [-o OPTION ...]
                    (-d DATE -t TIME [-s SPAN] | -x CRON [-z TIMEZONE])
                    FLOW [JOB ...]
+  azkaban schedules (plan | apply) [-a ALIAS | -u URL] [--workers=WORKERS]
+                    SPEC
+  azkaban schedules forecast [-a ALIAS | -u URL] [--days=DAYS]
+                             [--threshold=MAX] SPEC
+  azkaban slas export [-p PROJECT] [-a ALIAS | -u URL] [--workers=WORKERS]
+  azkaban slas (plan | apply) [-a ALIAS | -u URL] [--workers=WORKERS] SPEC
   azkaban upload [-cp PROJECT] [-a ALIAS | -u URL] ZIP
   azkaban -h | --help | -l | --log | -v | --version
 
 Commmands:
+  analyze                       Analyze an execution's timeline: critical path,
+                                time spent waiting and slack of each job, and
+                                achieved parallelism. Jobs on the critical path
+                                are marked with an asterisk.
+  backfill                      Run a workflow once per date between START and
+                                END (inclusive), with a bounded number of
+                                executions running at once. Any `{partition}`
+                                found in `--option` values is replaced by the
+                                date run. Progress is saved to a state file
+                                such that an interrupted backfill resumes where
+                                it left off when run again.
   build*                        Build project and upload to Azkaban or save
-                                locally the resulting archive.
+                                locally the resulting archive. Uploads are
+                                skipped if the project's contents are the same
+                                as in the latest version uploaded from this
+                                machine to the same server URL (records are
+                                kept per server, not per alias), unless the
+                                project was deleted since. Uploads made from
+                                other machines aren't detected (see also
+                                `--force`).
+  cancel                        Cancel all running executions of a project (or
+                                only those of flows matching `--flows`). The
+                                result of each cancellation is printed.
+  cron                          Validate a Quartz cron expression and show its
+                                next fire times (in the local timezone).
+  eta                           Estimate when a running execution will finish,
+                                from the durations of its jobs in the
+                                workflow's most recent successful executions
+                                (by default the median, cf. `--percentile`).
+  grep                          Search the logs of a workflow's most recent
+                                executions for lines matching a regular
+                                expression. If jobs are specified, their logs
+                                are searched rather than the workflow's. Each
+                                matching line is prefixed by its execution ID
+                                (and job). Logs of finished executions are
+                                cached locally, under the directory configured
+                                by the `default.cache` option of the `azkaban`
+                                section.
+  history                       Mirror executions of a workflow (or of all the
+                                project's workflows) into a local store, in the
+                                cache directory (cf. `grep`). Only executions
+                                more recent than the latest one stored are
+                                fetched, along with those which were still
+                                running.
   info*                         View information about jobs or files.
+  inventory                     Maintain a local index of all the server's
+                                projects, flows, and jobs (stored in the cache
+                                directory, cf. `grep`). `refresh` crawls the
+                                server, only fetching projects which changed.
+                                `query` lists jobs from the index, optionally
+                                filtered by name and type (glob patterns are
+                                supported, e.g. `'load_*'`), without any
+                                requests to the server.
   log                           View workflow or job execution logs.
+  pause                         Pause running executions, cf. `cancel`.
+  resume                        Resume paused executions, cf. `cancel`.
   run                           Run jobs or workflows. If no job is specified,
-                                the entire workflow will be executed.
+                                the entire workflow will be executed. With
+                                `--batch`, many workflows can be submitted
+                                concurrently.
+  running                       List all running executions on the server, with
+                                their project and workflow. The server's
+                                workflows are read from the local inventory
+                                (cf. `inventory`), which is refreshed first.
+                                Workflows are then checked concurrently.
   schedule                      Schedule a workflow to be run either at a
                                 specified date and time with optional recurring
                                 time period, or based on a cron expression with
                                 optional timezone.
+  schedules                     Reconcile the server's cron schedules with the
+                                ones declared in SPEC. `plan` shows which
+                                schedules would be created (`+`), updated
+                                (`~`), or removed (`-`); `apply` also applies
+                                these changes. Unchanged schedules are left
+                                untouched. `forecast` projects how many of
+                                SPEC's executions will be running over the
+                                next days, from their workflows' median
+                                duration in the local history store (cf.
+                                `history`). With `--threshold`, periods with
+                                more running executions are listed, along with
+                                suggested schedule shifts to flatten them. All
+                                of SPEC's schedules must share a timezone.
+  slas                          Manage the SLAs of scheduled workflows. `export`
+                                prints the SLAs of a project's schedules, in
+                                the format expected in SPEC. `plan` and `apply`
+                                work as for `schedules`, only updating SLAs
+                                which differ from the desired ones.
   upload                        Upload archive to Azkaban server.
 
 Arguments:
+  END                           Last date of a backfill, formatted as
+                                `YYYY-MM-DD`.
+  CRON                          Quartz cron expression, e.g. `'0 0 2 ? * *'`.
   EXECUTION                     Execution ID.
   JOB                           Job name.
+  PATTERN                       Regular expression.
+  SPEC                          Path to a JSON file containing the list of
+                                desired schedules or SLAs. Each schedule is an
+                                object with `project`, `flow`, and `cron` keys,
+                                and optional `timezone` and run option keys
+                                (cf. `--batch`). Any other schedule in the
+                                projects listed is removed. Each SLA is an
+                                object with `project`, `flow`, `settings`, and
+                                optional `emails` keys (cf. `Session.set_sla`).
+  START                         First date of a backfill, formatted as
+                                `YYYY-MM-DD`.
   FLOW                          Workflow name. Recall that in the Azkaban world
                                 this is simply a job without children.
   ZIP                           For `upload` command, the path to an existing
@@ -43,23 +164,70 @@ Arguments:
 
 Options:
   -a ALIAS --alias=ALIAS        Alias to saved URL and username. Will also try
-                                to reuse session IDs for later connections.
+                                to reuse session IDs for later connections. For
+                                `build`, `run`, `schedule`, and `upload`, this
+                                can also be a comma-separated list of aliases
+                                (or alias groups, cf. `fleet.get_sessions`), in
+                                which case the command is run against all their
+                                servers concurrently.
   -b --bounce                   Skip execution if workflow is already running.
                                 Shortcut for `--mode=skip`.
+  --batch=FILE                  Path to a JSON file containing a list of runs
+                                to submit. Each run is an object with a `flow`
+                                key and optional `project`, `jobs`,
+                                `disabled_jobs`, `properties`, `concurrent`,
+                                `on_failure`, `notify_early`, and `emails` keys
+                                (cf. `Session.run_workflow`). Other options act
+                                as defaults for all runs. The execution ID of
+                                each run will be printed. If any `--max-*`
+                                option is specified, runs are instead queued
+                                locally and submitted as running executions
+                                finish; each execution's final status is then
+                                printed.
   -c --create                   Create the project if it does not exist.
+  --count=COUNT                 Number of fire times shown [default: 10].
   -d DATE --date=DATE           Date used for first run of a schedule. It must
                                 be in the format `MM/DD/YYYY`.
+  --days=DAYS                   Number of days forecasted [default: 1].
+  --dry-run                     Only list the executions which would be
+                                affected, without acting on them.
   -e EMAIL --email=EMAIL        Email address to be notified when the workflow
                                 finishes (can be specified multiple times).
+  --force                       Upload the built project even if it is
+                                unchanged.
+  --follow                      Wait for the workflow to finish, streaming the
+                                logs of its jobs as they run. Each line is
+                                prefixed by its job's name. Implies `--wait`.
   -f --files                    List project files instead of jobs. The first
                                 column is the local path of the file, the
                                 second the path of the file in the archive.
+  --flows=PATTERN               Regular expression. Only executions of flows
+                                whose entire name it matches are affected.
   -h --help                     Show this message and exit.
   -i --include-properties       Include project properties with job options.
+  --in-memory                   Build the archive in memory and upload it from
+                                there, rather than writing it to a temporary
+                                file first.
   -j --jump                     Skip any specified jobs instead of only running
                                 those.
   -k --kill                     Kill worfklow on first job failure.
   -l --log                      Show path to current log file and exit.
+  --limit=LIMIT                 Maximum number of executions searched, most
+                                recent first [default: 100]. For `history`,
+                                maximum number of executions fetched on a
+                                workflow's first sync (later syncs fetch all
+                                new executions). For `eta`, number of past
+                                executions used.
+  --max-age=AGE                 Time in seconds after which projects are
+                                crawled again by `inventory refresh` and
+                                `running` [default: 3600].
+  --max-per-flow=MAX            Maximum number of batch executions running
+                                concurrently per workflow.
+  --max-per-project=MAX         Maximum number of batch executions running
+                                concurrently per project.
+  --max-running=MAX             Maximum number of backfill (or batch)
+                                executions running concurrently. Defaults to 4
+                                for `backfill`.
   -m MODE --mode=MODE           Concurrency mode. The default is to allow
                                 concurrent executions. See also `--bounce`.
   -n --notify_early             Send any notification emails when the first job
@@ -81,13 +249,30 @@ Options:
                                 the latter case. If multiple projects are
                                 registered, you can disambiguate as follows:
                                 `--project=module:project_name`.
+  --percentile=PERCENT          Percentile of past job durations used by `eta`
+                                [default: 50].
+  --rate=RATE                   Maximum number of requests per second (e.g.
+                                `0.5` for one request every two seconds).
   -r --replace                  Overwrite any existing file.
+  --rerun=EXECUTION             Only run the jobs of a previous execution which
+                                didn't succeed: failed, killed, and cancelled
+                                jobs, along with jobs which never started. If
+                                the execution is finishing after a failure, its
+                                failed jobs are retried in place instead.
+  --retries=RETRIES             Number of times a failed backfill execution is
+                                resubmitted [default: 1].
   -s SPAN --span=SPAN           Period to repeat the scheduled flow. Must be
                                 in format `1d`, a combination of magnitude and
                                 unit of repetition. If not specified, the flow
                                 will be run only once.
+  --state=PATH                  Path to a backfill's state file. Defaults to a
+                                file named after the project, workflow, and
+                                dates, inside the cache directory (cf. `grep`).
   -t TIME --time=TIME           Time when a schedule should be run. Must be of
                                 the format `hh,mm,(AM|PM),(PDT|UTC|..)`.
+  --type=TYPE                   Job type.
+  --threshold=MAX               Maximum acceptable number of running
+                                executions, used by `schedules forecast`.
   -u URL --url=URL              Azkaban endpoint (with protocol, and optionally
                                 a username): '[user@]protocol:endpoint'. E.g.
                                 'http://azkaban.server'. The username defaults
@@ -95,31 +280,71 @@ Options:
                                 If you often use the same url, consider using
                                 the `--alias` option instead.
   -v --version                  Show version and exit.
+  --workers=WORKERS             Maximum number of concurrent requests, e.g.
+                                logs fetched by `grep`, workflows submitted by
+                                `run --batch`, or executions cancelled by
+                                `cancel` [default: 8].
+  -w --wait                     Wait for the workflow to finish. The exit code
+                                will reflect its final status. Only a single
+                                server can be targeted.
   -x CRON --cron=CRON           Cron expression to use (e.g. `0 30 5 ? * *`).
   -z ZONE --timezone=ZONE       Timezone to use (PST|UTC|..). If unset or
                                 invalid, the server default will be used. See
                                 https://bit.ly/2RzHxfI for the full list.
 
 Azkaban CLI returns with exit code 1 if an error occurred and 0 otherwise.
+When waiting for a workflow to finish, `run` also returns with exit code 2 if
+the workflow failed and 3 if it was killed.
 
 """
 
 from azkaban import __version__, CLI_ARGS
+from azkaban.analysis import RuntimeStats, Timeline
+from azkaban.backfill import Backfill, date_range
+from azkaban.cron import Cron, Forecast
+from azkaban.deploy import UploadLog, upload_archive
+from azkaban.fleet import (control_executions, fan_out,
+  find_running_executions, get_sessions, scan_running_executions)
+from azkaban.history import History
+from azkaban.inventory import Inventory
 from azkaban.project import Project
-from azkaban.remote import Execution, Session
-from azkaban.util import (AzkabanError, Config, catch, flatten, human_readable,
-temppath, read_properties, suppress_urllib_warnings, write_properties)
+from azkaban.remote import Execution, Poller, Session, is_final
+from azkaban.schedule import (apply_schedules, apply_slas, export_slas,
+  plan_schedules, plan_slas)
+from azkaban.search import LogCache, search_logs
+from azkaban.submit import SubmissionQueue
+from azkaban.util import (AzkabanError, Config, catch, flatten, human_duration,
+human_readable, temppath, read_properties, suppress_urllib_warnings,
+write_properties)
+from datetime import datetime, timedelta
+from io import BytesIO
 from docopt import docopt
+from tempfile import gettempdir
+from time import time
 from traceback import format_exc
 from requests.exceptions import HTTPError
+import json
 import logging as lg
 import os
 import os.path as osp
+import re
 import sys
 
 
 _logger = lg.getLogger(__name__)
 
+# exit codes of `run --wait`, keyed by final flow status
+_EXIT_CODES = {
+  'SUCCEEDED': 0,
+  'FAILED': 2,
+  'FAILED_SUCCEEDED': 2,
+  'KILLED': 3,
+  'CANCELLED': 3,
+}
+
+# number of past executions used to estimate a workflow's duration
+_HISTORY_LIMIT = 20
+
 
 def _forward(args, names):
   """Forward subset of arguments from initial dictionary.
@@ -292,14 +517,167 @@ def _get_session(url, alias):
     alias = alias or config.get_option('azkaban', 'default.alias')
     return Session.from_alias(alias=alias, config=config)
 
-def _upload_zip(session, name, path, create=False, archive_name=None):
-  """Upload zip to project in Azkaban.
+def _fan_out(url, alias, func, single_reason=None):
+  """Run a command against one or more servers, printing each one's output.
+
+  :param url: URL (has precedence over alias).
+  :param alias: Alias name. Can also be a comma-separated list of aliases or
+    alias groups, in which case the command is run against all corresponding
+    servers concurrently.
+  :param func: Function called with a session and a boolean indicating whether
+    it is the only one (e.g. to show progress), returning the message to print.
+  :param single_reason: If specified, only a single server is allowed. An error
+    mentioning this reason is raised before running the command otherwise.
+
+  """
+  config = Config()
+  if url:
+    sessions = {None: Session(url=url, config=config)}
+  else:
+    alias = alias or config.get_option('azkaban', 'default.alias')
+    sessions = get_sessions(alias.split(','), config=config)
+  if single_reason and len(sessions) > 1:
+    raise AzkabanError(
+      'Cannot %s on multiple servers (%s).',
+      single_reason, ', '.join(sorted(sessions))
+    )
+  if len(sessions) == 1:
+    sys.stdout.write(func(list(sessions.values())[0], True))
+    return
+  errors = []
+  for alias, message, error in fan_out(sessions, lambda s: func(s, False)):
+    if error:
+      errors.append(alias)
+      sys.stderr.write('[%s] %s\n' % (alias, error))
+    else:
+      for line in message.splitlines():
+        sys.stdout.write('[%s] %s\n' % (alias, line))
+    sys.stdout.flush()
+  if errors:
+    raise AzkabanError(
+      'Failed on %s of %s aliases: %s',
+      len(errors), len(sessions), ', '.join(sorted(errors))
+    )
+
+def _get_cache_dir():
+  """Local directory used to cache data (e.g. logs)."""
+  return Config().get_option(
+    'azkaban', 'default.cache', osp.join(gettempdir(), 'azkaban-cache')
+  )
+
+def _get_database_path(session, kind):
+  """Path to a server's local database, inside the cache directory.
+
+  :param session: :class:`~azkaban.remote.Session` instance.
+  :param kind: Database kind (e.g. `'inventory'`).
+
+  """
+  cache_dir = _get_cache_dir()
+  if not osp.exists(cache_dir):
+    os.makedirs(cache_dir)
+  server = re.sub(r'[^\w.-]+', '_', session.url)
+  return osp.join(cache_dir, '%s-%s.sqlite' % (kind, server))
+
+def _parse_int(value, name):
+  """Parse integer option.
+
+  :param value: Option value.
+  :param name: Option name, used in the error message.
+
+  """
+  try:
+    return int(value)
+  except ValueError:
+    raise AzkabanError('Invalid `%s` option: %r.', name, value)
+
+def _parse_float(value, name):
+  """Parse positive number option.
+
+  :param value: Option value.
+  :param name: Option name, used in the error message.
+
+  """
+  try:
+    number = float(value)
+  except ValueError:
+    number = 0
+  if number <= 0:
+    raise AzkabanError('Invalid `%s` option: %r.', name, value)
+  return number
+
+def _await_execution(session, exe, flow, follow):
+  """Wait for an execution to finish and exit with a code reflecting its status.
+
+  :param session: :class:`~azkaban.remote.Session` instance.
+  :param exe: :class:`~azkaban.remote.Execution` instance.
+  :param flow: Flow name, used in the final message.
+  :param follow: Stream the execution's logs while waiting.
+
+  """
+  with Poller(session) as poller:
+    if follow:
+      for job, line in exe.follow(poller=poller):
+        sys.stdout.write('[%s] %s\n' % (job, line))
+        sys.stdout.flush()
+    status = poller.wait(exe.exec_id)['status']
+  sys.stdout.write('Flow %s finished with status %s.\n' % (flow, status))
+  code = _EXIT_CODES.get(status, 1)
+  if code:
+    sys.exit(code)
+
+def _load_json(path):
+  """Load JSON file.
+
+  :param path: Path to file.
+
+  """
+  try:
+    with open(path) as reader:
+      return json.load(reader)
+  except (IOError, ValueError) as err:
+    raise AzkabanError('Invalid JSON file %r: %s', path, err)
+
+def _describe(change):
+  """Describe a schedule change.
+
+  :param change: Change, cf. :func:`~azkaban.schedule.plan_schedules`.
+
+  """
+  name = '%s/%s' % (change['project'], change['flow'])
+  crons = [
+    (change[key] or {}).get(field)
+    for key, field in [('current', 'cronExpression'), ('desired', 'cron')]
+  ]
+  return '%s\t%s' % (name, ' -> '.join(cron for cron in crons if cron))
+
+def _get_timezone(schedules):
+  """Timezone shared by schedules, `None` if they use the server's default.
+
+  :param schedules: List of schedules, as found in a SPEC file.
+
+  Schedules' fire times are only comparable within a single timezone, so an
+  error is raised if they don't all share the same one.
+
+  """
+  timezones = set(schedule.get('timezone') for schedule in schedules)
+  if len(timezones) > 1:
+    raise AzkabanError(
+      'Schedules in different timezones can\'t be forecasted together: %s. '
+      'Use a separate SPEC file per timezone.',
+      ', '.join(sorted(tz or '(server default)' for tz in timezones))
+    )
+  return timezones.pop() if timezones else None
+
+def _upload_zip(session, name, path, create=False, archive_name=None,
+  progress=True):
+  """Upload zip to project in Azkaban, retrying transient failures.
 
   :param session: Remote Azkaban session.
   :param name: Project name
-  :param path: Path to zip file.
+  :param path: Path to zip file (or file object containing it).
   :param create: Create project if it doesn't exist.
   :param archive_name: Optional zip file name (used by Azkaban).
+  :param progress: Show upload progress.
 
   """
 
@@ -321,40 +699,373 @@ def _upload_zip(session, name, path, create=False, archive_name=None):
       _stdout.write('Validating project...    \r')
     _stdout.flush()
 
-  while True:
-    try:
-      res = session.upload_project(
-        name=name,
-        path=path,
-        archive_name=archive_name,
-        callback=_callback,
+  def _reporter(attempt, sent_bytes, error, _stderr=sys.stderr):
+    """Report failed attempts.
+
+    :param attempt: Attempt number.
+    :param sent_bytes: Archive bytes sent during the attempt.
+    :param error: Error raised by the attempt, if any.
+    :param _stderr: Performance caching.
+
+    """
+    if error:
+      _stderr.write(
+        'Upload attempt %s failed after sending %s: %s\n'
+        % (attempt, human_readable(sent_bytes), error)
       )
-    except AzkabanError as err:
-      if create and str(err).endswith("doesn't exist."):
-        session.create_project(name, name)
-      else:
-        raise err
-    except HTTPError as err:
-      # See https://github.com/mtth/azkaban/pull/34 for more context on why the
-      # logic below is necessary.
-      code = err.response.status_code
-      if code == 400:
-        raise AzkabanError(
-          "Failed to upload project (%s HTTP error). Check that the project "
-          "is not locked, exists, and that your user has write permissions."
-          % (code, )
-        )
-      elif code == 401:
-        raise AzkabanError(
-          "Not authorized to upload project (%s HTTP error). Check that your "
-          "user has write permissions." % (code, )
+      _stderr.flush()
+
+  return upload_archive(
+    session,
+    name,
+    path,
+    archive_name=archive_name,
+    create=create,
+    callback=_callback if progress else None,
+    reporter=_reporter,
+  )
+
+def analyze_execution(_execution, _url, _alias):
+  """Analyze execution timeline."""
+  session = _get_session(_url, _alias)
+  status = session.get_execution_status(_execution)
+  if any('in' in node for node in status['nodes']):
+    flow_info = None
+  else:
+    flow_info = session.get_workflow_info(
+      status['project'], status.get('flowId') or status['flow']
+    )
+  timeline = Timeline.from_status(status, flow_info)
+  critical = set(timeline.critical_path)
+  jobs = sorted(timeline.jobs.items(), key=lambda t: (t[1]['start'], t[0]))
+  sys.stdout.write('\tJOB\tSTART\tDURATION\tWAIT\tSLACK\tSTATUS\n')
+  for name, job in jobs:
+    sys.stdout.write(
+      '%s\t%s\t%s\t%s\t%s\t%s\t%s\n'
+      % (
+        '*' if name in critical else '',
+        name,
+        human_duration(job['start']),
+        human_duration(job['duration']),
+        human_duration(job['wait']),
+        human_duration(job['slack']),
+        job['status'],
+      )
+    )
+  sys.stdout.write(
+    '\nExecution %s ran for %s (status: %s).\n'
+    'Critical path: %s.\n'
+    'Parallelism: %.1f on average, %s at most.\n'
+    % (
+      _execution,
+      human_duration(timeline.duration),
+      status['status'],
+      ' > '.join(timeline.critical_path),
+      timeline.average_parallelism,
+      timeline.max_parallelism,
+    )
+  )
+
+def estimate_execution_end(_execution, _url, _alias, _limit, _percentile):
+  """Estimate remaining execution time."""
+  session = _get_session(_url, _alias)
+  status = session.get_execution_status(_execution)
+  if is_final(status['status']):
+    sys.stdout.write(
+      'Execution %s already finished (status: %s).\n'
+      % (_execution, status['status'])
+    )
+    return
+  flow = status.get('flowId') or status['flow']
+  if any('in' in node for node in status['nodes']):
+    dependencies = None
+  else:
+    dependencies = dict(
+      (node['id'], node.get('in') or [])
+      for node in session.get_workflow_info(status['project'], flow)['nodes']
+    )
+  stats = RuntimeStats.from_session(
+    session,
+    status['project'],
+    flow,
+    limit=_parse_int(_limit, '--limit'),
+  )
+  percent = _parse_int(_percentile, '--percentile')
+  remaining = stats.remaining(status, percent, dependencies)
+  typical = stats.percentile(percent)
+  sys.stdout.write(
+    'Execution %s should finish in %s (around %s).\n'
+    'Jobs with history: %s of %s. Typical run time: %s.\n'
+    % (
+      _execution,
+      human_duration(remaining),
+      datetime.fromtimestamp(time() + remaining).strftime('%Y-%m-%d %H:%M'),
+      len(set(stats.jobs) & set(n['id'] for n in status['nodes'])),
+      len(status['nodes']),
+      human_duration(typical) if typical is not None else 'unknown',
+    )
+  )
+
+def search_workflow_logs(project_name, _pattern, _flow, _job, _url, _alias,
+  _limit, _workers):
+  """Search workflow execution logs."""
+  session = _get_session(_url, _alias)
+  results = search_logs(
+    session,
+    project_name,
+    _flow,
+    _pattern,
+    jobs=_job,
+    limit=_parse_int(_limit, '--limit'),
+    workers=_parse_int(_workers, '--workers'),
+    cache=LogCache(_get_cache_dir()),
+  )
+  errors = 0
+  for execution, job, lines, error in results:
+    exec_id = execution['execId']
+    source = '%s:%s' % (exec_id, job) if job else exec_id
+    if error:
+      errors += 1
+      sys.stderr.write('Unable to search logs of %s: %s\n' % (source, error))
+    else:
+      for line in lines:
+        sys.stdout.write('%s\t%s\n' % (source, line))
+  if errors:
+    raise AzkabanError('Failed to search %s log(s).', errors)
+
+def control_running_executions(project_name, _action, _url, _alias, _flows,
+  _workers, _dry_run):
+  """Cancel, pause, or resume running executions."""
+  session = _get_session(_url, _alias)
+  workers = _parse_int(_workers, '--workers')
+  executions = find_running_executions(
+    session, project_name, flows=_flows, workers=workers
+  )
+  if not executions:
+    sys.stdout.write('No running executions found.\n')
+    return
+  if _dry_run:
+    for flow, exec_id in executions:
+      sys.stdout.write('%s\t%s\n' % (flow, exec_id))
+    return
+  flows = dict((exec_id, flow) for flow, exec_id in executions)
+  results = control_executions(session, list(flows), _action, workers=workers)
+  errors = 0
+  for exec_id, _, error in results:
+    if error:
+      errors += 1
+      sys.stdout.write('%s\t%s\terror: %s\n' % (flows[exec_id], exec_id, error))
+    else:
+      sys.stdout.write('%s\t%s\tok\n' % (flows[exec_id], exec_id))
+  if errors:
+    raise AzkabanError(
+      'Unable to %s %s of %s execution(s).', _action, errors, len(executions)
+    )
+
+def reconcile_schedules(_spec, _url, _alias, _workers, _apply):
+  """Plan or apply schedule changes."""
+  session = _get_session(_url, _alias)
+  workers = _parse_int(_workers, '--workers')
+  changes = plan_schedules(session, _load_json(_spec), workers=workers)
+  if not changes:
+    sys.stdout.write('Schedules are up to date.\n')
+    return
+  symbols = {'create': '+', 'update': '~', 'remove': '-'}
+  if not _apply:
+    for change in changes:
+      symbol = symbols[change['action']]
+      sys.stdout.write('%s %s\n' % (symbol, _describe(change)))
+    sys.stdout.write('%s change(s) planned.\n' % (len(changes), ))
+    return
+  errors = 0
+  for change, _, error in apply_schedules(session, changes, workers=workers):
+    symbol = symbols[change['action']]
+    if error:
+      errors += 1
+      sys.stderr.write(
+        'Failed to apply %s %s: %s\n' % (symbol, _describe(change), error)
+      )
+    else:
+      sys.stdout.write('%s %s\n' % (symbol, _describe(change)))
+  if errors:
+    raise AzkabanError(
+      'Failed to apply %s of %s schedule change(s).', errors, len(changes)
+    )
+
+def show_fire_times(_cron, _count):
+  """Show next fire times of a cron expression."""
+  cron = Cron(_cron)
+  for when in cron.next_times(datetime.now(), _parse_int(_count, '--count')):
+    sys.stdout.write('%s\n' % (when, ))
+
+def forecast_schedules(_spec, _url, _alias, _days, _threshold):
+  """Forecast load of schedules."""
+  specs = _load_json(_spec)
+  timezone = _get_timezone(specs)
+  session = _get_session(_url, _alias)
+  schedules = {}
+  missing = []
+  with History(_get_database_path(session, 'history')) as history:
+    for schedule in specs:
+      key = (schedule['project'], schedule['flow'])
+      durations = [
+        duration
+        for _, duration in history.durations(*key, limit=_HISTORY_LIMIT)
+      ]
+      if not durations:
+        missing.append('%s/%s' % key)
+      duration = RuntimeStats(durations, {}).percentile(50) or 0
+      schedules[key] = (schedule['cron'], duration)
+  if missing:
+    sys.stderr.write(
+      'No history found for %s workflow(s), assuming instantaneous runs: %s\n'
+      % (len(missing), ', '.join(missing))
+    )
+  start = datetime.now().replace(second=0, microsecond=0)
+  forecast = Forecast(
+    schedules, start, start + timedelta(days=_parse_int(_days, '--days'))
+  )
+  if timezone:
+    sys.stdout.write('Times are in the %s timezone.\n' % (timezone, ))
+  sys.stdout.write(
+    'Up to %s execution(s) running at once.\n' % (forecast.peak(), )
+  )
+  if not _threshold:
+    return
+  threshold = _parse_int(_threshold, '--threshold')
+  for hotspot in forecast.hotspots(threshold):
+    sys.stdout.write(
+      '%s\t%s\t%s\t%s\n' % (
+        hotspot['start'],
+        hotspot['end'],
+        hotspot['peak'],
+        ', '.join('%s/%s' % key for key in hotspot['keys']),
+      )
+    )
+  for suggestion in forecast.suggest_shifts(threshold):
+    cron = suggestion['cron']
+    sys.stdout.write(
+      'Shift %s/%s by %+d minutes%s.\n' % (
+        suggestion['key'][0],
+        suggestion['key'][1],
+        suggestion['minutes'],
+        " (cron: '%s')" % (cron.expression, ) if cron else '',
+      )
+    )
+
+def export_schedule_slas(project_name, _url, _alias, _workers):
+  """Print SLAs of a project's schedules."""
+  session = _get_session(_url, _alias)
+  slas = export_slas(
+    session, [project_name], workers=_parse_int(_workers, '--workers')
+  )
+  sys.stdout.write('%s\n' % (json.dumps(slas, indent=2, sort_keys=True), ))
+
+def reconcile_slas(_spec, _url, _alias, _workers, _apply):
+  """Plan or apply SLA changes."""
+  session = _get_session(_url, _alias)
+  workers = _parse_int(_workers, '--workers')
+  changes = plan_slas(session, _load_json(_spec), workers=workers)
+  if not changes:
+    sys.stdout.write('SLAs are up to date.\n')
+    return
+  if not _apply:
+    for change in changes:
+      symbol = '~' if change['current'] else '+'
+      sys.stdout.write(
+        '%s %s/%s\t%s\n' % (
+          symbol, change['project'], change['flow'],
+          '; '.join(change['desired']['settings']),
         )
-      elif code == 410:
-        session.create_project(name, name)
-      else:
-        raise err
+      )
+    sys.stdout.write('%s change(s) planned.\n' % (len(changes), ))
+    return
+  errors = 0
+  for change, _, error in apply_slas(session, changes, workers=workers):
+    name = '%s/%s' % (change['project'], change['flow'])
+    if error:
+      errors += 1
+      sys.stderr.write('Failed to set SLA of %s: %s\n' % (name, error))
     else:
-      return res
+      sys.stdout.write('Set SLA of %s.\n' % (name, ))
+  if errors:
+    raise AzkabanError(
+      'Failed to apply %s of %s SLA change(s).', errors, len(changes)
+    )
+
+def sync_history(project_name, _flow, _url, _alias, _limit, _workers):
+  """Sync execution history into local store."""
+  session = _get_session(_url, _alias)
+  if _flow:
+    flows = [_flow]
+  else:
+    flows = [f['flowId'] for f in session.get_workflows(project_name)['flows']]
+  with History(_get_database_path(session, 'history')) as history:
+    for flow in flows:
+      counts = history.sync(
+        session,
+        project_name,
+        flow,
+        limit=_parse_int(_limit, '--limit'),
+        workers=_parse_int(_workers, '--workers'),
+      )
+      sys.stdout.write(
+        '%s\t%s added\t%s updated\n'
+        % (flow, counts['added'], counts['updated'])
+      )
+
+def refresh_inventory(_url, _alias, _workers, _rate, _max_age):
+  """Crawl server into local inventory."""
+  rate = _parse_float(_rate, '--rate') if _rate else None
+  session = _get_session(_url, _alias)
+  with Inventory(_get_database_path(session, 'inventory')) as inventory:
+    summary = inventory.refresh(
+      session,
+      workers=_parse_int(_workers, '--workers'),
+      rate=rate,
+      max_age=_parse_int(_max_age, '--max-age'),
+    )
+  sys.stdout.write(
+    'Inventory refreshed: %s project(s) crawled, %s unchanged, %s removed.\n'
+    % (summary['crawled'], summary['skipped'], summary['removed'])
+  )
+  if summary['errors']:
+    for name, error in sorted(summary['errors'].items()):
+      sys.stderr.write('Unable to crawl %s: %s\n' % (name, error))
+    raise AzkabanError(
+      'Unable to crawl %s project(s).', len(summary['errors'])
+    )
+
+def list_running_executions(_url, _alias, _workers, _max_age):
+  """List all running executions on the server."""
+  session = _get_session(_url, _alias)
+  workers = _parse_int(_workers, '--workers')
+  with Inventory(_get_database_path(session, 'inventory')) as inventory:
+    summary = inventory.refresh(
+      session,
+      workers=workers,
+      max_age=_parse_int(_max_age, '--max-age'),
+    )
+    for name, error in sorted(summary['errors'].items()):
+      sys.stderr.write('Unable to crawl %s: %s\n' % (name, error))
+    flows = inventory.flows()
+  scan = scan_running_executions(session, flows, workers=workers)
+  for project, flow, exec_id in scan['executions']:
+    sys.stdout.write('%s\t%s\t%s\n' % (project, flow, exec_id))
+  for (project, flow), error in sorted(scan['errors'].items()):
+    sys.stderr.write('Unable to check %s/%s: %s\n' % (project, flow, error))
+  if scan['errors']:
+    raise AzkabanError(
+      'Unable to check %s of %s workflow(s).', len(scan['errors']), len(flows)
+    )
+
+def query_inventory(_url, _alias, _type, _job):
+  """List jobs from local inventory."""
+  session = _get_session(_url, _alias)
+  with Inventory(_get_database_path(session, 'inventory')) as inventory:
+    for job in _job or [None]:
+      for row in inventory.query(job=job, job_type=_type):
+        sys.stdout.write('%s\n' % ('\t'.join(str(value) for value in row), ))
 
 def view_info(project, _files, _option, _job, _include_properties):
   """List jobs in project."""
@@ -388,7 +1099,8 @@ def view_log(_execution, _job, _url, _alias):
   """View workflow or job execution logs."""
   session = _get_session(_url, _alias)
   exc = Execution(session, _execution)
-  logs = exc.job_logs(_job[0]) if _job else exc.logs()
+  # prefetch the next log window while the current one is being written out
+  logs = exc.job_logs(_job[0], prefetch=2) if _job else exc.logs(prefetch=2)
   try:
     for line in logs:
       sys.stdout.write('%s\n' % (line.encode('utf-8'), ))
@@ -402,9 +1114,8 @@ def view_log(_execution, _job, _url, _alias):
       raise AzkabanError('Execution %s not found.', _execution)
 
 def run_workflow(project_name, _flow, _job, _url, _alias, _bounce, _kill,
-  _email, _option, _jump, _mode):
+  _email, _option, _jump, _mode, _wait, _follow):
   """Run workflow."""
-  session = _get_session(_url, _alias)
   kwargs = {
     'name': project_name,
     'flow': _flow,
@@ -417,20 +1128,205 @@ def run_workflow(project_name, _flow, _job, _url, _alias, _bounce, _kill,
     kwargs['disabled_jobs'] = _job
   else:
     kwargs['jobs'] = _job
-  res = session.run_workflow(**kwargs)
-  exec_id = res['execid']
-  job_names = ', jobs: %s' % (', '.join(_job), ) if _job else ''
-  sys.stdout.write(
-    'Flow %s successfully submitted (execution id: %s%s).\n'
-    'Details at %s/executor?execid=%s\n'
-    % (_flow, exec_id, job_names, session.url, exec_id)
+  submitted = []
+
+  def _run(session, single):
+    """Submit the workflow to a server."""
+    exec_id = session.run_workflow(**kwargs)['execid']
+    submitted.append((session, exec_id))
+    job_names = ', jobs: %s' % (', '.join(_job), ) if _job else ''
+    return (
+      'Flow %s successfully submitted (execution id: %s%s).\n'
+      'Details at %s/executor?execid=%s\n'
+      % (_flow, exec_id, job_names, session.url, exec_id)
+    )
+
+  _fan_out(
+    _url, _alias, _run,
+    single_reason='wait for executions' if _wait or _follow else None,
+  )
+  if _wait or _follow:
+    session, exec_id = submitted[0]
+    _await_execution(session, Execution(session, exec_id), _flow, _follow)
+
+def rerun_workflow(_rerun, _url, _alias, _bounce, _kill, _email, _option,
+  _mode, _wait, _follow):
+  """Rerun failed jobs of an execution."""
+  session = _get_session(_url, _alias)
+  exe = Execution(session, _rerun).rerun_failed(
+    concurrent=_mode if _mode else not _bounce,
+    on_failure='cancel' if _kill else 'finish',
+    emails=_email,
+    properties=_parse_option(_option),
+  )
+  status = exe.status
+  flow = status.get('flowId') or status['flow']
+  if str(exe.exec_id) == str(_rerun):
+    sys.stdout.write('Retrying failed jobs of execution %s.\n' % (_rerun, ))
+  else:
+    jobs = [n['id'] for n in status['nodes'] if n['status'] != 'DISABLED']
+    sys.stdout.write(
+      'Flow %s successfully resubmitted (execution id: %s, %s job(s)).\n'
+      % (flow, exe.exec_id, len(jobs))
+    )
+  sys.stdout.write('Details at %s\n' % (exe.url, ))
+  if _wait or _follow:
+    _await_execution(session, exe, flow, _follow)
+
+def run_workflows(project_name, _batch, _url, _alias, _bounce, _kill, _email,
+  _option, _mode, _workers, _max_running, _max_per_project, _max_per_flow):
+  """Run batch of workflows."""
+  workers = _parse_int(_workers, '--workers')
+  runs = _load_batch(_batch, {
+    'name': project_name,
+    'concurrent': _mode if _mode else not _bounce,
+    'on_failure': 'cancel' if _kill else 'finish',
+    'emails': _email,
+    'properties': _parse_option(_option),
+  })
+  session = _get_session(_url, _alias)
+  caps = dict(
+    (name, _parse_int(value, '--%s' % (name.replace('_', '-'), )))
+    for name, value in [
+      ('max_running', _max_running),
+      ('max_per_project', _max_per_project),
+      ('max_per_flow', _max_per_flow),
+    ]
+    if value
+  )
+  if caps:
+    _queue_workflows(SubmissionQueue(session, workers=workers, **caps), runs)
+    return
+  errors = 0
+  for run, res, error in session.run_workflows(runs, workers=workers):
+    if error:
+      errors += 1
+      sys.stderr.write(
+        'Failed to submit %s/%s: %s\n' % (run['name'], run['flow'], error)
+      )
+    else:
+      sys.stdout.write(
+        '%s\t%s\t%s\n' % (run['name'], run['flow'], res['execid'])
+      )
+  if errors:
+    raise AzkabanError('Failed to submit %s of %s run(s).', errors, len(runs))
+
+def _load_batch(path, defaults):
+  """Load runs from a batch file.
+
+  :param path: Path to JSON file, containing a list of runs.
+  :param defaults: Default run options (including `properties`).
+
+  Returns a list of dictionaries of
+  :meth:`~azkaban.remote.Session.run_workflow` arguments.
+
+  """
+  entries = _load_json(path)
+  if not isinstance(entries, list):
+    raise AzkabanError('Invalid batch file %r: expected a list of runs.', path)
+  runs = []
+  for entry in entries:
+    if not isinstance(entry, dict):
+      raise AzkabanError('Invalid batch run (expected an object): %r', entry)
+    run = dict(defaults)
+    run.update(entry)
+    if 'project' in run:
+      run['name'] = run.pop('project')
+    if not run.get('flow'):
+      raise AzkabanError('Missing flow in batch run: %r', entry)
+    if entry.get('properties'):
+      if not isinstance(entry['properties'], dict):
+        raise AzkabanError('Invalid properties in batch run: %r', entry)
+      run['properties'] = dict(defaults['properties'])
+      run['properties'].update(entry['properties'])
+    runs.append(run)
+  return runs
+
+def _queue_workflows(queue, runs):
+  """Submit runs through a queue and wait for them to finish.
+
+  :param queue: :class:`~azkaban.submit.SubmissionQueue` instance.
+  :param runs: List of runs, cf. :meth:`~azkaban.remote.Session.run_workflows`.
+
+  """
+  for run in runs:
+    run = dict(run)
+    queue.put(run.pop('name'), run.pop('flow'), **run)
+
+  def _callback(run, exec_id):
+    """Report submission."""
+    sys.stdout.write('%s\t%s\t%s\tSUBMITTED\n' % (
+      run['name'], run['flow'], exec_id
+    ))
+    sys.stdout.flush()
+
+  errors = 0
+  for run, status, error in queue.run(callback=_callback):
+    if error:
+      errors += 1
+      sys.stderr.write(
+        'Failed to submit %s/%s: %s\n' % (run['name'], run['flow'], error)
+      )
+    else:
+      if status['status'] != 'SUCCEEDED':
+        errors += 1
+      sys.stdout.write('%s\t%s\t%s\t%s\n' % (
+        run['name'], run['flow'], status['execid'], status['status']
+      ))
+    sys.stdout.flush()
+  if errors:
+    raise AzkabanError('%s of %s run(s) did not succeed.', errors, len(runs))
+
+def backfill_workflow(project_name, _flow, _start, _end, _job, _url, _alias,
+  _kill, _option, _mode, _max_running, _retries, _state):
+  """Backfill workflow."""
+  session = _get_session(_url, _alias)
+  path = _state or osp.join(
+    _get_cache_dir(),
+    'backfill-%s-%s-%s-%s.json' % (project_name, _flow, _start, _end),
+  )
+  if not osp.exists(osp.dirname(osp.abspath(path))):
+    os.makedirs(osp.dirname(osp.abspath(path)))
+  backfill = Backfill(
+    session,
+    project_name,
+    _flow,
+    date_range(_start, _end),
+    properties=_parse_option(_option),
+    path=path,
+    jobs=_job,
+    concurrent=_mode or True,
+    on_failure='cancel' if _kill else 'finish',
   )
 
+  def _callback(partition, state):
+    """Report progress."""
+    sys.stdout.write(
+      '%s\t%s\t%s\n' % (partition, state['status'], state['execid'] or '')
+    )
+    sys.stdout.flush()
+
+  sys.stdout.write('Saving backfill progress to %s.\n' % (path, ))
+  states = backfill.run(
+    max_running=_parse_int(_max_running or '4', '--max-running'),
+    retries=_parse_int(_retries, '--retries'),
+    callback=_callback,
+  )
+  failed = sorted(
+    partition for partition, state in states.items()
+    if state['status'] != 'succeeded'
+  )
+  if failed:
+    raise AzkabanError(
+      'Backfill of %s failed for %s partition(s): %s',
+      _flow, len(failed), ', '.join(failed)
+    )
+  sys.stdout.write('Backfill of %s succeeded.\n' % (_flow, ))
+
 def schedule_workflow(project_name, _date, _time, _span, _flow, _job, _url,
   _alias, _bounce, _kill, _email, _option, _jump, _notify_early, _mode,
   _cron, _timezone):
   """Schedule workflow."""
-  session = _get_session(_url, _alias)
   kwargs = {
     'name': project_name,
     'flow': _flow,
@@ -450,34 +1346,46 @@ def schedule_workflow(project_name, _date, _time, _span, _flow, _job, _url,
       'cron': _cron,
       'timezone': _timezone,
     })
-    session.schedule_cron_workflow(**kwargs)
   else:
     kwargs.update({
       'date': _date,
       'time': _time,
       'period': _span,
     })
-    session.schedule_workflow(**kwargs)
-  sys.stdout.write('Flow %s scheduled successfully.\n' % (_flow, ))
+
+  def _schedule(session, single):
+    """Schedule the workflow on a server."""
+    if _cron:
+      session.schedule_cron_workflow(**kwargs)
+    else:
+      session.schedule_workflow(**kwargs)
+    return 'Flow %s scheduled successfully.\n' % (_flow, )
+
+  _fan_out(_url, _alias, _schedule)
 
 def upload_project(project_name, _zip, _url, _alias, _create):
   """Upload project."""
-  session = _get_session(_url, _alias)
-  res = _upload_zip(session, project_name, _zip, _create)
-  sys.stdout.write(
-    'Project %s successfully uploaded (id: %s, size: %s, version: %s).\n'
-    'Details at %s/manager?project=%s\n'
-    % (
-      project_name,
-      res['projectId'],
-      human_readable(osp.getsize(_zip)),
-      res['version'],
-      session.url,
-      project_name,
+
+  def _upload(session, single):
+    """Upload the archive to a server."""
+    res = _upload_zip(session, project_name, _zip, _create, progress=single)
+    return (
+      'Project %s successfully uploaded (id: %s, size: %s, version: %s).\n'
+      'Details at %s/manager?project=%s\n'
+      % (
+        project_name,
+        res['projectId'],
+        human_readable(osp.getsize(_zip)),
+        res['version'],
+        session.url,
+        project_name,
+      )
     )
-  )
 
-def build_project(project, _zip, _url, _alias, _replace, _create, _option):
+  _fan_out(_url, _alias, _upload)
+
+def build_project(project, _zip, _url, _alias, _replace, _create, _option,
+  _force, _in_memory):
   """Build project."""
   if _option:
     project.properties = flatten(project.properties)
@@ -493,23 +1401,51 @@ def build_project(project, _zip, _url, _alias, _replace, _create, _option):
     )
   else:
     with temppath() as _zip:
-      project.build(_zip)
+      if _in_memory:
+        writer = BytesIO()
+        digest = project.build(writer)
+        contents = writer.getvalue()
+        size = len(contents)
+      else:
+        digest = project.build(_zip)
+        size = osp.getsize(_zip)
       archive_name = '%s.zip' % (project.versioned_name, )
-      session = _get_session(_url, _alias)
-      res = _upload_zip(session, project.name, _zip, _create, archive_name)
-      sys.stdout.write(
-        'Project %s successfully built and uploaded '
-        '(id: %s, size: %s, upload: %s).\n'
-        'Details at %s/manager?project=%s\n'
-        % (
-          project,
-          res['projectId'],
-          human_readable(osp.getsize(_zip)),
-          res['version'],
-          session.url,
-          project,
+
+      def _upload(session, single):
+        """Upload the built archive to a server, unless it is unchanged."""
+        with UploadLog(_get_database_path(session, 'uploads')) as log:
+          if not _force:
+            version = log.get_current_version(session, project.name, digest)
+            if version:
+              return (
+                'Project %s unchanged since upload %s, skipping (use '
+                '`--force` to upload anyway).\n' % (project, version)
+              )
+          res = _upload_zip(
+            session,
+            project.name,
+            # separate file objects, since servers are uploaded to concurrently
+            BytesIO(contents) if _in_memory else _zip,
+            _create,
+            archive_name,
+            progress=single,
+          )
+          log.record(project.name, digest, res['version'])
+        return (
+          'Project %s successfully built and uploaded '
+          '(id: %s, size: %s, upload: %s).\n'
+          'Details at %s/manager?project=%s\n'
+          % (
+            project,
+            res['projectId'],
+            human_readable(size),
+            res['version'],
+            session.url,
+            project,
+          )
         )
-      )
+
+      _fan_out(_url, _alias, _upload)
 
 @catch(AzkabanError)
 def main(argv=None):
@@ -533,23 +1469,104 @@ def main(argv=None):
       sys.stdout.write('%s\n' % (handler.baseFilename, ))
     else:
       raise AzkabanError('No log file active.')
+  elif args['analyze']:
+    analyze_execution(**_forward(args, ['EXECUTION', '--url', '--alias']))
+  elif args['backfill']:
+    backfill_workflow(
+      _get_project_name(args['--project']),
+      **_forward(
+        args,
+        [
+          'FLOW', 'START', 'END', 'JOB', '--url', '--alias', '--kill',
+          '--option', '--mode', '--max-running', '--retries', '--state',
+        ]
+      )
+    )
   elif args['build']:
     build_project(
       _load_project(args['--project']),
       **_forward(
         args,
-        ['ZIP', '--url', '--alias', '--replace', '--create', '--option']
+        [
+          'ZIP', '--url', '--alias', '--replace', '--create', '--option',
+          '--force', '--in-memory',
+        ]
+      )
+    )
+  elif args['inventory'] and args['refresh']:
+    refresh_inventory(
+      **_forward(
+        args, ['--url', '--alias', '--workers', '--rate', '--max-age']
       )
     )
+  elif args['inventory']:
+    query_inventory(**_forward(args, ['--url', '--alias', '--type', 'JOB']))
   elif args['log']:
     view_log(
       **_forward(args, ['EXECUTION', 'JOB', '--url', '--alias'])
     )
+  elif args['cron']:
+    show_fire_times(**_forward(args, ['CRON', '--count']))
+  elif args['cancel'] or args['pause'] or args['resume']:
+    control_running_executions(
+      _get_project_name(args['--project']),
+      _action=next(a for a in ['cancel', 'pause', 'resume'] if args[a]),
+      **_forward(
+        args, ['--url', '--alias', '--flows', '--workers', '--dry-run']
+      )
+    )
+  elif args['eta']:
+    estimate_execution_end(
+      **_forward(
+        args, ['EXECUTION', '--url', '--alias', '--limit', '--percentile']
+      )
+    )
+  elif args['grep']:
+    search_workflow_logs(
+      _get_project_name(args['--project']),
+      **_forward(
+        args,
+        [
+          'PATTERN', 'FLOW', 'JOB', '--url', '--alias', '--limit', '--workers',
+        ]
+      )
+    )
+  elif args['history']:
+    sync_history(
+      _get_project_name(args['--project']),
+      **_forward(args, ['FLOW', '--url', '--alias', '--limit', '--workers'])
+    )
   elif args['info']:
     view_info(
       _load_project(args['--project']),
       **_forward(args, ['--files', '--option', 'JOB', '--include-properties'])
     )
+  elif args['running']:
+    list_running_executions(
+      **_forward(args, ['--url', '--alias', '--workers', '--max-age'])
+    )
+  elif args['run'] and args['--rerun']:
+    rerun_workflow(
+      **_forward(
+        args,
+        [
+          '--rerun', '--url', '--alias', '--bounce', '--kill', '--email',
+          '--option', '--mode', '--wait', '--follow',
+        ]
+      )
+    )
+  elif args['run'] and args['--batch']:
+    run_workflows(
+      _get_project_name(args['--project']),
+      **_forward(
+        args,
+        [
+          '--batch', '--bounce', '--url', '--alias', '--kill', '--email',
+          '--option', '--mode', '--workers', '--max-running',
+          '--max-per-project', '--max-per-flow',
+        ]
+      )
+    )
   elif args['run']:
     run_workflow(
       _get_project_name(args['--project']),
@@ -557,7 +1574,7 @@ def main(argv=None):
         args,
         [
           'FLOW', 'JOB', '--bounce', '--url', '--alias', '--kill', '--email',
-          '--option', '--jump', '--mode',
+          '--option', '--jump', '--mode', '--wait', '--follow',
         ]
       )
     )
@@ -573,6 +1590,25 @@ def main(argv=None):
         ]
       )
     )
+  elif args['schedules'] and args['forecast']:
+    forecast_schedules(
+      **_forward(args, ['SPEC', '--url', '--alias', '--days', '--threshold'])
+    )
+  elif args['schedules']:
+    reconcile_schedules(
+      _apply=args['apply'],
+      **_forward(args, ['SPEC', '--url', '--alias', '--workers'])
+    )
+  elif args['slas'] and args['export']:
+    export_schedule_slas(
+      _get_project_name(args['--project']),
+      **_forward(args, ['--url', '--alias', '--workers'])
+    )
+  elif args['slas']:
+    reconcile_slas(
+      _apply=args['apply'],
+      **_forward(args, ['SPEC', '--url', '--alias', '--workers'])
+    )
   elif args['upload']:
     upload_project(
       _get_project_name(args['--project']),
@@ -0,0 +1,373 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""Execution analysis module.
+
+This contains the :class:`Timeline` class, used to understand where the time
+went during an execution (e.g. to find out which jobs to optimize first), and
+the :class:`RuntimeStats` class, which uses past executions to predict when a
+running execution will finish.
+
+"""
+
+from .remote import is_final
+from .util import AzkabanError
+from array import array
+from time import time
+
+
+class Timeline(object):
+
+  """Timing analysis of an execution.
+
+  :param nodes: List of execution nodes, as found under the `'nodes'` key of
+    :meth:`~azkaban.remote.Session.get_execution_status`'s response. Each must
+    contain the job's `'id'`, `'startTime'`, and `'endTime'` (in milliseconds,
+    negative if unset). Jobs which never started are ignored, jobs which are
+    still running are considered to end at `end`.
+  :param dependencies: Dictionary mapping each job's name to the names of the
+    jobs it depends on. Defaults to the nodes' `'in'` key.
+  :param start: Execution start time (in milliseconds). Defaults to the
+    earliest job start time.
+  :param end: Time (in milliseconds) used as end time for jobs which haven't
+    finished yet. Defaults to the latest job update time.
+
+  All times computed below are in seconds, relative to the execution's start.
+  For each job which ran, :attr:`jobs` contains a dictionary with keys:
+
+  + `start`, `end`, `duration`: when the job ran.
+  + `ready`: when its last dependency finished (i.e. when it could have
+    started).
+  + `wait`: time spent between being ready and starting (e.g. queued while
+    waiting for an executor).
+  + `slack`: how much later the job could have finished without delaying the
+    execution, assuming downstream jobs start as soon as they are ready.
+  + `status`: the job's final status.
+
+  """
+
+  def __init__(self, nodes, dependencies=None, start=None, end=None):
+    nodes = [n for n in nodes if n.get('startTime', -1) >= 0]
+    if not nodes:
+      raise AzkabanError('No started jobs found in execution.')
+    if start is None or start < 0:
+      start = min(n['startTime'] for n in nodes)
+    if end is None or end < 0:
+      end = max(
+        max(n.get('endTime', -1), n.get('updateTime', -1), n['startTime'])
+        for n in nodes
+      )
+    if dependencies is None:
+      dependencies = dict((n['id'], n.get('in') or []) for n in nodes)
+    self.jobs = {}
+    for node in nodes:
+      job_end = node['endTime'] if node.get('endTime', -1) >= 0 else end
+      self.jobs[node['id']] = {
+        'start': (node['startTime'] - start) / 1000.,
+        'end': (job_end - start) / 1000.,
+        'status': node.get('status'),
+      }
+    self._parents = dict(
+      (name, [p for p in dependencies.get(name) or [] if p in self.jobs])
+      for name in self.jobs
+    )
+    self._children = dict((name, []) for name in self.jobs)
+    for name, parents in self._parents.items():
+      for parent in parents:
+        self._children[parent].append(name)
+    self.duration = max(job['end'] for job in self.jobs.values())
+    self._compute_waits()
+    self._compute_slacks()
+    self.critical_path = self._compute_critical_path()
+    self.parallelism = self._compute_parallelism()
+
+  def __repr__(self):
+    return '<%s(jobs=%s, duration=%s)>' % (
+      self.__class__.__name__, len(self.jobs), self.duration
+    )
+
+  @property
+  def average_parallelism(self):
+    """Average number of jobs running concurrently."""
+    if not self.duration:
+      return float(len(self.jobs))
+    total = sum(job['duration'] for job in self.jobs.values())
+    return total / self.duration
+
+  @property
+  def max_parallelism(self):
+    """Maximum number of jobs running concurrently."""
+    return max(count for _, count in self.parallelism)
+
+  def _compute_waits(self):
+    """Compute each job's duration, ready time, and wait time."""
+    for name, job in self.jobs.items():
+      job['duration'] = job['end'] - job['start']
+      parents = self._parents[name]
+      job['ready'] = max(self.jobs[p]['end'] for p in parents) if parents else 0
+      job['wait'] = max(0, job['start'] - job['ready'])
+
+  def _compute_slacks(self):
+    """Compute each job's slack, by walking the graph backwards."""
+    latest_ends = {}
+    for name in reversed(_topological_order(self._parents)):
+      children = self._children[name]
+      if children:
+        latest_ends[name] = min(
+          latest_ends[c] - self.jobs[c]['duration'] for c in children
+        )
+      else:
+        latest_ends[name] = self.duration
+    for name, job in self.jobs.items():
+      job['slack'] = max(0, latest_ends[name] - job['end'])
+
+  def _compute_critical_path(self):
+    """Jobs which gated the execution's end, in order.
+
+    Starting from the last job to finish, we repeatedly follow the dependency
+    which finished last.
+
+    """
+    name = max(self.jobs, key=lambda n: self.jobs[n]['end'])
+    path = [name]
+    while self._parents[name]:
+      name = max(self._parents[name], key=lambda n: self.jobs[n]['end'])
+      path.append(name)
+    return path[::-1]
+
+  def _compute_parallelism(self):
+    """Number of running jobs over time.
+
+    Returns a list of `(time, count)` tuples, one per change.
+
+    """
+    deltas = {}
+    for job in self.jobs.values():
+      deltas[job['start']] = deltas.get(job['start'], 0) + 1
+      deltas[job['end']] = deltas.get(job['end'], 0) - 1
+    steps = []
+    count = 0
+    for instant in sorted(deltas):
+      count += deltas[instant]
+      steps.append((instant, count))
+    return steps
+
+  @classmethod
+  def from_status(cls, status, flow_info=None):
+    """Create timeline from an execution's status.
+
+    :param status: Execution status, as returned by
+      :meth:`~azkaban.remote.Session.get_execution_status`.
+    :param flow_info: Flow information, as returned by
+      :meth:`~azkaban.remote.Session.get_workflow_info`. Only required if the
+      status' nodes don't include their dependencies.
+
+    """
+    if flow_info:
+      dependencies = dict(
+        (n['id'], n.get('in') or []) for n in flow_info['nodes']
+      )
+    else:
+      dependencies = None
+    return cls(
+      status['nodes'],
+      dependencies=dependencies,
+      start=status.get('startTime'),
+      end=status.get('endTime') if status.get('endTime', -1) >= 0 else None,
+    )
+
+
+class RuntimeStats(object):
+
+  """Historical duration statistics of a flow and its jobs.
+
+  :param flow_durations: Iterable of durations (in seconds) of the flow's past
+    executions.
+  :param job_durations: Dictionary keyed by job name of iterables of durations
+    (in seconds) of the job's past runs.
+
+  Durations are stored as sorted arrays of floats, which keeps memory usage
+  low and percentile computations fast even with long histories.
+
+  """
+
+  def __init__(self, flow_durations, job_durations):
+    self._flow = array('d', sorted(flow_durations))
+    self._jobs = dict(
+      (name, array('d', sorted(durations)))
+      for name, durations in job_durations.items()
+    )
+
+  def __repr__(self):
+    return '<%s(executions=%s, jobs=%s)>' % (
+      self.__class__.__name__, len(self._flow), len(self._jobs)
+    )
+
+  @property
+  def jobs(self):
+    """Names of jobs with at least one past duration."""
+    return sorted(name for name, durations in self._jobs.items() if durations)
+
+  def percentile(self, percent, job=None):
+    """Duration percentile, `None` if there is no history.
+
+    :param percent: Percentile, between 0 and 100 (e.g. `50` for the median).
+    :param job: Job name. If unspecified, the flow's percentile is returned.
+
+    Values between two durations are linearly interpolated.
+
+    """
+    if not 0 <= percent <= 100:
+      raise ValueError('Invalid percentile: %r.' % (percent, ))
+    durations = self._flow if job is None else self._jobs.get(job)
+    if not durations:
+      return None
+    rank = (len(durations) - 1) * percent / 100.
+    lower = int(rank)
+    upper = min(lower + 1, len(durations) - 1)
+    fraction = rank - lower
+    return durations[lower] + (durations[upper] - durations[lower]) * fraction
+
+  def remaining(self, status, percent=50, dependencies=None, now=None):
+    """Estimate the time left until a running execution finishes.
+
+    :param status: Execution status, as returned by
+      :meth:`~azkaban.remote.Session.get_execution_status`.
+    :param percent: Percentile of past durations used for each job which
+      hasn't finished yet (e.g. `90` for a pessimistic estimate).
+    :param dependencies: Dictionary mapping each job's name to the names of the
+      jobs it depends on. Defaults to the nodes' `'in'` key.
+    :param now: Current time, in milliseconds. Defaults to the local clock.
+
+    Jobs which haven't started yet are assumed to start as soon as their
+    dependencies finish, running jobs to end after their historical duration
+    (or immediately, if they are already running longer than it). Jobs without
+    any history are assumed to be instantaneous. Returns the estimated number
+    of seconds left, `0` if the execution has finished.
+
+    """
+    if is_final(status.get('status')):
+      return 0
+    now = (time() * 1000 if now is None else now) / 1000.
+    nodes = dict((node['id'], node) for node in status['nodes'])
+    if dependencies is None:
+      dependencies = dict((n['id'], n.get('in') or []) for n in nodes.values())
+    parents = {}
+    for name, node in nodes.items():
+      if is_final(node['status']) or node.get('startTime', -1) >= 0:
+        parents[name] = [] # end time doesn't depend on its dependencies
+      else:
+        parents[name] = [p for p in dependencies.get(name) or [] if p in nodes]
+    ends = {}
+    for name in _topological_order(parents):
+      node = nodes[name]
+      duration = self.percentile(percent, name) or 0
+      if is_final(node['status']):
+        if node.get('endTime', -1) >= 0:
+          end = node['endTime'] / 1000.
+        else:
+          end = now # e.g. cancelled or skipped before starting
+      elif node.get('startTime', -1) >= 0:
+        end = max(now, node['startTime'] / 1000. + duration)
+      else:
+        end = max([now] + [ends[parent] for parent in parents[name]]) + duration
+      ends[name] = end
+    return max([now] + list(ends.values())) - now
+
+  @classmethod
+  def from_statuses(cls, statuses):
+    """Create statistics from past executions.
+
+    :param statuses: Iterable of execution statuses, as returned by
+      :meth:`~azkaban.remote.Session.get_execution_status`.
+
+    Only successful executions and jobs are taken into account. Embedded flows
+    are considered as a single job.
+
+    """
+    flow_durations = []
+    job_durations = {}
+    for status in statuses:
+      if _succeeded(status):
+        flow_durations.append(_duration(status))
+      for node in status.get('nodes') or []:
+        if _succeeded(node):
+          job_durations.setdefault(node['id'], []).append(_duration(node))
+    return cls(flow_durations, job_durations)
+
+  @classmethod
+  def from_session(cls, session, project, flow, limit=50, workers=8):
+    """Create statistics from a flow's most recent executions.
+
+    :param session: :class:`~azkaban.remote.Session` instance.
+    :param project: Project name.
+    :param flow: Flow name.
+    :param limit: Maximum number of past executions fetched.
+    :param workers: Maximum number of concurrent requests.
+
+    Executions are listed page by page, and their statuses fetched
+    concurrently.
+
+    """
+    exec_ids = [
+      execution['execId']
+      for execution in session.iter_workflow_executions(
+        project, flow, limit=limit
+      )
+      if execution.get('status') in (None, 'SUCCEEDED')
+    ]
+    statuses = []
+    for exec_id, status, error in session.get_execution_statuses(
+      exec_ids, workers
+    ):
+      if error is None:
+        statuses.append(status)
+    return cls.from_statuses(statuses)
+
+
+def _topological_order(parents):
+  """Job names, such that all dependencies precede their children.
+
+  :param parents: Dictionary mapping each job's name to the names of the jobs
+    it depends on (all of which must be keys of the dictionary).
+
+  Jobs are ordered iteratively, so arbitrarily long chains are supported.
+
+  """
+  children = dict((name, []) for name in parents)
+  for name, names in parents.items():
+    for parent in names:
+      children[parent].append(name)
+  pending = dict((name, len(names)) for name, names in parents.items())
+  ready = sorted(name for name, count in pending.items() if not count)
+  order = []
+  while ready:
+    name = ready.pop()
+    order.append(name)
+    for child in children[name]:
+      pending[child] -= 1
+      if not pending[child]:
+        ready.append(child)
+  if len(order) != len(parents):
+    raise AzkabanError('Cyclic dependencies found in execution.')
+  return order
+
+def _succeeded(item):
+  """Check whether an execution or node succeeded and has valid times.
+
+  :param item: Execution status or node.
+
+  """
+  return (
+    item.get('status') == 'SUCCEEDED' and
+    item.get('startTime', -1) >= 0 and
+    item.get('endTime', -1) >= item['startTime']
+  )
+
+def _duration(item):
+  """Duration of an execution or node, in seconds.
+
+  :param item: Execution status or node.
+
+  """
+  return (item['endTime'] - item['startTime']) / 1000.
@@ -0,0 +1,223 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""Backfill module.
+
+This contains the :class:`Backfill` class, used to run a flow once per
+partition (typically once per date), with a bounded number of executions
+running at any time. Progress is persisted such that an interrupted backfill
+can be resumed.
+
+"""
+
+from .remote import Poller
+from .util import Adapter, AzkabanError, flatten
+from datetime import datetime, timedelta
+from os import rename
+from os.path import exists
+from six import string_types
+from time import sleep
+import json
+import logging as lg
+
+
+_logger = lg.getLogger(__name__)
+
+
+def date_range(start, end, step=1, fmt='%Y-%m-%d'):
+  """Generate date partitions.
+
+  :param start: First date (inclusive). Either a `datetime.date` or a string
+    in format `fmt`.
+  :param end: Last date (inclusive), same format as `start`.
+  :param step: Number of days between consecutive partitions.
+  :param fmt: Format of the partitions (and of `start` and `end`, if strings).
+
+  Returns a list of strings.
+
+  """
+  def _parse(value):
+    """Convert a string to a date."""
+    if isinstance(value, string_types):
+      try:
+        return datetime.strptime(value, fmt).date()
+      except ValueError:
+        raise AzkabanError('Invalid date %r, expected format %r.', value, fmt)
+    return value
+
+  start = _parse(start)
+  end = _parse(end)
+  if step < 1:
+    raise AzkabanError('Invalid step: %r.', step)
+  partitions = []
+  while start <= end:
+    partitions.append(start.strftime(fmt))
+    start += timedelta(days=step)
+  return partitions
+
+
+class Backfill(object):
+
+  """Backfill of a flow over several partitions.
+
+  :param session: :class:`~azkaban.remote.Session` instance.
+  :param name: Project name.
+  :param flow: Flow name.
+  :param partitions: List of partitions (strings, e.g. generated via
+    :func:`date_range`). The flow is run once per partition, in order.
+  :param properties: Dictionary of flow properties. Any occurrence of
+    `{partition}` inside a string value is replaced by the partition run.
+  :param path: Path to the file where progress is persisted. If it exists,
+    the backfill resumes from it: partitions which already succeeded aren't
+    run again, executions which were running are tracked rather than
+    resubmitted, and partitions which failed are retried.
+  :param \*\*kwargs: Keyword arguments forwarded to
+    :meth:`~azkaban.remote.Session.run_workflow` (e.g. `jobs`,
+    `on_failure`).
+
+  Each partition's state is a dictionary with keys `status` (one of
+  `'pending'`, `'running'`, `'succeeded'`, `'failed'`), `execid` (ID of the
+  latest execution submitted), `attempts` (number of submissions), and `error`
+  (reason for the latest failure, if any).
+
+  """
+
+  def __init__(self, session, name, flow, partitions, properties=None,
+    path=None, **kwargs):
+    self.name = name
+    self.flow = flow
+    self.partitions = list(partitions)
+    self.properties = flatten(properties or {})
+    self.path = path
+    self._session = session
+    self._options = kwargs
+    self.state = dict(
+      (partition, {
+        'status': 'pending', 'execid': None, 'attempts': 0, 'error': None,
+      })
+      for partition in self.partitions
+    )
+    if path and exists(path):
+      self._load()
+    self._logger = Adapter(repr(self), _logger)
+
+  def __repr__(self):
+    return '<%s(name=%r, flow=%r, partitions=%s)>' % (
+      self.__class__.__name__, self.name, self.flow, len(self.partitions)
+    )
+
+  def run(self, max_running=4, retries=0, delay=10, callback=None):
+    """Run the backfill until all partitions have finished.
+
+    :param max_running: Maximum number of executions running concurrently. A
+      new partition is submitted as soon as a running one finishes.
+    :param retries: Number of times a failed partition is resubmitted.
+    :param delay: Time in seconds between each status poll. All running
+      executions are polled together.
+    :param callback: Function called with arguments `partition`, `state` each
+      time a partition's state changes.
+
+    Returns the state of all partitions, keyed by partition. Progress is saved
+    after each change, such that interrupting this method is safe.
+
+    """
+    def _update(partition, **kwargs):
+      """Update a partition's state and persist it."""
+      self.state[partition].update(kwargs)
+      self._save()
+      if callback:
+        callback(partition, self.state[partition])
+
+    with Poller(self._session, delay=delay) as poller:
+      while True:
+        running = dict(
+          (state['execid'], partition)
+          for partition, state in self.state.items()
+          if state['status'] == 'running'
+        )
+        pending = [
+          partition for partition in self.partitions
+          if self.state[partition]['status'] == 'pending'
+        ]
+        for partition in pending[:max(0, max_running - len(running))]:
+          attempts = self.state[partition]['attempts'] + 1
+          try:
+            res = self._submit(partition)
+          except Exception as err: # the server might be temporarily unhealthy
+            self._logger.warning('Failed to submit %s: %s', partition, err)
+            _update(
+              partition,
+              status='pending' if attempts <= retries else 'failed',
+              attempts=attempts,
+              error=str(err),
+            )
+          else:
+            running[res['execid']] = partition
+            _update(
+              partition,
+              status='running',
+              execid=res['execid'],
+              attempts=attempts,
+              error=None,
+            )
+        if not running:
+          if any(s['status'] == 'pending' for s in self.state.values()):
+            sleep(delay) # all submissions failed, but some can be retried
+            continue
+          break
+        for exec_id, status in poller.wait_any(running).items():
+          partition = running[exec_id]
+          if status['status'] == 'SUCCEEDED':
+            _update(partition, status='succeeded')
+          else:
+            attempts = self.state[partition]['attempts']
+            _update(
+              partition,
+              status='pending' if attempts <= retries else 'failed',
+              error='Execution %s finished with status %s.' % (
+                exec_id, status['status']
+              ),
+            )
+    return self.state
+
+  def _submit(self, partition):
+    """Start the execution for a partition.
+
+    :param partition: Partition.
+
+    """
+    properties = dict(
+      (
+        key,
+        value.replace('{partition}', partition)
+        if isinstance(value, string_types)
+        else value
+      )
+      for key, value in self.properties.items()
+    )
+    self._logger.info('Submitting partition %s.', partition)
+    return self._session.run_workflow(
+      self.name, self.flow, properties=properties, **self._options
+    )
+
+  def _load(self):
+    """Load progress from file."""
+    try:
+      with open(self.path) as reader:
+        saved = json.load(reader)
+    except ValueError:
+      raise AzkabanError('Invalid backfill state file: %r', self.path)
+    for partition, state in saved.items():
+      if partition in self.state:
+        if state['status'] == 'failed':
+          state = dict(state, status='pending', attempts=0)
+        self.state[partition].update(state)
+
+  def _save(self):
+    """Persist progress to file, atomically."""
+    if not self.path:
+      return
+    tpath = '%s.tmp' % (self.path, )
+    with open(tpath, 'w') as writer:
+      json.dump(self.state, writer, indent=2, sort_keys=True)
+    rename(tpath, self.path)
@@ -0,0 +1,599 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""Cron module.
+
+This contains the :class:`Cron` class, a local evaluator of the Quartz cron
+expressions used by Azkaban schedules (e.g. to validate them before they are
+sent to the server, or to list their next fire times), and the
+:class:`Forecast` class, which combines the fire times of many schedules with
+their flows' typical durations to project how many executions will be running
+at any time, find hotspots, and suggest how to flatten them.
+
+"""
+
+from .util import AzkabanError
+from calendar import monthrange, timegm
+from datetime import date, datetime, timedelta
+from itertools import groupby
+import logging as lg
+
+
+_logger = lg.getLogger(__name__)
+
+_MONTHS = dict(
+  (name, index + 1)
+  for index, name in enumerate([
+    'JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN', 'JUL', 'AUG', 'SEP', 'OCT',
+    'NOV', 'DEC',
+  ])
+)
+
+_DAYS = dict(
+  (name, index + 1)
+  for index, name in enumerate([
+    'SUN', 'MON', 'TUE', 'WED', 'THU', 'FRI', 'SAT',
+  ])
+)
+
+# range of years supported by Quartz
+_MIN_YEAR = 1970
+_MAX_YEAR = 2099
+
+
+class Cron(object):
+
+  """Quartz cron expression.
+
+  :param expression: Cron expression, made of 6 or 7 whitespace-separated
+    fields: seconds, minutes, hours, day of month, month, day of week, and
+    optionally year (e.g. `'0 30 2 ? * MON-FRI'`). Exactly one of the day of
+    month and day of week fields must be `?`.
+
+  All of Quartz's syntax is supported: lists, ranges (including wrapping ones,
+  e.g. `'FRI-MON'`), increments, month and day names, and the special `L`,
+  `W`, and `#` characters. An :class:`~azkaban.util.AzkabanError` is raised if
+  the expression is invalid.
+
+  Times are naive datetimes, in the schedule's timezone.
+
+  """
+
+  def __init__(self, expression):
+    self.expression = expression
+    fields = expression.split()
+    if len(fields) not in (6, 7):
+      raise AzkabanError(
+        'Invalid cron expression %r: expected 6 or 7 fields, found %s.',
+        expression, len(fields)
+      )
+    try:
+      self.seconds = _parse_field(fields[0], 0, 59)
+      self.minutes = _parse_field(fields[1], 0, 59)
+      self.hours = _parse_field(fields[2], 0, 23)
+      self.months = _parse_field(fields[4], 1, 12, _MONTHS)
+      if len(fields) == 7:
+        self.years = _parse_field(fields[6], _MIN_YEAR, _MAX_YEAR)
+      else:
+        self.years = None
+      if (fields[3] == '?') == (fields[5] == '?'):
+        raise ValueError('exactly one day field must be `?`')
+      self._day_matcher = (
+        _parse_day_of_week(fields[5]) if fields[3] == '?'
+        else _parse_day_of_month(fields[3])
+      )
+    except ValueError as err:
+      raise AzkabanError('Invalid cron expression %r: %s.', expression, err)
+    self._times = sorted(
+      3600 * hour + 60 * minute + second
+      for hour in self.hours
+      for minute in self.minutes
+      for second in self.seconds
+    )
+
+  def __repr__(self):
+    return '<%s(expression=%r)>' % (self.__class__.__name__, self.expression)
+
+  def matches(self, when):
+    """Check whether the expression fires at a given time.
+
+    :param when: `datetime.datetime`.
+
+    """
+    return (
+      when.microsecond == 0 and
+      when.second in self.seconds and
+      when.minute in self.minutes and
+      when.hour in self.hours and
+      self._matches_day(when.date())
+    )
+
+  def iter_times(self, start, end=None):
+    """Generate fire times, in order.
+
+    :param start: Only fire times strictly after this `datetime.datetime` are
+      generated.
+    :param end: Stop before this `datetime.datetime`. By default, fire times
+      are generated until the last supported year (which might take a while to
+      consume for frequent expressions).
+
+    Days which can't match (e.g. because their month or year is excluded) are
+    skipped entirely, and each day's fire times are precomputed, such that
+    finding the next fire time is fast even for sparse expressions.
+
+    """
+    day = start.date()
+    offset = (start - datetime.combine(day, datetime.min.time()))
+    threshold = offset.days * 86400 + offset.seconds
+    while True:
+      day = self._next_day(day)
+      if day is None:
+        return
+      midnight = datetime.combine(day, datetime.min.time())
+      for seconds in self._times:
+        if day == start.date() and seconds <= threshold:
+          continue
+        when = midnight + timedelta(seconds=seconds)
+        if end is not None and when >= end:
+          return
+        yield when
+      if end is not None and midnight >= end:
+        return
+      day += timedelta(days=1)
+
+  def next_times(self, start, count=1):
+    """Compute the next fire times.
+
+    :param start: Cf. :meth:`iter_times`.
+    :param count: Number of fire times to compute.
+
+    Returns a list of `datetime.datetime` instances, shorter than `count` if
+    the expression stops firing (e.g. because of its year field).
+
+    """
+    times = []
+    if count > 0:
+      for when in self.iter_times(start):
+        times.append(when)
+        if len(times) >= count:
+          break
+    return times
+
+  def shift(self, minutes):
+    """Cron expression firing a number of minutes later (or earlier).
+
+    :param minutes: Shift in minutes, negative to fire earlier.
+
+    Returns a new :class:`Cron` instance, or `None` if the shifted fire times
+    can't be expressed by only changing the minutes and hours fields (e.g.
+    because some fire times would move to another day which the expression
+    doesn't include).
+
+    """
+    all_days = (
+      len(self.months) == 12 and self.years is None and
+      self._day_matcher is _always
+    )
+    offsets = set()
+    for hour in self.hours:
+      for minute in self.minutes:
+        offset = 60 * hour + minute + minutes
+        if not 0 <= offset < 1440 and not all_days:
+          return None
+        offsets.add(offset % 1440)
+    groups = [
+      (hour, tuple(offset % 60 for offset in group))
+      for hour, group in groupby(sorted(offsets), lambda offset: offset // 60)
+    ]
+    if len(set(minutes for _, minutes in groups)) != 1:
+      return None # not a product of hours and minutes
+    fields = self.expression.split()
+    fields[1] = _format_field(groups[0][1], 60)
+    fields[2] = _format_field([hour for hour, _ in groups], 24)
+    return Cron(' '.join(fields))
+
+  def _matches_day(self, day):
+    """Check whether a date matches the expression's date fields.
+
+    :param day: `datetime.date`.
+
+    """
+    return (
+      day.month in self.months and
+      (self.years is None or day.year in self.years) and
+      self._day_matcher(day)
+    )
+
+  def _next_day(self, day):
+    """First matching date on or after a date, `None` if there is none.
+
+    :param day: `datetime.date`.
+
+    """
+    while day.year <= _MAX_YEAR:
+      if self.years is not None and day.year not in self.years:
+        if not any(year > day.year for year in self.years):
+          return None
+        day = date(day.year + 1, 1, 1)
+      elif day.month not in self.months:
+        if day.month == 12:
+          day = date(day.year + 1, 1, 1)
+        else:
+          day = date(day.year, day.month + 1, 1)
+      elif self._day_matcher(day):
+        return day
+      else:
+        day += timedelta(days=1)
+    return None
+
+
+class Forecast(object):
+
+  """Projected load of a set of schedules.
+
+  :param schedules: Dictionary keyed by schedule key (e.g. `(project, flow)`
+    tuples) of `(cron, duration)` tuples, `cron` being a cron expression
+    (string or :class:`Cron` instance) and `duration` the typical duration of
+    the schedule's executions in seconds (e.g. a percentile of
+    :meth:`~azkaban.history.History.durations`).
+  :param start: Start of the forecast window, `datetime.datetime`.
+  :param end: End of the forecast window, `datetime.datetime`.
+
+  Executions fired before `start` which would still be running at `start` are
+  also taken into account. Fire times are evaluated in a single timezone (that
+  of `start` and `end`), so all schedules must share it: forecast schedules in
+  different timezones separately.
+
+  """
+
+  def __init__(self, schedules, start, end):
+    self.start = start
+    self.end = end
+    self.crons = dict(
+      (key, cron if isinstance(cron, Cron) else Cron(cron))
+      for key, (cron, _) in schedules.items()
+    )
+    self.durations = dict(
+      (key, duration or 0) for key, (_, duration) in schedules.items()
+    )
+    # executions fired this long before the window can still be running in it
+    lookback = timedelta(seconds=max([0] + list(self.durations.values())) + 1)
+    self._fires = dict(
+      (key, [_to_seconds(t) for t in cron.iter_times(start - lookback, end)])
+      for key, cron in self.crons.items()
+    )
+    self._start = _to_seconds(start)
+    self._end = _to_seconds(end)
+
+  def __repr__(self):
+    return '<%s(schedules=%s, start=%s, end=%s)>' % (
+      self.__class__.__name__, len(self.crons), self.start, self.end
+    )
+
+  def curve(self, shifts=None):
+    """Projected number of running executions over time.
+
+    :param shifts: Dictionary of shifts in seconds keyed by schedule key, to
+      apply to the corresponding schedules' fire times.
+
+    Returns a list of `(time, count)` tuples, each count holding until the next
+    tuple's time (or the end of the window).
+
+    """
+    points = []
+    for start, _, count, _ in self._segments(shifts):
+      if not points or points[-1][1] != count:
+        points.append((_from_seconds(start), count))
+    return points
+
+  def peak(self, shifts=None):
+    """Maximum projected number of running executions.
+
+    :param shifts: Cf. :meth:`curve`.
+
+    """
+    return max(count for _, count in self.curve(shifts))
+
+  def overload(self, threshold, shifts=None):
+    """Total execution time in excess of a threshold, in seconds.
+
+    :param threshold: Maximum acceptable number of running executions.
+    :param shifts: Cf. :meth:`curve`.
+
+    """
+    return sum(
+      (count - threshold) * (end - start)
+      for start, end, count, _ in self._segments(shifts)
+      if count > threshold
+    )
+
+  def hotspots(self, threshold, shifts=None):
+    """Periods during which too many executions are projected to run.
+
+    :param threshold: Maximum acceptable number of running executions.
+    :param shifts: Cf. :meth:`curve`.
+
+    Returns a list of dictionaries with keys `start`, `end`, `peak`, and `keys`
+    (list of the keys of all schedules running at some point during the
+    period), in chronological order.
+
+    """
+    hotspots = []
+    previous_end = None
+    for start, end, count, keys in self._segments(shifts, True):
+      if count <= threshold:
+        continue
+      if hotspots and start == previous_end:
+        hotspot = hotspots[-1]
+        hotspot['peak'] = max(hotspot['peak'], count)
+        hotspot['keys'] |= keys
+      else:
+        hotspots.append({'start': start, 'peak': count, 'keys': set(keys)})
+      previous_end = hotspots[-1]['end'] = end
+    for hotspot in hotspots:
+      hotspot['start'] = _from_seconds(hotspot['start'])
+      hotspot['end'] = _from_seconds(hotspot['end'])
+      hotspot['keys'] = sorted(hotspot['keys'], key=repr)
+    return hotspots
+
+  def suggest_shifts(self, threshold, max_shift=60, step=5):
+    """Suggest schedule shifts which flatten the projected load.
+
+    :param threshold: Maximum acceptable number of running executions.
+    :param max_shift: Maximum shift, in minutes (in both directions).
+    :param step: Granularity of the shifts considered, in minutes.
+
+    Schedules running during hotspots are greedily shifted, one at a time,
+    picking each time the shift which reduces the overload (cf.
+    :meth:`overload`) the most, until none does. Returns a list of dictionaries
+    with keys `key`, `minutes` (shift), `cron` (shifted :class:`Cron`, `None`
+    if it can't be expressed by changing the original expression's minutes and
+    hours fields), and `overload` (remaining overload once this and all
+    previous shifts are applied).
+
+    """
+    shifts = {}
+    suggestions = []
+    overload = self.overload(threshold)
+    candidates = [m for m in range(-max_shift, max_shift + 1, step) if m]
+    while overload > 0:
+      keys = set(
+        key
+        for hotspot in self.hotspots(threshold, shifts)
+        for key in hotspot['keys']
+        if key not in shifts
+      )
+      best = None
+      for key in sorted(keys, key=repr):
+        for minutes in candidates:
+          trial = dict(shifts)
+          trial[key] = 60 * minutes
+          value = self.overload(threshold, trial)
+          if value < overload and (best is None or value < best[2]):
+            best = (key, minutes, value)
+      if best is None:
+        break
+      key, minutes, overload = best
+      _logger.debug('Shifting %r by %s minutes.', key, minutes)
+      shifts[key] = 60 * minutes
+      suggestions.append({
+        'key': key,
+        'minutes': minutes,
+        'cron': self.crons[key].shift(minutes),
+        'overload': overload,
+      })
+    return suggestions
+
+  def _segments(self, shifts=None, with_keys=False):
+    """Periods of the window with a constant number of running executions.
+
+    :param shifts: Cf. :meth:`curve`.
+    :param with_keys: Also compute the set of keys of the schedules running
+      during each period. Otherwise, `None` is returned instead.
+
+    Returns a list of `(start, end, count, keys)` tuples, times being in
+    seconds since the epoch.
+
+    """
+    shifts = shifts or {}
+    events = []
+    for key, fires in self._fires.items():
+      duration = self.durations[key]
+      if duration <= 0:
+        continue # these don't occupy any executor
+      shift = shifts.get(key, 0)
+      for fire in fires:
+        events.append((fire + shift, 1, key))
+        events.append((fire + shift + duration, -1, key))
+    events.sort(key=lambda event: (event[0], event[1]))
+    segments = []
+    running = {}
+    count = 0
+    previous = self._start
+    for offset, delta, key in events:
+      offset = min(offset, self._end)
+      if offset > previous:
+        keys = frozenset(running) if with_keys else None
+        segments.append((previous, offset, count, keys))
+        previous = offset
+      count += delta
+      if with_keys:
+        running[key] = running.get(key, 0) + delta
+        if not running[key]:
+          del running[key]
+    if previous < self._end:
+      keys = frozenset(running) if with_keys else None
+      segments.append((previous, self._end, count, keys))
+    return segments
+
+
+def _always(day):
+  """Day matcher for unrestricted day fields.
+
+  :param day: `datetime.date`.
+
+  """
+  return True
+
+def _parse_field(field, lower, upper, names=None):
+  """Parse a numeric cron field into the set of values it matches.
+
+  :param field: Field string (e.g. `'1,5-10/2'`).
+  :param lower: Minimum value.
+  :param upper: Maximum value.
+  :param names: Dictionary of value names (e.g. months), matched
+    case-insensitively.
+
+  """
+  values = set()
+  for item in field.split(','):
+    if '/' in item:
+      item, step = item.split('/', 1)
+      step = _parse_value(step, 1, upper - lower + 1)
+    else:
+      step = None
+    if item == '*':
+      start, end = lower, upper
+    elif '-' in item:
+      start, end = [
+        _parse_value(value, lower, upper, names) for value in item.split('-', 1)
+      ]
+    else:
+      start = _parse_value(item, lower, upper, names)
+      end = upper if step else start
+    if end < start: # wrapping range (e.g. `'22-2'`)
+      span = list(range(start, upper + 1)) + list(range(lower, end + 1))
+    else:
+      span = list(range(start, end + 1))
+    values.update(span[::step or 1])
+  return frozenset(values)
+
+def _format_field(values, size):
+  """Format a set of values into a cron field.
+
+  :param values: Sorted values.
+  :param size: Number of possible values.
+
+  """
+  if len(values) == size:
+    return '*'
+  return ','.join(str(value) for value in values)
+
+def _parse_value(value, lower, upper, names=None):
+  """Parse a single value of a cron field.
+
+  :param value: String.
+  :param lower: Minimum value.
+  :param upper: Maximum value.
+  :param names: Cf. :func:`_parse_field`.
+
+  """
+  if names and value.upper() in names:
+    return names[value.upper()]
+  try:
+    number = int(value)
+  except ValueError:
+    raise ValueError('invalid value %r' % (value, ))
+  if not lower <= number <= upper:
+    raise ValueError(
+      'value %s out of range [%s, %s]' % (number, lower, upper)
+    )
+  return number
+
+def _parse_day_of_month(field):
+  """Parse the day of month field into a function matching dates.
+
+  :param field: Field string.
+
+  """
+  field = field.upper()
+  if field == '*':
+    return _always
+  if field == 'L':
+    return lambda day: day.day == _last_day(day)
+  if field.startswith('L-'):
+    offset = _parse_value(field[2:], 0, 30)
+    return lambda day: day.day == max(1, _last_day(day) - offset)
+  if field == 'LW':
+    return lambda day: day.day == _nearest_weekday(day, _last_day(day))
+  if field.endswith('W'):
+    target = _parse_value(field[:-1], 1, 31)
+    return lambda day: day.day == _nearest_weekday(day, target)
+  days = _parse_field(field, 1, 31)
+  return lambda day: day.day in days
+
+def _parse_day_of_week(field):
+  """Parse the day of week field into a function matching dates.
+
+  :param field: Field string.
+
+  """
+  field = field.upper()
+  if field == '*':
+    return _always
+  if field == 'L':
+    field = '7' # last day of the week, i.e. saturday
+  if '#' in field:
+    weekday, nth = field.split('#', 1)
+    weekday = _parse_value(weekday, 1, 7, _DAYS)
+    nth = _parse_value(nth, 1, 5)
+    return lambda day: (
+      _weekday(day) == weekday and (day.day - 1) // 7 + 1 == nth
+    )
+  if len(field) > 1 and field.endswith('L'):
+    weekday = _parse_value(field[:-1], 1, 7, _DAYS)
+    return lambda day: (
+      _weekday(day) == weekday and day.day + 7 > _last_day(day)
+    )
+  weekdays = _parse_field(field, 1, 7, _DAYS)
+  return lambda day: _weekday(day) in weekdays
+
+def _weekday(day):
+  """Quartz day of week of a date (1 for sunday, 7 for saturday).
+
+  :param day: `datetime.date`.
+
+  """
+  return (day.weekday() + 1) % 7 + 1
+
+def _last_day(day):
+  """Last day of a date's month.
+
+  :param day: `datetime.date`.
+
+  """
+  return monthrange(day.year, day.month)[1]
+
+def _nearest_weekday(day, target):
+  """Weekday (monday to friday) nearest to a day of the same month.
+
+  :param day: `datetime.date`, used for its year and month.
+  :param target: Day of month (capped to the month's last day).
+
+  Following Quartz, the nearest weekday is never in another month.
+
+  """
+  last = _last_day(day)
+  target = min(target, last)
+  weekday = date(day.year, day.month, target).weekday()
+  if weekday == 5: # saturday
+    return target - 1 if target > 1 else target + 2
+  if weekday == 6: # sunday
+    return target + 1 if target < last else target - 2
+  return target
+
+def _to_seconds(when):
+  """Convert a naive datetime to seconds since the epoch.
+
+  :param when: `datetime.datetime`.
+
+  """
+  return timegm(when.timetuple())
+
+def _from_seconds(seconds):
+  """Convert seconds since the epoch to a naive datetime.
+
+  :param seconds: Number.
+
+  """
+  return datetime(1970, 1, 1) + timedelta(seconds=seconds)
@@ -0,0 +1,254 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""Deployment module.
+
+This contains the :class:`UploadLog` class, a local record of the archives
+uploaded to a server. It lets unchanged projects be skipped rather than
+uploaded again (which would create a new project version on the server). The
+:func:`upload_archive` function uploads an archive, retrying transient
+failures (e.g. network errors or gateway timeouts) without rebuilding it.
+
+"""
+
+from .util import Adapter, AzkabanError
+from requests.exceptions import HTTPError
+from time import sleep, time
+import logging as lg
+import sqlite3
+
+
+_logger = lg.getLogger(__name__)
+
+# responses typically sent by proxies while the server is unreachable
+_TRANSIENT_CODES = set([502, 503, 504])
+
+_SCHEMA = '''
+  CREATE TABLE IF NOT EXISTS uploads (
+    project TEXT PRIMARY KEY,
+    digest TEXT,
+    version TEXT,
+    uploaded REAL
+  );
+'''
+
+
+class UploadLog(object):
+
+  """Local record of the latest archive uploaded for each project.
+
+  :param path: Path to the SQLite database. It will be created if necessary.
+    Use a separate database per server.
+
+  Only uploads recorded here are known: uploads of the same project made from
+  elsewhere aren't detected (cf. :meth:`get_current_version`).
+
+  Usage:
+
+  .. code:: python
+
+    with UploadLog('uploads.sqlite') as log:
+      digest = project.build('project.zip')
+      if not log.get_current_version(session, project.name, digest):
+        res = session.upload_project(project.name, 'project.zip')
+        log.record(project.name, digest, res['version'])
+
+  """
+
+  def __init__(self, path):
+    self.path = path
+    self._connection = sqlite3.connect(path)
+    self._connection.executescript(_SCHEMA)
+    self._logger = Adapter(repr(self), _logger)
+
+  def __repr__(self):
+    return '<%s(path=%r)>' % (self.__class__.__name__, self.path)
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc_info):
+    self.close()
+
+  def close(self):
+    """Close the underlying database connection."""
+    self._connection.close()
+
+  def get(self, project):
+    """Latest upload of a project.
+
+    :param project: Project name.
+
+    Returns a `(digest, version, uploaded)` tuple, `None` if the project was
+    never uploaded.
+
+    """
+    return self._connection.execute(
+      'SELECT digest, version, uploaded FROM uploads WHERE project = ?',
+      (project, ),
+    ).fetchone()
+
+  def record(self, project, digest, version):
+    """Store a successful upload.
+
+    :param project: Project name.
+    :param digest: Archive digest, as returned by
+      :meth:`~azkaban.project.Project.build`.
+    :param version: Project version created by the upload.
+
+    """
+    with self._connection:
+      self._connection.execute(
+        'INSERT OR REPLACE INTO uploads VALUES (?, ?, ?, ?)',
+        (project, digest, str(version), time()),
+      )
+    self._logger.debug('Recorded upload %s of %s.', version, project)
+
+  def get_current_version(self, session, project, digest):
+    """Server version of a project, if it matches an archive.
+
+    :param session: :class:`~azkaban.remote.Session` instance.
+    :param project: Project name.
+    :param digest: Archive digest, as returned by
+      :meth:`~azkaban.project.Project.build`.
+
+    Returns the version created when the same archive was last uploaded, or
+    `None` if the archive differs from the last one uploaded. The server's
+    project listing is also checked (a single request), such that projects
+    which were deleted meanwhile are reported as changed. Note that the listing
+    doesn't include projects' versions: uploads made from elsewhere (e.g.
+    another machine) since the recorded one aren't detected.
+
+    """
+    entry = self.get(project)
+    if not entry or entry[0] != digest:
+      return None
+    for listed in session.get_projects()['projects']:
+      if listed['projectName'] == project:
+        return entry[1]
+    self._logger.info('Project %s not found on the server.', project)
+    return None
+
+
+def upload_archive(session, name, path, archive_name=None, create=False,
+  retries=3, delay=2, callback=None, reporter=None):
+  """Upload a project archive, retrying transient failures.
+
+  :param session: :class:`~azkaban.remote.Session` instance.
+  :param name: Project name.
+  :param path: Path to the archive, or seekable file object containing it (cf.
+    :meth:`~azkaban.remote.Session.upload_project`). The same archive is sent
+    on each attempt.
+  :param archive_name: Filename used for the archive uploaded to Azkaban.
+  :param create: Create the project if it doesn't exist.
+  :param retries: Maximum number of times a transient failure (connection
+    error, or 502, 503, 504 response) is retried.
+  :param delay: Time in seconds before the first retry, doubled after each
+    subsequent failure.
+  :param callback: Progress callback, forwarded to
+    :meth:`~azkaban.remote.Session.upload_project` (its byte counts restart
+    from zero on each attempt).
+  :param reporter: Function called after each attempt with arguments
+    `attempt` (starting at 1), `sent_bytes` (exact number of archive bytes
+    streamed to the server), and `error` (`None` if the attempt succeeded).
+
+  The session ID is only validated before the first attempt: transient
+  failures don't invalidate it, so retries avoid the extra request.
+
+  Note that a gateway error (e.g. a 504 sent by a proxy timing out) received
+  after the whole archive was sent doesn't mean that the server didn't process
+  the upload. Azkaban doesn't expose project versions in a way which would let
+  us check, so retrying can then create a duplicate project version (with the
+  same contents). A warning is logged in this case; set `retries` to `0` to
+  avoid it.
+
+  """
+  attempt = 0
+  failures = 0
+  created = False
+  while True:
+    attempt += 1
+    progress = {'bytes': 0, 'total': None}
+
+    def _callback(cur_bytes, tot_bytes, index, _progress=progress):
+      """Keep track of the bytes sent, forwarding progress."""
+      _progress['bytes'] = cur_bytes
+      _progress['total'] = tot_bytes
+      if callback:
+        callback(cur_bytes, tot_bytes, index)
+
+    try:
+      res = session.upload_project(
+        name=name,
+        path=path,
+        archive_name=archive_name,
+        callback=_callback,
+        validate=attempt == 1,
+      )
+    except (AzkabanError, HTTPError) as err:
+      if reporter:
+        reporter(attempt, progress['bytes'], err)
+      if not created and _is_missing(err, create):
+        session.create_project(name, name)
+        created = True
+        continue
+      _check_error(err)
+      failures += 1
+      if failures > retries:
+        raise err
+      if (
+        isinstance(err, HTTPError) and
+        progress['bytes'] == progress['total']
+      ):
+        _logger.warning(
+          'Archive for %s was fully sent before the error, the server might '
+          'have processed it: retrying can create a duplicate version.', name
+        )
+      wait = delay * 2 ** (failures - 1)
+      _logger.warning(
+        'Upload attempt %s of %s failed (%s), retrying in %s seconds.',
+        attempt, name, err, wait
+      )
+      sleep(wait)
+    else:
+      if reporter:
+        reporter(attempt, progress['bytes'], None)
+      return res
+
+
+def _is_missing(err, create):
+  """Check whether a failed upload should be followed by the project's creation.
+
+  :param err: Error raised by the upload.
+  :param create: Whether the project should be created if it doesn't exist.
+
+  """
+  if isinstance(err, HTTPError):
+    # See https://github.com/mtth/azkaban/pull/34 for more context on why the
+    # project is created in this case.
+    return err.response.status_code == 410
+  return create and str(err).endswith("doesn't exist.")
+
+def _check_error(err):
+  """Raise an error unless a failed upload can be retried.
+
+  :param err: Error raised by the upload.
+
+  """
+  if isinstance(err, HTTPError):
+    code = err.response.status_code
+    if code == 400:
+      raise AzkabanError(
+        'Failed to upload project (%s HTTP error). Check that the project '
+        'is not locked, exists, and that your user has write permissions.',
+        code
+      )
+    elif code == 401:
+      raise AzkabanError(
+        'Not authorized to upload project (%s HTTP error). Check that your '
+        'user has write permissions.', code
+      )
+    elif code not in _TRANSIENT_CODES:
+      raise err
+  elif not str(err).startswith('Unable to connect'):
+    raise err
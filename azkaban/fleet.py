@@ -0,0 +1,205 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""Fleet module.
+
+This contains functions acting on many executions at once, e.g. to pause or
+cancel every running execution of a project during an incident, and on many
+servers at once (e.g. to upload a project to each cluster it is deployed to).
+All requests are sent concurrently.
+
+"""
+
+from .remote import Session
+from .util import AzkabanError, Config, concurrently
+from six import string_types
+import logging as lg
+import re
+
+
+_logger = lg.getLogger(__name__)
+
+_ACTIONS = {
+  'cancel': 'cancel_execution',
+  'pause': 'pause_execution',
+  'resume': 'resume_execution',
+}
+
+
+def find_running_executions(session, project, flows=None, workers=8):
+  """Find running executions of a project.
+
+  :param session: :class:`~azkaban.remote.Session` instance.
+  :param project: Project name.
+  :param flows: Regular expression (string or compiled). If specified, only
+    executions of flows whose entire name it matches are returned.
+  :param workers: Maximum number of concurrent requests.
+
+  Returns a list of `(flow, exec_id)` tuples, sorted by flow and execution ID.
+  If the running executions of any flow couldn't be fetched, an
+  :class:`~azkaban.util.AzkabanError` is raised (rather than returning a
+  partial list).
+
+  """
+  if flows:
+    flows = _compile_full(flows)
+  names = [
+    flow['flowId'] for flow in session.get_workflows(project)['flows']
+    if not flows or flows.match(flow['flowId'])
+  ]
+  executions, errors = _get_running(
+    session, [(project, name) for name in names], workers
+  )
+  if errors:
+    raise AzkabanError(
+      'Unable to fetch running executions of %s flow(s): %s',
+      len(errors), ', '.join(sorted(flow for _, flow in errors))
+    )
+  return [(flow, exec_id) for _, flow, exec_id in executions]
+
+def scan_running_executions(session, flows=None, workers=16):
+  """Find all running executions on a server.
+
+  :param session: :class:`~azkaban.remote.Session` instance.
+  :param flows: Iterable of `(project, flow)` tuples to check, e.g. as returned
+    by :meth:`~azkaban.inventory.Inventory.flows` (which avoids listing the
+    server's flows on every scan). By default, all projects' flows are listed
+    (concurrently) first.
+  :param workers: Maximum number of concurrent requests.
+
+  Returns a dictionary with keys `executions` (list of `(project, flow,
+  exec_id)` tuples, sorted) and `errors` (dictionary of errors keyed by
+  `(project, flow)`, or by `(project, None)` if a project's flows couldn't be
+  listed). Unlike :func:`find_running_executions`, errors don't cause the
+  entire scan to fail: flows can be deleted between listing and scan.
+
+  """
+  errors = {}
+  if flows is None:
+    projects = [
+      project['projectName']
+      for project in session.get_projects()['projects']
+    ]
+    flows = []
+    results = concurrently(session.get_workflows, projects, workers)
+    for project, res, error in results:
+      if error:
+        errors[(project, None)] = error
+      else:
+        flows.extend(
+          (project, flow['flowId']) for flow in res.get('flows') or []
+        )
+  executions, flow_errors = _get_running(session, sorted(flows), workers)
+  errors.update(flow_errors)
+  return {'executions': executions, 'errors': errors}
+
+def control_executions(session, exec_ids, action, workers=8):
+  """Cancel, pause, or resume executions concurrently.
+
+  :param session: :class:`~azkaban.remote.Session` instance.
+  :param exec_ids: Iterable of execution IDs.
+  :param action: One of `'cancel'`, `'pause'`, `'resume'`.
+  :param workers: Maximum number of concurrent requests.
+
+  Yields `(exec_id, res, error)` tuples as requests complete, `res` being the
+  server's response. If a request failed (e.g. because the execution finished
+  in the meantime), `res` is `None` and `error` the exception raised.
+
+  """
+  try:
+    method = getattr(session, _ACTIONS[action])
+  except KeyError:
+    raise ValueError('Invalid `action` value: %r.' % (action, ))
+  return concurrently(method, exec_ids, workers)
+
+def get_sessions(aliases, config=None):
+  """Create sessions for several aliases.
+
+  :param aliases: Iterable of alias names. Alias groups, i.e. aliases whose
+    section defines a comma-separated list of `aliases` (e.g. `aliases = foo,
+    bar`) rather than a `url`, are expanded.
+  :param config: Azkaban configuration object, shared by all sessions.
+
+  Returns a dictionary of :class:`~azkaban.remote.Session` instances keyed by
+  alias name.
+
+  """
+  config = config or Config()
+  sessions = {}
+  pending = list(aliases)
+  seen = set()
+  while pending:
+    alias = pending.pop(0).strip()
+    if not alias or alias in seen:
+      continue
+    seen.add(alias)
+    section = 'alias.%s' % (alias, )
+    if config.parser.has_option(section, 'aliases'):
+      pending.extend(config.parser.get(section, 'aliases').split(','))
+    else:
+      sessions[alias] = Session.from_alias(alias, config=config)
+  if not sessions:
+    raise AzkabanError('No aliases specified.')
+  return sessions
+
+def fan_out(sessions, func, workers=None):
+  """Call a function once per session concurrently.
+
+  :param sessions: Dictionary of :class:`~azkaban.remote.Session` instances,
+    e.g. as returned by :func:`get_sessions`.
+  :param func: Function called with each session.
+  :param workers: Maximum number of concurrent calls. By default, all sessions
+    are used at once, such that a slow server doesn't delay the others.
+
+  Yields `(alias, result, error)` tuples as calls complete. If a call failed,
+  `result` is `None` and `error` the exception raised.
+
+  """
+  return concurrently(
+    lambda alias: func(sessions[alias]),
+    sorted(sessions),
+    workers or len(sessions),
+  )
+
+def _get_running(session, flows, workers):
+  """Fetch running executions of flows concurrently.
+
+  :param session: :class:`~azkaban.remote.Session` instance.
+  :param flows: List of `(project, flow)` tuples.
+  :param workers: Maximum number of concurrent requests.
+
+  Returns a sorted list of `(project, flow, exec_id)` tuples and a dictionary
+  of errors keyed by `(project, flow)`.
+
+  """
+  _logger.debug('Fetching running executions of %s flows.', len(flows))
+  executions = []
+  errors = {}
+  results = concurrently(
+    lambda key: session.get_running_workflows(*key), flows, workers
+  )
+  for (project, flow), res, error in results:
+    if error:
+      _logger.warning(
+        'Unable to fetch running executions of %s/%s: %s', project, flow, error
+      )
+      errors[(project, flow)] = error
+    else:
+      exec_ids = res.get('execIds') or []
+      executions.extend((project, flow, exec_id) for exec_id in exec_ids)
+  return sorted(executions), errors
+
+def _compile_full(pattern):
+  """Compile a pattern such that it only matches entire strings.
+
+  :param pattern: Regular expression (string or compiled).
+
+  Returns a compiled pattern, to be used via its `match` method (python 2
+  doesn't have `fullmatch`). Note that checking the end of a regular match
+  isn't enough: alternations stop at their first matching branch (e.g.
+  `'load|load_daily'` only matches the prefix of `'load_daily'`).
+
+  """
+  if isinstance(pattern, string_types):
+    return re.compile(r'(?:%s)\Z' % (pattern, ))
+  return re.compile(r'(?:%s)\Z' % (pattern.pattern, ), pattern.flags)
@@ -0,0 +1,265 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""Execution history module.
+
+This contains the :class:`History` class, a local mirror of flows' executions
+(along with their jobs' statuses). It lets months of execution metadata be
+analyzed without any requests to the server.
+
+"""
+
+from .remote import is_final, iter_nodes
+from .util import Adapter
+import logging as lg
+import sqlite3
+
+
+_logger = lg.getLogger(__name__)
+
+_SCHEMA = '''
+  CREATE TABLE IF NOT EXISTS executions (
+    exec_id INTEGER PRIMARY KEY,
+    project TEXT,
+    flow TEXT,
+    status TEXT,
+    submit_time INTEGER,
+    start_time INTEGER,
+    end_time INTEGER,
+    submit_user TEXT
+  );
+  CREATE TABLE IF NOT EXISTS nodes (
+    exec_id INTEGER,
+    job TEXT, -- nested ID (e.g. 'subflow:job') inside embedded flows
+    type TEXT,
+    status TEXT,
+    start_time INTEGER,
+    end_time INTEGER,
+    attempt INTEGER,
+    PRIMARY KEY (exec_id, job)
+  );
+  CREATE INDEX IF NOT EXISTS executions_flow
+    ON executions (project, flow, exec_id);
+  CREATE INDEX IF NOT EXISTS executions_status ON executions (status);
+  CREATE INDEX IF NOT EXISTS nodes_job ON nodes (job, status);
+  CREATE INDEX IF NOT EXISTS nodes_status ON nodes (status);
+'''
+
+
+class History(object):
+
+  """Local store of flows' execution history.
+
+  :param path: Path to the SQLite database. It will be created if necessary.
+    Use a separate database per server.
+
+  All times are in milliseconds since the epoch, as returned by the server
+  (`-1` if unset).
+
+  Usage:
+
+  .. code:: python
+
+    with History('history.sqlite') as history:
+      history.sync(session, 'project', 'flow')
+      durations = history.durations('project', 'flow')
+
+  """
+
+  def __init__(self, path):
+    self.path = path
+    self._connection = sqlite3.connect(path)
+    self._connection.executescript(_SCHEMA)
+    self._logger = Adapter(repr(self), _logger)
+
+  def __repr__(self):
+    return '<%s(path=%r)>' % (self.__class__.__name__, self.path)
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc_info):
+    self.close()
+
+  def close(self):
+    """Close the underlying database connection."""
+    self._connection.close()
+
+  def sync(self, session, project, flow, limit=None, workers=8):
+    """Fetch a flow's executions which aren't yet stored (or finished).
+
+    :param session: :class:`~azkaban.remote.Session` instance.
+    :param project: Project name.
+    :param flow: Flow name.
+    :param limit: Maximum number of executions fetched on the flow's first
+      sync, most recent first. By default, its entire history is fetched. This
+      is ignored on subsequent syncs: all executions more recent than the
+      latest one stored are fetched, such that the stored history doesn't have
+      any gaps.
+    :param workers: Maximum number of concurrent requests.
+
+    Only executions more recent than the latest one stored are listed, and
+    their statuses fetched concurrently along with those of stored executions
+    which were still running. Returns a dictionary with keys `added` and
+    `updated` (numbers of executions).
+
+    """
+    row = self._connection.execute(
+      'SELECT MAX(exec_id) FROM executions WHERE project = ? AND flow = ?',
+      (project, flow),
+    ).fetchone()
+    last_id = row[0]
+    new_ids = [
+      execution['execId']
+      for execution in session.iter_workflow_executions(
+        project, flow, limit=limit if last_id is None else None,
+        after_id=last_id,
+      )
+    ]
+    running_ids = set(
+      exec_id
+      for exec_id, status in self._connection.execute(
+        'SELECT exec_id, status FROM executions WHERE project = ? AND flow = ?',
+        (project, flow),
+      )
+      if not is_final(status)
+    )
+    self._logger.info(
+      'Syncing %s new and %s running executions of %s/%s.',
+      len(new_ids), len(running_ids), project, flow
+    )
+    counts = {'added': 0, 'updated': 0}
+    errors = []
+    statuses = session.get_execution_statuses(
+      new_ids + sorted(running_ids), workers
+    )
+    for exec_id, status, error in statuses:
+      if error:
+        self._logger.warning('Unable to sync execution %s: %s', exec_id, error)
+        errors.append(exec_id)
+        continue
+      with self._connection:
+        self._save(project, flow, exec_id, status)
+      counts['updated' if exec_id in running_ids else 'added'] += 1
+    if errors:
+      # executions which couldn't be fetched would otherwise be skipped on
+      # subsequent syncs, since only later executions are listed
+      with self._connection:
+        self._connection.executemany(
+          'INSERT OR IGNORE INTO executions (exec_id, project, flow, status) '
+          'VALUES (?, ?, ?, ?)',
+          [(exec_id, project, flow, 'UNKNOWN') for exec_id in errors],
+        )
+    return counts
+
+  def durations(self, project, flow, job=None, status='SUCCEEDED',
+    limit=None):
+    """Durations of a flow's (or job's) past executions, most recent first.
+
+    :param project: Project name.
+    :param flow: Flow name.
+    :param job: Job name (its nested ID, e.g. `'subflow:job'`, for jobs inside
+      embedded flows). If specified, the durations of this job inside the
+      flow's executions are returned instead.
+    :param status: Only executions (or jobs) which finished with this status
+      are considered. All finished ones are if `None`.
+    :param limit: Maximum number of durations returned.
+
+    Returns a list of `(exec_id, duration)` tuples, durations being in
+    seconds.
+
+    """
+    if job:
+      query = (
+        'SELECT n.exec_id, n.end_time - n.start_time FROM nodes n '
+        'JOIN executions e ON n.exec_id = e.exec_id '
+        'WHERE e.project = ? AND e.flow = ? AND n.job = ? '
+        'AND n.start_time >= 0 AND n.end_time >= 0'
+      )
+      params = [project, flow, job]
+      prefix = 'n.'
+    else:
+      query = (
+        'SELECT exec_id, end_time - start_time FROM executions '
+        'WHERE project = ? AND flow = ? '
+        'AND start_time >= 0 AND end_time >= 0'
+      )
+      params = [project, flow]
+      prefix = ''
+    if status:
+      query += ' AND %sstatus = ?' % (prefix, )
+      params.append(status)
+    query += ' ORDER BY %sexec_id DESC' % (prefix, )
+    if limit:
+      query += ' LIMIT %d' % (limit, )
+    return [
+      (exec_id, duration / 1000.)
+      for exec_id, duration in self._connection.execute(query, params)
+    ]
+
+  def failures(self, project=None, flow=None, after_time=None):
+    """Failed jobs, most recent first.
+
+    :param project: Project name.
+    :param flow: Flow name.
+    :param after_time: Only consider jobs which started after this time.
+
+    Returns a list of `(exec_id, project, flow, job, status, start_time)`
+    tuples, for jobs which failed or were killed.
+
+    """
+    query = (
+      'SELECT n.exec_id, e.project, e.flow, n.job, n.status, n.start_time '
+      'FROM nodes n JOIN executions e ON n.exec_id = e.exec_id '
+      "WHERE n.status IN ('FAILED', 'KILLED')"
+    )
+    params = []
+    for column, value in [('e.project', project), ('e.flow', flow)]:
+      if value is not None:
+        query += ' AND %s = ?' % (column, )
+        params.append(value)
+    if after_time is not None:
+      query += ' AND n.start_time > ?'
+      params.append(after_time)
+    query += ' ORDER BY n.exec_id DESC, n.job'
+    return self._connection.execute(query, params).fetchall()
+
+  def _save(self, project, flow, exec_id, status):
+    """Store an execution's status.
+
+    :param project: Project name.
+    :param flow: Flow name.
+    :param exec_id: Execution ID.
+    :param status: Execution status, as returned by
+      :meth:`~azkaban.remote.Session.get_execution_status`.
+
+    """
+    self._connection.execute(
+      'INSERT OR REPLACE INTO executions VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+      (
+        exec_id,
+        project,
+        flow,
+        status.get('status'),
+        status.get('submitTime', -1),
+        status.get('startTime', -1),
+        status.get('endTime', -1),
+        status.get('submitUser'),
+      ),
+    )
+    self._connection.execute('DELETE FROM nodes WHERE exec_id = ?', (exec_id, ))
+    self._connection.executemany(
+      'INSERT OR REPLACE INTO nodes VALUES (?, ?, ?, ?, ?, ?, ?)',
+      [
+        (
+          exec_id,
+          node['id'],
+          node.get('type'),
+          node.get('status'),
+          node.get('startTime', -1),
+          node.get('endTime', -1),
+          node.get('attempt', 0),
+        )
+        for node in iter_nodes(status.get('nodes') or [])
+      ],
+    )
@@ -0,0 +1,232 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""Inventory module.
+
+This contains the :class:`Inventory` class, a local index of all the projects,
+flows, and jobs found on an Azkaban server. It makes questions such as "which
+flows contain this job?" answerable without any requests to the server.
+
+"""
+
+from .util import Adapter, Throttle, concurrently
+from time import time
+import logging as lg
+import sqlite3
+
+
+_logger = lg.getLogger(__name__)
+
+_SCHEMA = '''
+  CREATE TABLE IF NOT EXISTS projects (
+    name TEXT PRIMARY KEY,
+    id INTEGER,
+    crawled REAL
+  );
+  CREATE TABLE IF NOT EXISTS jobs (
+    project TEXT,
+    flow TEXT,
+    job TEXT,
+    type TEXT,
+    dependencies TEXT,
+    PRIMARY KEY (project, flow, job)
+  );
+  CREATE INDEX IF NOT EXISTS jobs_job ON jobs (job);
+  CREATE INDEX IF NOT EXISTS jobs_type ON jobs (type);
+'''
+
+
+class Inventory(object):
+
+  """Local index of a server's projects, flows, and jobs.
+
+  :param path: Path to the SQLite database. It will be created if necessary.
+    Use a separate database per server.
+
+  Usage:
+
+  .. code:: python
+
+    with Inventory('inventory.sqlite') as inventory:
+      inventory.refresh(session)
+      for project, flow, job, job_type in inventory.query(job='load'):
+        print(project, flow)
+
+  """
+
+  def __init__(self, path):
+    self.path = path
+    self._connection = sqlite3.connect(path)
+    self._connection.executescript(_SCHEMA)
+    self._logger = Adapter(repr(self), _logger)
+
+  def __repr__(self):
+    return '<%s(path=%r)>' % (self.__class__.__name__, self.path)
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc_info):
+    self.close()
+
+  def close(self):
+    """Close the underlying database connection."""
+    self._connection.close()
+
+  def refresh(self, session, workers=8, rate=None, max_age=3600):
+    """Crawl the server, only fetching projects which weren't recently.
+
+    :param session: :class:`~azkaban.remote.Session` instance.
+    :param workers: Maximum number of concurrent requests.
+    :param rate: Maximum number of requests per second. Unlimited by default.
+    :param max_age: Time in seconds after which projects are crawled again.
+      If `None`, all projects are crawled.
+
+    The server's project listing doesn't include any version, so the crawl is
+    incremental by age only: changes to a project are picked up once its
+    entries are older than `max_age`. New projects are always crawled and
+    projects which were deleted from the server are removed.
+
+    Flows of all projects to crawl are fetched concurrently, then the jobs of
+    all their flows. A project is only updated once all its requests have
+    succeeded, otherwise its previous entries are kept (and it will be crawled
+    again on the next refresh).
+
+    Returns a dictionary with keys `crawled`, `skipped`, and `removed` (numbers
+    of projects) and `errors` (dictionary of errors keyed by project name).
+
+    """
+    throttle = Throttle(rate) if rate else None
+
+    def _call(func, *args):
+      """Issue a (possibly throttled) request."""
+      if throttle:
+        throttle.wait()
+      return func(*args)
+
+    listed = dict(
+      (project['projectName'], project)
+      for project in _call(session.get_projects)['projects']
+    )
+    known = dict(
+      self._connection.execute('SELECT name, crawled FROM projects')
+    )
+    removed = set(known) - set(listed)
+    now = time()
+    stale = sorted(
+      name for name in listed
+      if name not in known or max_age is None or now - known[name] > max_age
+    )
+    self._logger.info('Crawling %s of %s projects.', len(stale), len(listed))
+    errors = {}
+    flows = {}
+    results = concurrently(
+      lambda name: _call(session.get_workflows, name), stale, workers
+    )
+    for name, res, error in results:
+      if error:
+        errors[name] = error
+      else:
+        flows[name] = [flow['flowId'] for flow in res.get('flows') or []]
+    jobs = dict((name, []) for name in flows)
+    results = concurrently(
+      lambda key: _call(session.get_workflow_info, *key),
+      [(name, flow) for name in sorted(flows) for flow in flows[name]],
+      workers,
+    )
+    for (name, flow), res, error in results:
+      if error:
+        errors.setdefault(name, error)
+      else:
+        jobs[name].extend(
+          (
+            name,
+            flow,
+            node['id'],
+            node.get('type'),
+            ','.join(node.get('in') or []),
+          )
+          for node in res.get('nodes') or []
+        )
+    with self._connection:
+      for name in removed:
+        self._delete(name)
+      for name, rows in jobs.items():
+        if name in errors:
+          self._logger.warning('Unable to crawl %s: %s', name, errors[name])
+          self._connection.execute(
+            'UPDATE projects SET crawled = 0 WHERE name = ?', (name, )
+          )
+          continue
+        self._delete(name)
+        self._connection.execute(
+          'INSERT INTO projects VALUES (?, ?, ?)',
+          (name, listed[name].get('projectId'), now),
+        )
+        self._connection.executemany(
+          'INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?)', rows
+        )
+    return {
+      'crawled': len(jobs) - len(set(jobs) & set(errors)),
+      'skipped': len(listed) - len(stale),
+      'removed': len(removed),
+      'errors': errors,
+    }
+
+  def query(self, job=None, job_type=None, project=None, flow=None):
+    """Find jobs.
+
+    :param job: Job name.
+    :param job_type: Job type (e.g. `'command'`).
+    :param project: Project name.
+    :param flow: Flow name.
+
+    All parameters are optional, only jobs matching all those specified are
+    returned. Values containing a `*` are matched as glob patterns (e.g.
+    `'load_*'`), others exactly. Returns a list of `(project, flow, job,
+    job_type)` tuples, sorted.
+
+    """
+    filters = [
+      (column, value)
+      for column, value in [
+        ('project', project), ('flow', flow), ('job', job), ('type', job_type),
+      ]
+      if value is not None
+    ]
+    clause = ' AND '.join(
+      '%s %s ?' % (column, 'GLOB' if '*' in value else '=')
+      for column, value in filters
+    )
+    return self._connection.execute(
+      'SELECT project, flow, job, type FROM jobs %s ORDER BY 1, 2, 3' % (
+        'WHERE %s' % (clause, ) if clause else '',
+      ),
+      [value for _, value in filters],
+    ).fetchall()
+
+  def flows(self, project=None):
+    """List indexed flows.
+
+    :param project: Project name. If unspecified, flows of all projects are
+      returned.
+
+    Returns a sorted list of `(project, flow)` tuples.
+
+    """
+    query = 'SELECT DISTINCT project, flow FROM jobs'
+    params = []
+    if project is not None:
+      query += ' WHERE project = ?'
+      params.append(project)
+    return self._connection.execute(query + ' ORDER BY 1, 2', params).fetchall()
+
+  def _delete(self, name):
+    """Remove a project's entries.
+
+    :param name: Project name.
+
+    """
+    self._connection.execute('DELETE FROM projects WHERE name = ?', (name, ))
+    self._connection.execute('DELETE FROM jobs WHERE project = ?', (name, ))
+
@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""Job notification module.
+
+Azkaban can call URLs when jobs start and finish (this requires job callbacks
+to be enabled on the server, via `azkaban.jobcallback.enabled=true`). The
+:class:`Notifier` class runs a small local HTTP server receiving these calls,
+which lets :class:`~azkaban.remote.Execution` waiters wake up as soon as one of
+their jobs changes state rather than repeatedly polling the server.
+
+"""
+
+from .util import Adapter
+from collections import defaultdict
+from six.moves.BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from six.moves.socketserver import ThreadingMixIn
+from six.moves.urllib.parse import parse_qs, urlparse
+from socket import getfqdn
+from threading import Condition, Thread
+from time import time
+import logging as lg
+
+
+_logger = lg.getLogger(__name__)
+
+
+class _Server(ThreadingMixIn, HTTPServer):
+
+  """Threaded HTTP server, holding a reference to its notifier."""
+
+  daemon_threads = True
+  notifier = None
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+  """Request handler forwarding Azkaban job callbacks to the notifier."""
+
+  def do_GET(self):
+    """Record the notification. The method used by Azkaban by default."""
+    query = parse_qs(urlparse(self.path).query)
+    self.server.notifier._receive(dict((k, v[0]) for k, v in query.items()))
+    self.send_response(200)
+    self.end_headers()
+
+  def do_POST(self):
+    """Drain the request body (if any) and record the notification."""
+    length = int(self.headers.get('Content-Length') or 0)
+    if length:
+      self.rfile.read(length)
+    self.do_GET()
+
+  def log_message(self, fmt, *args):
+    """Send access logs to our logger rather than standard error."""
+    _logger.debug(fmt, *args)
+
+
+class Notifier(object):
+
+  """Local receiver for Azkaban job notifications.
+
+  :param host: Interface the receiver binds to. Defaults to all interfaces.
+  :param port: Port the receiver listens on. Defaults to a random free port.
+  :param address: Base URL of the receiver, as reachable from the Azkaban
+    executors. Defaults to this machine's fully qualified domain name and the
+    bound port.
+
+  Usage:
+
+  .. code:: python
+
+    with Notifier() as notifier:
+      execution = Execution.start(session, 'project', 'flow', notifier=notifier)
+      execution.wait()
+
+  Notifications are only sent for runs including this receiver's
+  :attr:`properties`, which is done automatically when passing it to
+  :meth:`~azkaban.remote.Session.run_workflow`.
+
+  """
+
+  statuses = ('started', 'completed')
+
+  def __init__(self, host='', port=0, address=None):
+    self._address = address
+    self._server = _Server((host, port), _Handler)
+    self._server.notifier = self
+    self._thread = None
+    self._condition = Condition()
+    self._events = defaultdict(list)
+    self._logger = Adapter(repr(self), _logger)
+    self._logger.debug('Instantiated.')
+
+  def __repr__(self):
+    return '<%s(url=%r)>' % (self.__class__.__name__, self.url)
+
+  def __enter__(self):
+    self.start()
+    return self
+
+  def __exit__(self, *exc_info):
+    self.stop()
+
+  @property
+  def url(self):
+    """Base URL Azkaban will send notifications to."""
+    if self._address:
+      return self._address.rstrip('/')
+    return 'http://%s:%s' % (getfqdn(), self._server.server_address[1])
+
+  @property
+  def properties(self):
+    """Job properties enabling notifications to this receiver.
+
+    These use Azkaban's job callback tokens to include the execution ID, job
+    name, and job status in each notification.
+
+    """
+    url = (
+      '%s/?execid=?{executionId}&project=?{project}&flow=?{flow}'
+      '&job=?{job}&status=?{status}'
+      % (self.url, )
+    )
+    return dict(
+      ('job.notification.%s.1.url' % (status, ), url)
+      for status in self.statuses
+    )
+
+  def start(self):
+    """Start receiving notifications from a background thread."""
+    if self._thread:
+      return
+    self._thread = Thread(target=self._server.serve_forever)
+    self._thread.daemon = True
+    self._thread.start()
+    self._logger.info('Started.')
+
+  def stop(self):
+    """Stop receiving notifications."""
+    if not self._thread:
+      return
+    self._server.shutdown()
+    self._server.server_close()
+    self._thread = None
+    self._logger.info('Stopped.')
+
+  def events(self, exec_id):
+    """Notifications received so far for an execution.
+
+    :param exec_id: Execution ID.
+
+    Returns a list of dictionaries, in the order they were received. Each
+    contains the notification's `execid`, `project`, `flow`, `job`, and
+    `status`, along with the time it was received (`time`).
+
+    """
+    with self._condition:
+      return list(self._events[str(exec_id)])
+
+  def wait(self, exec_id, seen=0, timeout=None):
+    """Wait for a new notification for an execution.
+
+    :param exec_id: Execution ID.
+    :param seen: Number of notifications already seen by the caller. This
+      method returns as soon as more have been received.
+    :param timeout: Maximum time to wait, in seconds. Waits indefinitely if
+      unspecified.
+
+    Returns the total number of notifications received for this execution,
+    which can be passed as `seen` on the next call.
+
+    """
+    exec_id = str(exec_id)
+    deadline = None if timeout is None else time() + timeout
+    with self._condition:
+      # other executions' notifications also wake us up, hence the loop
+      while len(self._events[exec_id]) <= seen:
+        if deadline is None:
+          self._condition.wait()
+        else:
+          remaining = deadline - time()
+          if remaining <= 0:
+            break
+          self._condition.wait(remaining)
+      return len(self._events[exec_id])
+
+  def _receive(self, params):
+    """Record a notification and wake up any waiters.
+
+    :param params: Notification query parameters.
+
+    """
+    if not params.get('execid'):
+      self._logger.warning('Ignoring notification without ID: %r', params)
+      return
+    self._logger.debug('Received notification: %r', params)
+    params['time'] = time()
+    with self._condition:
+      self._events[params['execid']].append(params)
+      self._condition.notify_all()
@@ -3,8 +3,10 @@
 
 """Project definition module."""
 
+from hashlib import sha1
+from six import string_types
 from weakref import WeakValueDictionary
-from zipfile import ZipFile
+from zipfile import ZipFile, ZipInfo
 from .util import AzkabanError, Adapter, flatten, temppath, write_properties
 import logging as lg
 import os
@@ -211,31 +213,49 @@ class Project(object):
   def build(self, path, overwrite=False):
     """Create the project archive.
 
-    :param path: Destination path.
+    :param path: Destination path. This can also be a writable binary file
+      object (e.g. `BytesIO`, to build the archive in memory).
     :param overwrite: Don't throw an error if a file already exists at `path`.
 
+    Returns a digest of the archive's contents. Unlike the archive itself (which
+    includes modification times), it only changes when the project's files or
+    options do, so it can be used to detect unchanged builds.
+
     """
     self._logger.debug('Building.')
     # not using a with statement for compatibility with older python versions
-    if osp.exists(path) and not overwrite:
+    if isinstance(path, string_types) and osp.exists(path) and not overwrite:
       raise AzkabanError('Path %r already exists.' % (path, ))
     if not (len(self._jobs) or len(self._files)):
       raise AzkabanError('Building empty project.')
+    digests = {}
     writer = ZipFile(path, 'w')
+
+    def _write(fpath, archive_path):
+      """Add a file to the archive, keeping track of its digest."""
+      digests[archive_path] = _write_file(writer, fpath, archive_path)
+
     try:
       if self.properties:
         with temppath() as fpath:
           write_properties(flatten(self.properties), fpath)
-          writer.write(fpath, 'project.properties')
+          _write(fpath, 'project.properties')
       for name, job in self._jobs.items():
         with temppath() as fpath:
           job.build(fpath)
-          writer.write(fpath, '%s.job' % (name, ))
+          _write(fpath, '%s.job' % (name, ))
       for archive_path, (fpath, _) in self._files.items():
-        writer.write(fpath, archive_path)
+        _write(fpath, archive_path)
     finally:
       writer.close()
-    self._logger.info('Built as %s.', path)
+    if isinstance(path, string_types):
+      self._logger.info('Built as %s.', path)
+    else:
+      self._logger.info('Built into %s.', getattr(path, 'name', 'file object'))
+    digest = sha1()
+    for archive_path, file_digest in sorted(digests.items()):
+      digest.update(('%s\0%s\n' % (archive_path, file_digest)).encode('utf-8'))
+    return digest.hexdigest()
 
   @classmethod
   def load(cls, path, new=False):
@@ -294,3 +314,43 @@ class Project(object):
         len(cls._registry), path, ', '.join(cls._registry)
       )
       return cls._registry.copy()
+
+
+def _write_file(writer, path, archive_path, chunksize=1 << 20):
+  """Add a file to an archive, returning the hexadecimal digest of its contents.
+
+  :param writer: `ZipFile` instance, opened for writing.
+  :param path: Path to file.
+  :param archive_path: Path of the file inside the archive.
+  :param chunksize: Size of each chunk read.
+
+  Each chunk is hashed as it is written, such that the file is only read once.
+  Python versions which can't stream archive members (before 3.6) read it a
+  second time to compute its digest.
+
+  """
+  if not hasattr(ZipInfo, 'from_file'):
+    writer.write(path, archive_path)
+    return _get_file_digest(path, chunksize)
+  info = ZipInfo.from_file(path, archive_path)
+  info.compress_type = writer.compression
+  digest = sha1()
+  with open(path, 'rb') as reader:
+    with writer.open(info, 'w') as member:
+      for chunk in iter(lambda: reader.read(chunksize), b''):
+        digest.update(chunk)
+        member.write(chunk)
+  return digest.hexdigest()
+
+def _get_file_digest(path, chunksize=1 << 20):
+  """Hexadecimal digest of a file's contents.
+
+  :param path: Path to file.
+  :param chunksize: Size of each chunk read.
+
+  """
+  digest = sha1()
+  with open(path, 'rb') as reader:
+    for chunk in iter(lambda: reader.read(chunksize), b''):
+      digest.update(chunk)
+  return digest.hexdigest()
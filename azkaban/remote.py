@@ -8,14 +8,19 @@ a remote Azkaban server.
 
 """
 
-from .util import AzkabanError, Config, Adapter, MultipartForm, flatten
+from .cron import Cron
+from .util import (AzkabanError, Config, Adapter, MultipartForm, concurrently,
+  flatten, prefetch)
 from getpass import getpass, getuser
 from os.path import basename, exists
+from requests.adapters import HTTPAdapter
 from requests.exceptions import HTTPError
 from six import string_types
 from six.moves.configparser import NoOptionError, NoSectionError
+from six.moves.http_cookiejar import DefaultCookiePolicy
 from six.moves.urllib.parse import urlparse
-from time import sleep
+from threading import Condition, Event, Lock, Thread
+from time import sleep, time
 from warnings import warn
 import json
 import logging as lg
@@ -25,12 +30,32 @@ import requests as rq
 
 _logger = lg.getLogger(__name__)
 
+# statuses after which an execution (or one of its jobs) will not change
+_FINAL_STATUSES = frozenset([
+  'CANCELLED', 'DISABLED', 'FAILED', 'FAILED_SUCCEEDED', 'KILLED', 'SKIPPED',
+  'SUCCEEDED',
+])
 
-def _azkaban_request(method, url, **kwargs):
+# statuses of jobs which don't need to run again to complete an execution
+_COMPLETE_STATUSES = frozenset(['DISABLED', 'SKIPPED', 'SUCCEEDED'])
+
+# statuses of jobs which have logs to follow
+_LOGGED_STATUSES = _FINAL_STATUSES | frozenset(['RUNNING', 'KILLING'])
+
+# size of the chunks streamed when uploading archives
+_UPLOAD_CHUNKSIZE = 1 << 20
+
+# serializes password prompts and session ID caching across sessions
+_LOGIN_LOCK = Lock()
+
+
+def _azkaban_request(method, url, client=None, **kwargs):
   """Make request to azkaban server and catch common errors.
 
   :param method: GET, POST, etc.
   :param url: Endpoint url.
+  :param client: `requests.Session` used to send the request, reusing its
+    pooled connections. By default a new connection is opened.
   :param **kwargs: Arguments forwarded to the request handler.
 
   This function is meant to handle common errors and return a more helpful
@@ -38,7 +63,7 @@ def _azkaban_request(method, url, **kwargs):
 
   """
   try:
-    response = rq.request(url=url, method=method, **kwargs)
+    response = (client or rq).request(url=url, method=method, **kwargs)
   except rq.ConnectionError as err:
     raise AzkabanError('Unable to connect to Azkaban server %r: %s', url, err)
   except rq.exceptions.MissingSchema:
@@ -65,6 +90,129 @@ def _extract_json(response):
     else:
       return json
 
+def _iter_pages(pages, size=0):
+  """Flatten pages of items (e.g. log windows), optionally prefetching them.
+
+  :param pages: Iterable of lists of items.
+  :param size: Number of pages to prefetch from a background thread. No
+    thread is started if this is `0`.
+
+  """
+  if size:
+    pages = prefetch(pages, size)
+  for items in pages:
+    for item in items:
+      yield item
+
+def _iter_execution_pages(session, project, flow, limit=None, after_id=None,
+  after_time=None, page_size=100, max_page_size=1000, target_time=1):
+  """Pages of a flow's executions, most recent first.
+
+  :param session: :class:`Session` instance.
+  :param project: Project name.
+  :param flow: Flow name.
+  :param limit: Cf. :meth:`Session.iter_workflow_executions`.
+  :param after_id: Cf. :meth:`Session.iter_workflow_executions`.
+  :param after_time: Cf. :meth:`Session.iter_workflow_executions`.
+  :param page_size: Initial number of executions requested per page.
+  :param max_page_size: Maximum number of executions requested per page.
+  :param target_time: Desired response time, in seconds. The page size is
+    doubled after responses faster than half of it, and halved after slower
+    ones.
+
+  Executions submitted while pages are being fetched shift older ones to later
+  pages; the resulting duplicates are skipped.
+
+  """
+  start = 0
+  count = 0
+  last_id = None
+  while limit is None or count < limit:
+    length = page_size if limit is None else min(page_size, limit - count)
+    before = time()
+    res = session.get_workflow_executions(
+      project, flow, start=start, length=length
+    )
+    elapsed = time() - before
+    executions = res.get('executions') or []
+    start += len(executions)
+    finished = len(executions) < length
+    page = []
+    for execution in executions:
+      exec_id = execution['execId']
+      if last_id is not None and exec_id >= last_id:
+        continue
+      submit_time = execution.get('submitTime', 0)
+      if (
+        (after_id is not None and exec_id <= after_id) or
+        (after_time is not None and submit_time <= after_time)
+      ):
+        finished = True
+        break
+      page.append(execution)
+      last_id = exec_id
+    if limit is not None:
+      page = page[:limit - count]
+    count += len(page)
+    if page:
+      yield page
+    if finished:
+      break
+    if elapsed < target_time / 2.:
+      page_size = min(max_page_size, 2 * page_size)
+    elif elapsed > target_time:
+      page_size = max(10, page_size // 2)
+
+def iter_nodes(nodes):
+  """Iterate over execution nodes, including those inside embedded flows.
+
+  :param nodes: List of nodes, as returned in the execution's status.
+
+  Embedded flows' nodes are yielded after their flow's node. Their `'id'` is
+  replaced by their nested ID (e.g. `'subflow:job'`), such that it is unique
+  within the execution even if the same job appears in several embedded flows.
+
+  """
+  for node in nodes:
+    yield node
+    if node.get('nodes'):
+      for child in iter_nodes(node['nodes']):
+        nested_id = child.get('nestedId') or '%s:%s' % (node['id'], child['id'])
+        yield dict(child, id=nested_id)
+
+def _get_rerun_jobs(nodes):
+  """Names of jobs which need to run again to complete an execution.
+
+  :param nodes: List of nodes, as returned in the execution's status.
+
+  These are all jobs which didn't succeed and weren't disabled or skipped: the
+  failed and killed jobs, along with their downstream jobs (e.g. cancelled or
+  still ready). Note that cancelled jobs can have a start time. Embedded flows
+  are treated as a single job.
+
+  """
+  return [
+    node['id']
+    for node in nodes
+    if node['status'] not in _COMPLETE_STATUSES
+  ]
+
+def _create_client(pool_size):
+  """Create a `requests.Session` with a connection pool.
+
+  :param pool_size: Maximum number of connections kept open per host.
+
+  Cookies sent back by the server are ignored: the session ID is always
+  included explicitly in each request.
+
+  """
+  client = rq.Session()
+  client.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+  adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+  client.mount('http://', adapter)
+  client.mount('https://', adapter)
+  return client
+
 def _parse_url(url):
   """Parse url, returning tuple of (username, password, address)
 
@@ -108,6 +256,15 @@ def _parse_url(url):
             '%s://%s:%s' % (parsed.scheme, parsed.hostname, parsed.port))
 
 
+def is_final(status):
+  """Check whether an execution or job status will not change anymore.
+
+  :param status: Status, as returned by the server (e.g. `'SUCCEEDED'`).
+
+  """
+  return status in _FINAL_STATUSES
+
+
 class Session(object):
 
   """Azkaban session.
@@ -117,6 +274,9 @@ class Session(object):
   :param config: Configuration object used to store session IDs.
   :param attempts: Maximum number of attempts to refresh session.
   :param verify: Whether or not to verify HTTPS requests.
+  :param pool_size: Maximum number of connections kept open to the server.
+    Connections are reused across requests, including those made concurrently
+    from several threads (e.g. :meth:`get_execution_statuses`).
 
   This class contains mostly low-level methods that translate directly into
   Azkaban API calls. The :class:`~azkaban.remote.Execution` class should be
@@ -129,11 +289,14 @@ class Session(object):
   """
 
   def __init__(
-    self, url=None, alias=None, config=None, attempts=3, verify=True
+    self, url=None, alias=None, config=None, attempts=3, verify=True,
+    pool_size=10
   ):
     self.attempts = attempts
     self.verify = verify
     self.config = config
+    self._client = _create_client(pool_size)
+    self._lock = Lock()
     if not url:
       warn(DeprecationWarning(
         'Session constructor support for aliases is going away in 1.0. '
@@ -184,6 +347,7 @@ class Session(object):
       response = _azkaban_request(
         'POST',
         '%s/manager' % (self.url, ),
+        client=self._client,
         data={'session.id': self.id},
         verify=self.verify,
       )
@@ -253,6 +417,36 @@ class Session(object):
       },
     ))
 
+  def iter_workflow_executions(self, project, flow, limit=None, after_id=None,
+    after_time=None, page_size=100, prefetch=1):
+    """Iterate over a flow's executions, most recent first.
+
+    :param project: Project name.
+    :param flow: Flow name.
+    :param limit: Maximum number of executions returned. Defaults to the
+      flow's entire history.
+    :param after_id: Stop at the first execution with an ID lower than or
+      equal to this one (e.g. the last one seen during a previous run).
+    :param after_time: Stop at the first execution submitted at or before this
+      time (in milliseconds since the epoch, like Azkaban's timestamps).
+    :param page_size: Initial number of executions fetched per request. It is
+      then adapted to the server's response times (between 10 and 1000).
+    :param prefetch: Number of pages fetched ahead from a background thread
+      while the caller processes the current one. If `0`, pages are fetched
+      only once the previous one has been consumed.
+
+    Yields executions as returned by :meth:`get_workflow_executions`, without
+    duplicates (even if new executions are submitted during the iteration).
+    Closing the generator early stops any further requests.
+
+    """
+    self._logger.debug('Iterating over executions of %s/%s.', project, flow)
+    pages = _iter_execution_pages(
+      self, project, flow, limit=limit, after_id=after_id,
+      after_time=after_time, page_size=page_size,
+    )
+    return _iter_pages(pages, prefetch)
+
   def get_execution_status(self, exec_id):
     """Get status of an execution.
 
@@ -269,6 +463,24 @@ class Session(object):
       },
     ))
 
+  def get_execution_statuses(self, exec_ids, workers=8):
+    """Get statuses of several executions concurrently.
+
+    :param exec_ids: Iterable of execution IDs.
+    :param workers: Maximum number of concurrent requests. This should be no
+      more than the session's `pool_size` to fully benefit from connection
+      reuse.
+
+    Yields `(exec_id, status, error)` tuples as responses arrive (i.e. not
+    necessarily in the same order as `exec_ids`). If fetching an execution's
+    status failed, `status` is `None` and `error` the exception raised,
+    otherwise `error` is `None`. A failure doesn't interrupt the other
+    requests.
+
+    """
+    self._logger.debug('Fetching statuses for several executions.')
+    return concurrently(self.get_execution_status, exec_ids, workers)
+
   def get_execution_logs(self, exec_id, offset=0, limit=50000):
     """Get execution logs.
 
@@ -378,6 +590,28 @@ class Session(object):
       self._logger.info('Execution %s resumed.', exec_id)
     return res
 
+  def retry_failed_jobs(self, exec_id):
+    """Retry failed jobs of a running execution.
+
+    :param exec_id: Execution ID.
+
+    This only works while the execution is still running, e.g. after a job
+    failed with `on_failure` set to `'finish'`. Failed jobs are run again
+    inside the same execution.
+
+    """
+    self._logger.debug('Retrying failed jobs of execution %s.', exec_id)
+    res = _extract_json(self._request(
+      method='GET',
+      endpoint='executor',
+      params={
+        'execid': exec_id,
+        'ajax': 'retryFailedJobs',
+      },
+    ))
+    self._logger.info('Retrying failed jobs of execution %s.', exec_id)
+    return res
+
   def get_projects(self):
     """Get a list of all projects."""
     self._logger.debug('Getting all projects')
@@ -427,7 +661,7 @@ class Session(object):
 
   def run_workflow(self, name, flow, jobs=None, disabled_jobs=None,
     concurrent=True, properties=None, on_failure='finish', notify_early=False,
-    emails=None):
+    emails=None, notifier=None):
     """Launch a workflow.
 
     :param name: Name of the project.
@@ -459,18 +693,17 @@ class Session(object):
       the worfklow. If a single list is passed, the emails will be used for
       both success and failure events. If a pair of lists is passed, the first
       will receive failure emails, the second success emails.
+    :param notifier: :class:`~azkaban.notify.Notifier` instance. Its
+      notification properties will be added to the execution's properties,
+      such that the server calls it back whenever a job starts or finishes.
+      Any notification properties already present in `properties` take
+      precedence.
 
     Note that in order to run a workflow on Azkaban, it must already have been
     uploaded and the corresponding user must have permissions to run it.
 
     """
-    self._logger.debug('Starting project %s workflow %s.', name, flow)
-    request_data = {
-      'ajax': 'executeFlow',
-      'project': name,
-      'flow': flow
-    }
-    request_data.update(self._run_options(
+    return self._run_workflow(
       name,
       flow,
       jobs=jobs,
@@ -479,8 +712,62 @@ class Session(object):
       properties=properties,
       on_failure=on_failure,
       notify_early=notify_early,
-      emails=emails
-    ))
+      emails=emails,
+      notifier=notifier,
+    )
+
+  def run_workflows(self, runs, workers=8):
+    """Launch several workflows concurrently.
+
+    :param runs: Iterable of dictionaries of keyword arguments to
+      :meth:`run_workflow`. Each must contain at least the `name` and `flow`
+      keys.
+    :param workers: Maximum number of submissions in flight.
+
+    Yields `(run, res, error)` tuples as submissions complete (i.e. not
+    necessarily in the same order as `runs`), `run` being the corresponding
+    input dictionary and `res` the server's response (which contains the
+    execution ID under `'execid'`). If a submission failed, `res` is `None`
+    and `error` the exception raised, otherwise `error` is `None`.
+
+    Flows' jobs, required when runs specify `jobs`, are fetched once per flow
+    (concurrently, before any submission) rather than once per run.
+
+    """
+    runs = list(runs)
+    cache = {}
+    flows = set((str(r['name']), r['flow']) for r in runs if r.get('jobs'))
+    self._logger.debug('Fetching jobs for %s flows.', len(flows))
+    for _ in concurrently(
+      lambda t: self._get_job_names(t[0], t[1], cache), flows, workers
+    ):
+      pass # errors will be reported with the corresponding runs
+    self._logger.debug('Starting %s workflows.', len(runs))
+    return concurrently(
+      lambda run: self._run_workflow(cache=cache, **run), runs, workers
+    )
+
+  def _run_workflow(self, name, flow, notifier=None, cache=None, **kwargs):
+    """Launch a workflow.
+
+    :param name: Name of the project.
+    :param flow: Name of the workflow.
+    :param notifier: Cf. :meth:`run_workflow`.
+    :param cache: Dictionary of flows' job names, cf. :meth:`_get_job_names`.
+    :param \*\*kwargs: Cf. :meth:`run_workflow`.
+
+    """
+    self._logger.debug('Starting project %s workflow %s.', name, flow)
+    if notifier:
+      properties = notifier.properties
+      properties.update(flatten(kwargs.get('properties') or {}))
+      kwargs['properties'] = properties
+    request_data = {
+      'ajax': 'executeFlow',
+      'project': name,
+      'flow': flow
+    }
+    request_data.update(self._run_options(name, flow, cache=cache, **kwargs))
     res = _extract_json(self._request(
       method='POST',
       endpoint='executor',
@@ -534,16 +821,26 @@ class Session(object):
 
     """
     self._logger.debug('Unscheduling project %s workflow %s.', flow, name)
-    request_data = {
-      'action': 'removeSched',
-      'scheduleId': self.get_schedule(name, flow)['scheduleId'],
-    }
+    res = self.remove_schedule(self.get_schedule(name, flow)['scheduleId'])
+    self._logger.info('Unscheduled project %s workflow %s.', name, flow)
+    return res
+
+  def remove_schedule(self, schedule_id):
+    """Remove a schedule.
+
+    :param schedule_id: Schedule ID, cf. :meth:`get_schedule`.
+
+    """
+    self._logger.debug('Removing schedule ID %s.', schedule_id)
     res = _extract_json(self._request(
       method='POST',
       endpoint='schedule',
-      data=request_data,
+      data={
+        'action': 'removeSched',
+        'scheduleId': schedule_id,
+      },
     ))
-    self._logger.info('Unscheduled project %s workflow %s.', name, flow)
+    self._logger.info('Removed schedule ID %s.', schedule_id)
     return res
 
   def schedule_cron_workflow(self, name, flow, cron, timezone=None, **kwargs):
@@ -557,7 +854,11 @@ class Session(object):
       valid IDs. If set to an invalid value, the server's default will be used.
     :param \*\*kwargs: See :meth:`run_workflow` for documentation.
 
+    The cron expression is validated locally (cf. :class:`~azkaban.cron.Cron`)
+    before any request is sent.
+
     """
+    Cron(cron)
     self._logger.debug('Scheduling project %s workflow %s.', flow, name)
     request_data = {
       'ajax': 'scheduleCronFlow',
@@ -586,23 +887,94 @@ class Session(object):
     self._logger.debug(
       'Retrieving schedule for project %s workflow %s.', flow, name
     )
-    res = _extract_json(self._request(
-      method='GET',
-      endpoint='schedule',
-      params={
-        'ajax': 'fetchSchedule',
-        'projectId': self._get_project_id(name),
-        'flowId': flow,
-      },
-    ))
+    schedule = self._get_schedule(self._get_project_id(name), flow)
     self._logger.info(
       'Retrieved schedule for project %s workflow %s.', name, flow
     )
-    if 'schedule' not in res:
+    if schedule is None:
       raise AzkabanError(
         'Failed to get schedule. Check that the schedule exists.'
       )
-    return res['schedule']
+    return schedule
+
+  def get_schedules(self, name, flows=None, workers=8):
+    """Get schedule information for several workflows of a project.
+
+    :param name: Project name.
+    :param flows: List of flow names. Defaults to all the project's flows.
+    :param workers: Maximum number of concurrent requests.
+
+    Returns a dictionary keyed by flow name, with value the flow's schedule
+    (cf. :meth:`get_schedule`) or `None` if the flow isn't scheduled. The
+    project's ID is only fetched once, and schedules are fetched concurrently.
+
+    """
+    self._logger.debug('Retrieving schedules for project %s.', name)
+    project_id = self._get_project_id(name)
+    if flows is None:
+      flows = [flow['flowId'] for flow in self.get_workflows(name)['flows']]
+    schedules = {}
+    errors = []
+    results = concurrently(
+      lambda flow: self._get_schedule(project_id, flow), flows, workers
+    )
+    for flow, schedule, error in results:
+      if error:
+        errors.append((flow, error))
+      else:
+        schedules[flow] = schedule
+    if errors:
+      raise AzkabanError(
+        'Failed to get schedule of %s workflow(s) in project %s: %s',
+        len(errors), name,
+        ', '.join('%s (%s)' % (flow, error) for flow, error in sorted(errors))
+      )
+    self._logger.info(
+      'Retrieved %s schedules for project %s.', len(schedules), name
+    )
+    return schedules
+
+  def get_project_schedules(self, names, workers=8):
+    """Get schedule information for all workflows of several projects.
+
+    :param names: Iterable of project names.
+    :param workers: Maximum number of concurrent requests.
+
+    Returns a dictionary keyed by `(project, flow)`, with value the flow's
+    schedule (cf. :meth:`get_schedule`) or `None` if the flow isn't scheduled.
+    Projects' IDs and flows are fetched first, then all schedules are fetched
+    in a single pass: at most `workers` requests are sent concurrently.
+
+    """
+    def _get_flows(name):
+      """Fetch a project's ID and flow names."""
+      project_id = self._get_project_id(name)
+      flows = self.get_workflows(name)['flows']
+      return project_id, [flow['flowId'] for flow in flows]
+
+    tasks = []
+    for name, res, error in concurrently(_get_flows, sorted(names), workers):
+      if error:
+        raise error
+      project_id, flows = res
+      tasks.extend((name, project_id, flow) for flow in flows)
+    schedules = {}
+    errors = []
+    results = concurrently(
+      lambda task: self._get_schedule(task[1], task[2]), tasks, workers
+    )
+    for (name, _, flow), schedule, error in results:
+      if error:
+        errors.append(('%s/%s' % (name, flow), error))
+      else:
+        schedules[(name, flow)] = schedule
+    if errors:
+      raise AzkabanError(
+        'Failed to get schedule of %s workflow(s): %s', len(errors),
+        ', '.join('%s (%s)' % (key, error) for key, error in sorted(errors))
+      )
+    self._logger.info('Retrieved %s schedules.', len(schedules))
+    return schedules
 
   def get_sla(self, schedule_id):
     """Get SLA information.
@@ -611,19 +983,26 @@ class Session(object):
 
     """
     self._logger.debug('Retrieving SLA for schedule ID %s.', schedule_id)
-    res = _extract_json(self._request(
-      method='GET',
-      endpoint='schedule',
-      params={
-        'ajax': 'slaInfo',
-        'scheduleId': schedule_id
-      },
-    ))
+    res = self._get_sla(schedule_id)
     self._logger.info('Retrieved SLA for schedule ID %s.', schedule_id)
-    if 'settings' not in res:
+    if res is None:
       raise AzkabanError('Failed to get SLA; check that an SLA exists.')
     return res
 
+  def get_slas(self, schedule_ids, workers=8):
+    """Get SLA information for several schedules concurrently.
+
+    :param schedule_ids: Iterable of schedule IDs.
+    :param workers: Maximum number of concurrent requests.
+
+    Yields `(schedule_id, sla, error)` tuples as responses arrive, `sla` being
+    `None` if the schedule doesn't have an SLA (cf. :meth:`get_sla`). If a
+    request failed, `error` is the exception raised, otherwise `None`.
+
+    """
+    self._logger.debug('Retrieving SLAs for several schedules.')
+    return concurrently(self._get_sla, schedule_ids, workers)
+
   def set_sla(self, schedule_id, email, settings):
     """Set SLA for a schedule.
 
@@ -683,47 +1062,71 @@ class Session(object):
     self._logger.info('Retrieved id for project %s: %s.', name, project_id)
     return project_id
 
-  def upload_project(self, name, path, archive_name=None, callback=None):
+  def upload_project(self, name, path, archive_name=None, callback=None,
+    validate=True):
     """Upload project archive.
 
     :param name: Project name.
-    :param path: Local path to zip archive.
+    :param path: Local path to zip archive. This can also be a seekable binary
+      file object containing the archive (e.g. built in memory by
+      :meth:`~azkaban.project.Project.build`), in which case `archive_name` is
+      required.
     :param archive_name: Filename used for the archive uploaded to Azkaban.
       Defaults to `basename(path)`.
-    :param callback: Callback forwarded to the streaming upload.
+    :param callback: Callback forwarded to the streaming upload. It is called
+      at most every 100 milliseconds (and once the archive is fully read). If
+      the upload fails, it is called once more with the exact number of bytes
+      streamed before raising.
+    :param validate: Check that the session ID is valid before uploading (an
+      extra request). This can be disabled when the ID is known to be valid,
+      e.g. when retrying a failed upload.
 
     """
     self._logger.debug('Uploading archive %r to project %s.', path, name)
-    if not exists(path):
-      raise AzkabanError('Unable to find archive at %r.' % (path, ))
-    if not self.is_valid():
-      self._refresh() # ensure that the ID is valid
-    archive_name = archive_name or basename(path)
+    if isinstance(path, string_types):
+      if not exists(path):
+        raise AzkabanError('Unable to find archive at %r.' % (path, ))
+      archive = {'path': path}
+      archive_name = archive_name or basename(path)
+    elif archive_name:
+      archive = {'fileobj': path}
+    else:
+      raise AzkabanError('Missing name for in-memory archive.')
+    if validate and not self.is_valid():
+      self._renew(self.id) # ensure that the ID is valid
     if not archive_name.endswith('.zip'):
         archive_name += '.zip'
+    archive.update({
+      'name': archive_name,
+      'type': 'application/zip', # force this (tempfiles don't have extension)
+    })
     form = MultipartForm(
-      files=[{
-        'path': path,
-        'name': archive_name,
-        'type': 'application/zip' # force this (tempfiles don't have extension)
-      }],
+      files=[archive],
       params={
         'ajax': 'upload',
         'project': name,
         'session.id': self.id,
       },
-      callback=callback
+      callback=callback,
+      chunksize=_UPLOAD_CHUNKSIZE,
+      mmap=True,
+      callback_interval=0.1,
     )
     # note that we have made sure the ID is valid, for two reasons:
     # + to avoid reuploading large files
     # + to simplify the custom ID update process (form parameter)
-    res = _extract_json(self._request(
-      method='POST',
-      endpoint='manager',
-      include_session=False,
-      headers=form.headers,
-      data=form,
-    ))
+    try:
+      res = _extract_json(self._request(
+        method='POST',
+        endpoint='manager',
+        include_session=False,
+        headers=form.headers,
+        data=form,
+      ))
+    except Exception:
+      if callback: # the last throttled call might be behind
+        callback(form.streamed_bytes, form.size, 0)
+      raise
     self._logger.info(
       'Archive %s for project %s uploaded as %s.', path, name, archive_name
     )
@@ -799,11 +1202,14 @@ class Session(object):
     attempts = self.attempts
     password = password or self.password
     while True:
-      password = password or getpass('Azkaban password for %s: ' % (self, ))
+      if not password:
+        with _LOGIN_LOCK:
+          password = getpass('Azkaban password for %s: ' % (self, ))
       try:
         res = _extract_json(_azkaban_request(
           'POST',
           self.url,
+          client=self._client,
           data={
             'action': 'login',
             'username': self.user,
@@ -823,22 +1229,87 @@ class Session(object):
         break
     self.id = res['session.id']
     if self.config:
-      if not self.config.parser.has_section('session_id'):
-        self.config.parser.add_section('session_id')
-      self.config.parser.set(
-        'session_id',
-        str(self).replace(':', '.'),
-        self.id
-      )
-      self.config.save()
+      with _LOGIN_LOCK:
+        if not self.config.parser.has_section('session_id'):
+          self.config.parser.add_section('session_id')
+        self.config.parser.set(
+          'session_id',
+          str(self).replace(':', '.'),
+          self.id
+        )
+        self.config.save()
     self._logger.info('Refreshed.')
 
+  def _renew(self, stale_id):
+    """Refresh session ID, unless another thread already did.
+
+    :param stale_id: ID found to be invalid.
+
+    This prevents concurrent requests failing with the same expired ID from
+    each triggering a refresh (and a password prompt).
+
+    """
+    with self._lock:
+      if self.id == stale_id:
+        self._refresh()
+
+  def _get_schedule(self, project_id, flow):
+    """Fetch a flow's schedule, `None` if it isn't scheduled.
+
+    :param project_id: Project ID.
+    :param flow: Name of flow in project.
+
+    """
+    res = _extract_json(self._request(
+      method='GET',
+      endpoint='schedule',
+      params={
+        'ajax': 'fetchSchedule',
+        'projectId': project_id,
+        'flowId': flow,
+      },
+    ))
+    return res.get('schedule')
+
+  def _get_sla(self, schedule_id):
+    """Fetch a schedule's SLA, `None` if it doesn't have one.
+
+    :param schedule_id: Schedule ID.
+
+    """
+    res = _extract_json(self._request(
+      method='GET',
+      endpoint='schedule',
+      params={
+        'ajax': 'slaInfo',
+        'scheduleId': schedule_id
+      },
+    ))
+    return res if 'settings' in res else None
+
+  def _get_job_names(self, name, flow, cache=None):
+    """Get the names of all jobs in a flow.
+
+    :param name: Project name.
+    :param flow: Name of flow in project.
+    :param cache: Dictionary used to memoize names across calls.
+
+    """
+    key = (str(name), flow)
+    if cache is not None and key in cache:
+      return cache[key]
+    names = set(n['id'] for n in self.get_workflow_info(name, flow)['nodes'])
+    if cache is not None:
+      cache[key] = names
+    return names
+
   def _run_options(self, name, flow, jobs=None, disabled_jobs=None,
     concurrent=True, properties=None, on_failure='finish', notify_early=False,
-    emails=None):
+    emails=None, cache=None):
     """Construct data dict for run related actions.
 
-    See :meth:`run_workflow` for parameter documentation.
+    See :meth:`run_workflow` for parameter documentation. The `cache` parameter
+    is forwarded to :meth:`_get_job_names`.
 
     """
     if jobs and disabled_jobs:
@@ -849,10 +1320,7 @@ class Session(object):
       else:
         disabled = json.dumps(list(disabled_jobs))
     else:
-      all_names = set(
-        n['id']
-        for n in self.get_workflow_info(name, flow)['nodes']
-      )
+      all_names = self._get_job_names(name, flow, cache)
       run_names = set(jobs)
       missing_names = run_names - all_names
       if missing_names:
@@ -919,7 +1387,7 @@ class Session(object):
 
     if not self.id:
       self._logger.debug('No ID found.')
-      self._refresh()
+      self._renew(None)
 
     def _send_request():
       """Try sending the request with the appropriate credentials."""
@@ -929,11 +1397,14 @@ class Session(object):
         kwargs.setdefault('data', {})['session.id'] = self.id
       elif include_session:
         raise ValueError('Invalid `include_session`: %r' % (include_session, ))
-      return _azkaban_request(method, full_url, verify=self.verify, **kwargs)
+      return _azkaban_request(
+        method, full_url, client=self._client, verify=self.verify, **kwargs
+      )
 
+    sent_id = self.id
     response = _send_request()
     if not self.is_valid(response):
-      self._refresh()
+      self._renew(sent_id)
       response = _send_request()
 
     # `_refresh` raises an exception rather than letting an unauthorized second
@@ -983,12 +1454,20 @@ class Execution(object):
 
   :param session: :class:`Session` instance.
   :param exec_id: Execution ID.
+  :param notifier: :class:`~azkaban.notify.Notifier` instance receiving this
+    execution's job notifications. If specified, :meth:`wait` will be woken up
+    by these rather than only relying on polling.
 
   """
 
-  def __init__(self, session, exec_id):
+  def __init__(self, session, exec_id, notifier=None):
     self._session = session
+    self._notifier = notifier
     self.exec_id = exec_id
+    self._logger = Adapter(repr(self), _logger)
+
+  def __repr__(self):
+    return '<%s(exec_id=%r)>' % (self.__class__.__name__, self.exec_id)
 
   @property
   def status(self):
@@ -1004,13 +1483,170 @@ class Execution(object):
     """Cancel execution."""
     self._session.cancel_execution(self.exec_id)
 
-  def logs(self, delay=5):
+  def rerun_failed(self, **kwargs):
+    """Run again the jobs of this execution which didn't succeed.
+
+    :param \*\*kwargs: Keyword arguments forwarded to
+      :meth:`Session.run_workflow` (e.g. `properties`), other than `jobs` and
+      `disabled_jobs`.
+
+    If the execution is finishing after a failure (`FAILED_FINISHING`), its
+    failed jobs are retried in place via the server's retry endpoint and this
+    execution is returned. If it has finished, a new execution running only the
+    jobs which didn't succeed (failed, killed, and cancelled jobs, along with
+    any jobs which never ran) is submitted and returned. Jobs which succeeded
+    aren't run again (they are disabled, which lets their downstream jobs run).
+    Any other running execution raises an error.
+
+    """
+    status = self.status
+    if status['status'] == 'FAILED_FINISHING':
+      self._session.retry_failed_jobs(self.exec_id)
+      return self
+    if status['status'] not in _FINAL_STATUSES:
+      raise AzkabanError(
+        'Execution %s is %s, failed jobs can only be rerun once it has finished'
+        ' (or retried while it is finishing after a failure).',
+        self.exec_id, status['status']
+      )
+    jobs = _get_rerun_jobs(status['nodes'])
+    if not jobs:
+      raise AzkabanError('No failed jobs found in execution %s.', self.exec_id)
+    self._logger.info('Rerunning %s job(s): %s', len(jobs), ', '.join(jobs))
+    return Execution.start(
+      self._session,
+      status['project'],
+      status.get('flowId') or status['flow'],
+      jobs=jobs,
+      **kwargs
+    )
+
+  def wait(self, delay=None):
+    """Wait for the execution to finish.
+
+    :param delay: Time in seconds between each server poll. Defaults to 5
+      seconds, or to 60 seconds if the execution has a notifier. In the latter
+      case, the status is also refreshed each time one of the execution's jobs
+      starts or finishes, polling only serving as fallback in case a
+      notification is lost.
+
+    Returns the execution's final status (cf. :attr:`status`).
+
+    """
+    if delay is None:
+      delay = 60 if self._notifier else 5
+    seen = 0
+    while True:
+      status = self.status
+      if status['status'] in _FINAL_STATUSES:
+        return status
+      if self._notifier:
+        if all(n['status'] in _FINAL_STATUSES for n in status['nodes']):
+          # all jobs are done, no more notifications will come while the flow
+          # is being finalized
+          timeout = min(delay, 1)
+        else:
+          timeout = delay
+        seen = self._notifier.wait(self.exec_id, seen, timeout)
+      else:
+        sleep(delay)
+
+  def follow(self, delay=5, poller=None):
+    """Log generator for all the execution's jobs.
+
+    :param delay: Time in seconds between each log poll.
+    :param poller: :class:`Poller` used to track the execution's status. This
+      lets several consumers share status requests. If unspecified, a poller
+      with the same `delay` will be created (and stopped on exit).
+
+    Yields `(job, line)` tuples, as jobs run. Logs of jobs running concurrently
+    are interleaved, one log window at a time. The generator returns once the
+    execution has finished and all its jobs' logs have been read.
+
+    """
+    owned = poller is None
+    if owned:
+      poller = Poller(self._session, delay=delay)
+      poller.start()
+    poller.watch(self.exec_id)
+    offsets = {}
+    partials = {}
+    done = set()
+    try:
+      while True:
+        status = poller.status(self.exec_id)
+        finished = status['status'] in _FINAL_STATUSES
+        for node in iter_nodes(status['nodes']):
+          job = node['id']
+          if (
+            job in done or
+            node.get('type') == 'flow' or
+            node['status'] not in _LOGGED_STATUSES or
+            node.get('startTime', -1) < 0
+          ):
+            continue
+          try:
+            while True:
+              logs = self._session.get_job_logs(
+                exec_id=self.exec_id,
+                job=job,
+                offset=offsets.get(job, 0),
+              )
+              if not logs['length']:
+                break
+              offsets[job] = offsets.get(job, 0) + logs['length']
+              lines = (partials.pop(job, '') + logs['data']).split('\n')
+              partials[job] = lines.pop()
+              for line in lines:
+                if line:
+                  yield job, line
+          except HTTPError:
+            # the log file might not exist yet (e.g. the job is preparing)
+            self._logger.debug('No logs found for job %s yet.', job)
+          if node['status'] in _FINAL_STATUSES:
+            if partials.get(job):
+              yield job, partials.pop(job)
+            done.add(job)
+        if finished:
+          break
+        sleep(delay)
+    finally:
+      if owned:
+        poller.stop()
+
+  def logs(self, delay=5, prefetch=0):
     """Execution log generator.
 
     :param delay: time in seconds between each server poll
+    :param prefetch: Number of log windows fetched ahead from a background
+      thread while the caller processes the current one. The default, `0`,
+      fetches each window only once the previous one has been consumed.
 
     Yields line by line.
 
+    """
+    return _iter_pages(self._log_windows(delay), prefetch)
+
+  def job_logs(self, job, delay=5, prefetch=0):
+    """Job log generator.
+
+    :param job: job name
+    :param delay: time in seconds between each server poll
+    :param prefetch: Number of log windows fetched ahead from a background
+      thread. See :meth:`logs`.
+
+    Yields line by line.
+
+    """
+    return _iter_pages(self._job_log_windows(job, delay), prefetch)
+
+  def _log_windows(self, delay):
+    """Execution log window generator.
+
+    :param delay: time in seconds between each server poll
+
+    Yields lists of lines, one per log window fetched.
+
     """
     finishing = False
     offset = 0
@@ -1021,9 +1657,7 @@ class Execution(object):
       )
       if logs['length']:
         offset += logs['length']
-        lines = (e for e in logs['data'].split('\n') if e)
-        for line in lines:
-          yield line
+        yield [e for e in logs['data'].split('\n') if e]
       elif finishing:
         break
       else:
@@ -1031,13 +1665,13 @@ class Execution(object):
           finishing = True
       sleep(delay)
 
-  def job_logs(self, job, delay=5):
-    """Job log generator.
+  def _job_log_windows(self, job, delay):
+    """Job log window generator.
 
     :param job: job name
     :param delay: time in seconds between each server poll
 
-    Yields line by line.
+    Yields lists of lines, one per log window fetched.
 
     """
     finishing = False
@@ -1073,9 +1707,7 @@ class Execution(object):
       else:
         if logs['length']:
           offset += logs['length']
-          lines = (e for e in logs['data'].split('\n') if e)
-          for line in lines:
-            yield line
+          yield [e for e in logs['data'].split('\n') if e]
         elif finishing:
           break
         else:
@@ -1094,8 +1726,240 @@ class Execution(object):
 
     :param session: :class:`Session` instance.
     :param args: Cf. :meth:`Session.run_workflow`.
-    :param kwargs: Cf. :meth:`Session.run_workflow`.
+    :param kwargs: Cf. :meth:`Session.run_workflow`. Any `notifier` will also
+      be attached to the returned execution.
 
     """
     res = session.run_workflow(*args, **kwargs)
-    return cls(session, res['execid'])
+    return cls(session, res['execid'], notifier=kwargs.get('notifier'))
+
+
+class Poller(object):
+
+  """Shared execution status poller.
+
+  :param session: :class:`Session` instance.
+  :param delay: Time in seconds between each poll.
+  :param workers: Maximum number of concurrent status requests during each
+    poll.
+
+  A single background thread refreshes the status of all watched executions,
+  such that any number of consumers can track them without issuing their own
+  requests. Executions are no longer polled once they have finished, and their
+  final status is forgotten once all calls to :meth:`wait` (or
+  :meth:`wait_any`) on them have returned.
+
+  Usage:
+
+  .. code:: python
+
+    with Poller(session) as poller:
+      poller.watch(exec_id)
+      status = poller.wait(exec_id)
+
+  """
+
+  def __init__(self, session, delay=5, workers=8):
+    self.delay = delay
+    self.workers = workers
+    self._session = session
+    self._statuses = {}
+    self._watched = set()
+    self._waiters = {}
+    self._condition = Condition()
+    self._wakeup = Event()
+    self._stopped = Event()
+    self._thread = None
+    self._logger = Adapter(repr(self), _logger)
+
+  def __repr__(self):
+    return '<%s(session=%r, delay=%r)>' % (
+      self.__class__.__name__, self._session, self.delay
+    )
+
+  def __enter__(self):
+    self.start()
+    return self
+
+  def __exit__(self, *exc_info):
+    self.stop()
+
+  def start(self):
+    """Start polling from a background thread."""
+    if self._thread:
+      return
+    self._stopped.clear()
+    self._thread = Thread(target=self._run)
+    self._thread.daemon = True
+    self._thread.start()
+    self._logger.debug('Started.')
+
+  def stop(self):
+    """Stop polling."""
+    if not self._thread:
+      return
+    self._stopped.set()
+    self._wakeup.set()
+    self._thread.join()
+    self._thread = None
+    self._logger.debug('Stopped.')
+
+  def watch(self, exec_id):
+    """Start tracking an execution's status.
+
+    :param exec_id: Execution ID.
+
+    The execution's status will be fetched on the next poll, which happens
+    immediately if the execution wasn't already being tracked.
+
+    """
+    with self._condition:
+      if exec_id in self._watched or exec_id in self._statuses:
+        return
+      self._watched.add(exec_id)
+    self._wakeup.set()
+
+  def status(self, exec_id, timeout=None):
+    """Latest known status of an execution.
+
+    :param exec_id: Execution ID. It will be watched if it isn't yet.
+    :param timeout: Maximum time in seconds to wait for the first status to be
+      fetched. Waits indefinitely if unspecified.
+
+    """
+    self.watch(exec_id)
+    with self._condition:
+      self._wait_for(lambda: exec_id in self._statuses, timeout)
+      try:
+        return self._statuses[exec_id]
+      except KeyError:
+        raise AzkabanError('No status found for execution %s.', exec_id)
+
+  def wait(self, exec_id, timeout=None):
+    """Wait for an execution to finish.
+
+    :param exec_id: Execution ID. It will be watched if it isn't yet.
+    :param timeout: Maximum time in seconds to wait. Waits indefinitely if
+      unspecified.
+
+    Returns the execution's latest status, which will be final unless the
+    timeout was reached.
+
+    """
+    self.watch(exec_id)
+    def _finished():
+      status = self._statuses.get(exec_id)
+      return status and status['status'] in _FINAL_STATUSES
+    with self._condition:
+      self._acquire([exec_id])
+      try:
+        self._wait_for(_finished, timeout)
+        return self._statuses.get(exec_id)
+      finally:
+        self._release([exec_id])
+
+  def wait_any(self, exec_ids, timeout=None):
+    """Wait for at least one of several executions to finish.
+
+    :param exec_ids: Execution IDs. They will be watched if they aren't yet.
+    :param timeout: Maximum time in seconds to wait. Waits indefinitely if
+      unspecified.
+
+    Returns a dictionary of the final statuses of all finished executions
+    among `exec_ids`, keyed by execution ID. It will only be empty if the
+    timeout was reached (or if `exec_ids` is empty).
+
+    """
+    exec_ids = list(exec_ids)
+    for exec_id in exec_ids:
+      self.watch(exec_id)
+    def _finished():
+      return dict(
+        (exec_id, self._statuses[exec_id])
+        for exec_id in exec_ids
+        if exec_id in self._statuses and
+        self._statuses[exec_id]['status'] in _FINAL_STATUSES
+      )
+    with self._condition:
+      self._acquire(exec_ids)
+      try:
+        if exec_ids:
+          self._wait_for(_finished, timeout)
+        return _finished()
+      finally:
+        self._release(exec_ids)
+
+  def _acquire(self, exec_ids):
+    """Register a waiter on executions. Lock must be held.
+
+    :param exec_ids: Execution IDs.
+
+    """
+    for exec_id in exec_ids:
+      self._waiters[exec_id] = self._waiters.get(exec_id, 0) + 1
+
+  def _release(self, exec_ids):
+    """Unregister a waiter on executions. Lock must be held.
+
+    :param exec_ids: Execution IDs.
+
+    Finished executions without any remaining waiters are forgotten, such that
+    long-lived pollers don't accumulate statuses.
+
+    """
+    for exec_id in exec_ids:
+      count = self._waiters[exec_id] - 1
+      if count:
+        self._waiters[exec_id] = count
+        continue
+      del self._waiters[exec_id]
+      status = self._statuses.get(exec_id)
+      if status and status['status'] in _FINAL_STATUSES:
+        del self._statuses[exec_id]
+
+  def _wait_for(self, predicate, timeout):
+    """Wait on condition until predicate is true. Lock must be held.
+
+    :param predicate: Function without arguments.
+    :param timeout: Maximum time in seconds to wait.
+
+    """
+    deadline = None if timeout is None else time() + timeout
+    while not predicate():
+      if self._stopped.is_set():
+        raise AzkabanError('Poller stopped.')
+      if deadline is None:
+        # waking up regularly lets us notice if the poller was stopped
+        self._condition.wait(1)
+      else:
+        remaining = deadline - time()
+        if remaining <= 0:
+          break
+        self._condition.wait(min(remaining, 1))
+
+  def _poll(self):
+    """Fetch the status of all watched executions."""
+    with self._condition:
+      exec_ids = list(self._watched)
+    results = self._session.get_execution_statuses(exec_ids, self.workers)
+    for exec_id, status, error in results:
+      if error: # retry on the next poll
+        self._logger.warning(
+          'Unable to fetch status for execution %s: %s', exec_id, error
+        )
+        continue
+      with self._condition:
+        self._statuses[exec_id] = status
+        if status['status'] in _FINAL_STATUSES:
+          self._watched.discard(exec_id)
+        self._condition.notify_all()
+
+  def _run(self):
+    """Background thread target."""
+    while not self._stopped.is_set():
+      self._wakeup.clear()
+      try:
+        self._poll()
+      except Exception: # keep polling, this might be transient
+        self._logger.exception('Unable to poll statuses.')
+      self._wakeup.wait(self.delay)
@@ -0,0 +1,354 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""Schedule module.
+
+This contains functions to manage schedules declaratively: given the desired
+set of cron schedules, :func:`plan_schedules` computes which ones need to be
+created, updated, or removed, and :func:`apply_schedules` only sends these
+changes to the server. Reapplying an unchanged set is therefore a no-op.
+
+Schedules' SLAs are handled similarly, via :func:`plan_slas` and
+:func:`apply_slas`. :func:`export_slas` returns existing SLAs in the same
+format, e.g. to bootstrap a desired set.
+
+"""
+
+from .cron import Cron
+from .util import AzkabanError, concurrently, flatten
+import logging as lg
+import re
+
+
+_logger = lg.getLogger(__name__)
+
+_RUN_OPTIONS = frozenset([
+  'jobs', 'disabled_jobs', 'concurrent', 'properties', 'on_failure',
+  'notify_early', 'emails',
+])
+
+
+def plan_schedules(session, schedules, projects=None, workers=8):
+  """Compute changes required to reach a desired set of schedules.
+
+  :param session: :class:`~azkaban.remote.Session` instance.
+  :param schedules: Iterable of desired schedules. Each is a dictionary with
+    keys `project`, `flow`, `cron` (Quartz cron expression), and optionally
+    `timezone` along with any :meth:`~azkaban.remote.Session.run_workflow`
+    options (e.g. `properties`).
+  :param projects: Names of the projects whose schedules are managed: any of
+    their schedules which isn't desired will be removed. Defaults to the
+    projects found in `schedules`.
+  :param workers: Maximum number of concurrent requests.
+
+  Returns a list of changes, sorted by project and flow. Each is a dictionary
+  with keys `action` (one of `'create'`, `'update'`, `'remove'`), `project`,
+  `flow`, `desired` (the desired schedule, `None` for removals), and `current`
+  (the server's schedule, `None` for creations).
+
+  Cron expressions are validated locally first. A schedule is only updated if
+  its cron expression or, when the server reports them, its properties differ
+  from the desired ones. Other options (e.g. `timezone`) can't be read back
+  and are only sent on creation or update.
+
+  """
+  desired = {}
+  for schedule in schedules:
+    _validate(schedule)
+    key = (schedule['project'], schedule['flow'])
+    if key in desired:
+      raise AzkabanError('Duplicate schedule for %s/%s.', *key)
+    desired[key] = schedule
+  projects = set(projects or []) | set(project for project, _ in desired)
+  current = _get_current_schedules(session, projects, workers)
+  changes = []
+  for key in sorted(set(desired) | set(current)):
+    if key not in current:
+      action = 'create'
+    elif key not in desired:
+      action = 'remove'
+    elif _differs(desired[key], current[key]):
+      action = 'update'
+    else:
+      continue
+    changes.append({
+      'action': action,
+      'project': key[0],
+      'flow': key[1],
+      'desired': desired.get(key),
+      'current': current.get(key),
+    })
+  _logger.info('Planned %s schedule changes.', len(changes))
+  return changes
+
+def apply_schedules(session, changes, workers=8):
+  """Apply schedule changes concurrently.
+
+  :param session: :class:`~azkaban.remote.Session` instance.
+  :param changes: List of changes, as returned by :func:`plan_schedules`.
+  :param workers: Maximum number of concurrent requests.
+
+  Yields `(change, res, error)` tuples as changes are applied, `res` being the
+  server's response. If a change failed, `res` is `None` and `error` the
+  exception raised.
+
+  """
+  def _apply(change):
+    """Apply a single change."""
+    if change['action'] == 'remove':
+      return session.remove_schedule(change['current']['scheduleId'])
+    schedule = change['desired']
+    return session.schedule_cron_workflow(
+      schedule['project'],
+      schedule['flow'],
+      schedule['cron'],
+      timezone=schedule.get('timezone'),
+      **dict((k, v) for k, v in schedule.items() if k in _RUN_OPTIONS)
+    )
+
+  return concurrently(_apply, changes, workers)
+
+def export_slas(session, projects, workers=8):
+  """Fetch the SLAs of all scheduled flows in projects.
+
+  :param session: :class:`~azkaban.remote.Session` instance.
+  :param projects: List of project names.
+  :param workers: Maximum number of concurrent requests.
+
+  Returns a list of SLAs, sorted by project and flow, in the format expected by
+  :func:`plan_slas`. Flows without SLA are omitted.
+
+  """
+  schedules = _get_current_schedules(session, projects, workers)
+  keys = dict((s['scheduleId'], key) for key, s in schedules.items())
+  slas = []
+  for schedule_id, sla, error in session.get_slas(list(keys), workers):
+    if error:
+      raise error
+    if sla is not None:
+      project, flow = keys[schedule_id]
+      slas.append(dict(_parse_sla(sla), project=project, flow=flow))
+  return sorted(slas, key=lambda sla: (sla['project'], sla['flow']))
+
+def plan_slas(session, slas, workers=8):
+  """Compute changes required to reach a desired set of SLAs.
+
+  :param session: :class:`~azkaban.remote.Session` instance.
+  :param slas: Iterable of desired SLAs. Each is a dictionary with keys
+    `project`, `flow`, `settings` (list of settings, formatted as in
+    :meth:`~azkaban.remote.Session.set_sla`, e.g. `',SUCCESS,02:30,true,false'`)
+    and optionally `emails` (list of emails). The corresponding flows must be
+    scheduled.
+  :param workers: Maximum number of concurrent requests.
+
+  Schedule IDs and existing SLAs are fetched concurrently. Returns a list of
+  changes, one per SLA which differs from the desired one (the order of
+  settings and emails doesn't matter, durations can also be specified in
+  minutes or hours, e.g. `'90m'`). Each change is a dictionary with keys
+  `project`, `flow`, `schedule_id`, `desired`, and `current` (`None` if the
+  schedule doesn't have an SLA yet). Flows not found in `slas` are left
+  untouched.
+
+  """
+  desired = {}
+  for sla in slas:
+    for key in ('project', 'flow', 'settings'):
+      if key not in sla:
+        raise AzkabanError('Missing %s in SLA: %r', key, sla)
+    _normalize_sla(sla) # validates settings
+    key = (sla['project'], sla['flow'])
+    if key in desired:
+      raise AzkabanError('Duplicate SLA for %s/%s.', *key)
+    desired[key] = sla
+  schedules = _get_current_schedules(
+    session, set(project for project, _ in desired), workers
+  )
+  keys = {}
+  for key in desired:
+    if key not in schedules:
+      raise AzkabanError('No schedule found for %s/%s.', *key)
+    keys[schedules[key]['scheduleId']] = key
+  changes = []
+  for schedule_id, sla, error in session.get_slas(list(keys), workers):
+    if error:
+      raise error
+    key = keys[schedule_id]
+    current = _parse_sla(sla) if sla is not None else None
+    if (
+      current is None or
+      _normalize_sla(current) != _normalize_sla(desired[key])
+    ):
+      changes.append({
+        'project': key[0],
+        'flow': key[1],
+        'schedule_id': schedule_id,
+        'desired': desired[key],
+        'current': current,
+      })
+  _logger.info('Planned %s SLA changes.', len(changes))
+  return sorted(changes, key=lambda change: (change['project'], change['flow']))
+
+def apply_slas(session, changes, workers=8):
+  """Apply SLA changes concurrently.
+
+  :param session: :class:`~azkaban.remote.Session` instance.
+  :param changes: List of changes, as returned by :func:`plan_slas`.
+  :param workers: Maximum number of concurrent requests.
+
+  Yields `(change, res, error)` tuples as changes are applied, cf.
+  :func:`apply_schedules`. Durations are sent formatted as `hh:mm`.
+
+  """
+  return concurrently(
+    lambda change: session.set_sla(
+      change['schedule_id'],
+      change['desired'].get('emails') or [],
+      [
+        _format_setting(*_parse_setting(setting))
+        for setting in change['desired']['settings']
+      ],
+    ),
+    changes,
+    workers,
+  )
+
+def _get_current_schedules(session, projects, workers):
+  """Fetch all schedules of projects concurrently.
+
+  :param session: :class:`~azkaban.remote.Session` instance.
+  :param projects: Iterable of project names.
+  :param workers: Maximum number of concurrent requests.
+
+  Returns a dictionary keyed by `(project, flow)`, only containing scheduled
+  flows.
+
+  """
+  schedules = session.get_project_schedules(projects, workers)
+  return dict((key, s) for key, s in schedules.items() if s is not None)
+
+def _parse_sla(sla):
+  """Convert an SLA returned by the server to the desired SLA format.
+
+  :param sla: SLA, as returned by :meth:`~azkaban.remote.Session.get_sla`.
+
+  """
+  emails = sla.get('slaEmails') or []
+  if not isinstance(emails, list):
+    emails = [email for email in emails.split(',') if email]
+  settings = []
+  for setting in sla['settings']:
+    if isinstance(setting, dict):
+      actions = setting.get('actions') or []
+      setting = _format_setting(
+        setting.get('id') or '',
+        setting.get('rule'),
+        _parse_duration(setting.get('duration') or '0m'),
+        'EMAIL' in actions,
+        'KILL' in actions,
+      )
+    settings.append(setting)
+  return {'emails': emails, 'settings': settings}
+
+def _normalize_sla(sla):
+  """Canonical form of an SLA, used to compare them.
+
+  :param sla: SLA, in the desired SLA format.
+
+  """
+  settings = [_parse_setting(setting) for setting in sla['settings']]
+  return sorted(set(sla.get('emails') or [])), sorted(settings)
+
+def _parse_setting(setting):
+  """Split an SLA setting into its components.
+
+  :param setting: String, in the desired SLA format.
+
+  Returns a `(job, rule, minutes, email, kill)` tuple.
+
+  """
+  parts = [part.strip() for part in setting.split(',')]
+  if len(parts) != 5:
+    raise AzkabanError('Invalid SLA setting: %r', setting)
+  job, rule, duration, email, kill = parts
+  return (
+    job,
+    rule.upper(),
+    _parse_duration(duration),
+    email.lower() == 'true',
+    kill.lower() == 'true',
+  )
+
+def _format_setting(job, rule, minutes, email, kill):
+  """Format an SLA setting as expected by the server.
+
+  :param job: Job name (empty for the whole flow).
+  :param rule: SLA rule (e.g. `'SUCCESS'`).
+  :param minutes: Duration, in minutes.
+  :param email: Whether to send an email when the SLA is missed.
+  :param kill: Whether to kill the execution when the SLA is missed.
+
+  """
+  return '%s,%s,%02d:%02d,%s,%s' % (
+    job,
+    rule,
+    minutes // 60,
+    minutes % 60,
+    'true' if email else 'false',
+    'true' if kill else 'false',
+  )
+
+def _parse_duration(duration):
+  """Convert an SLA duration to minutes.
+
+  :param duration: String, either formatted as `hh:mm` or as a number of
+    minutes or hours (e.g. `'90m'`, `'2h'`).
+
+  """
+  match = re.match(r'^(\d+):(\d{2})$|^(\d+)([mh])$', duration.strip())
+  if not match:
+    raise AzkabanError('Invalid SLA duration: %r', duration)
+  hours, minutes, count, unit = match.groups()
+  if count is None:
+    return 60 * int(hours) + int(minutes)
+  return int(count) * (60 if unit == 'h' else 1)
+
+def _validate(schedule):
+  """Check that a desired schedule is well formed.
+
+  :param schedule: Dictionary.
+
+  """
+  missing = [k for k in ('project', 'flow', 'cron') if not schedule.get(k)]
+  if missing:
+    raise AzkabanError(
+      'Missing %s in schedule: %r', ', '.join(missing), schedule
+    )
+  unknown = set(schedule) - _RUN_OPTIONS - set(
+    ['project', 'flow', 'cron', 'timezone']
+  )
+  if unknown:
+    raise AzkabanError(
+      'Unknown %s in schedule: %r', ', '.join(sorted(unknown)), schedule
+    )
+  Cron(schedule['cron'])
+
+def _differs(desired, current):
+  """Check whether a schedule needs to be updated.
+
+  :param desired: Desired schedule.
+  :param current: Server schedule, as returned by
+    :meth:`~azkaban.remote.Session.get_schedule`.
+
+  """
+  cron = ' '.join(desired['cron'].split())
+  if cron != ' '.join((current.get('cronExpression') or '').split()):
+    return True
+  options = current.get('executionOptions') or {}
+  if 'flowParameters' in options:
+    properties = dict(
+      (key, str(value))
+      for key, value in flatten(desired.get('properties') or {}).items()
+    )
+    if properties != options['flowParameters']:
+      return True
+  return False
@@ -0,0 +1,233 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""Log search module.
+
+This contains the :func:`search_logs` function, used to find which executions
+of a flow have logs matching a given pattern, along with the
+:class:`LogCache` class which lets finished executions' logs be read from disk
+rather than downloaded again.
+
+"""
+
+from .remote import is_final
+from .util import concurrently
+from contextlib import contextmanager
+from os import remove, rename
+from os.path import exists, join
+from six import string_types
+from tempfile import mkstemp
+import io
+import logging as lg
+import os
+import re
+
+
+_logger = lg.getLogger(__name__)
+
+# characters which make a pattern more than a plain literal
+_SPECIAL_CHARS = re.compile(r'[.^$*+?{}\[\]\\|()\n]')
+
+
+class LogCache(object):
+
+  """Local cache of execution logs.
+
+  :param root: Root directory of the cache. It will be created if necessary.
+
+  Only logs of finished executions should be cached, since they will not
+  change anymore. Logs are stored as one file per execution (or job), under a
+  separate directory per server.
+
+  """
+
+  def __init__(self, root):
+    self.root = root
+
+  def __repr__(self):
+    return '<%s(root=%r)>' % (self.__class__.__name__, self.root)
+
+  def path(self, session, exec_id, job=None):
+    """Path to cached logs.
+
+    :param session: :class:`~azkaban.remote.Session` instance.
+    :param exec_id: Execution ID.
+    :param job: Job name. If unspecified, the path will be to the flow's logs.
+
+    """
+    server = re.sub(r'[^\w.-]+', '_', session.url)
+    name = '%s.%s.log' % (exec_id, job) if job else '%s.log' % (exec_id, )
+    return join(self.root, server, re.sub(r'[^\w.:-]+', '_', name))
+
+  def get(self, session, exec_id, job=None):
+    """Path to cached logs if they exist, `None` otherwise.
+
+    :param session: :class:`~azkaban.remote.Session` instance.
+    :param exec_id: Execution ID.
+    :param job: Job name.
+
+    """
+    path = self.path(session, exec_id, job)
+    return path if exists(path) else None
+
+  @contextmanager
+  def writer(self, session, exec_id, job=None):
+    """Context manager to add logs to the cache.
+
+    :param session: :class:`~azkaban.remote.Session` instance.
+    :param exec_id: Execution ID.
+    :param job: Job name.
+
+    Yields a file-like object the logs should be written to. They only become
+    visible in the cache once the block exits without error, such that
+    partially downloaded logs are never cached.
+
+    """
+    path = self.path(session, exec_id, job)
+    dirpath = os.path.dirname(path)
+    if not exists(dirpath):
+      try:
+        os.makedirs(dirpath)
+      except OSError:
+        pass # created concurrently
+    desc, tpath = mkstemp(dir=dirpath, suffix='.tmp')
+    try:
+      with io.open(desc, 'w', encoding='utf-8') as writer:
+        yield writer
+    except Exception:
+      remove(tpath)
+      raise
+    else:
+      rename(tpath, path)
+
+
+def iter_log_lines(session, exec_id, job=None, pattern=None, writer=None,
+  limit=50000):
+  """Read an execution's logs, filtering them as they stream in.
+
+  :param session: :class:`~azkaban.remote.Session` instance.
+  :param exec_id: Execution ID.
+  :param job: Job name. If unspecified, the flow's logs will be read.
+  :param pattern: Regular expression (string or compiled). Only lines it
+    matches will be yielded. It is first matched against each entire log
+    window (in multiline mode), windows without any match are skipped without
+    being split into lines.
+  :param writer: File-like object, all logs read will be written to it
+    (regardless of `pattern`).
+  :param limit: Size of each log window.
+
+  Unlike :meth:`~azkaban.remote.Execution.logs`, this function doesn't wait
+  for the execution to finish: it reads logs until there are no more
+  available, without any delay between windows. Lines which span several
+  windows are correctly reassembled.
+
+  """
+  patterns = _compile(pattern)
+  offset = 0
+  partial = ''
+  while True:
+    if job:
+      logs = session.get_job_logs(exec_id, job, offset=offset, limit=limit)
+    else:
+      logs = session.get_execution_logs(exec_id, offset=offset, limit=limit)
+    if not logs['length']:
+      break
+    offset += logs['length']
+    if writer:
+      writer.write(logs['data'])
+    data = partial + logs['data']
+    data, _, partial = data.rpartition('\n')
+    for line in _filter_lines(data, *patterns):
+      yield line
+  for line in _filter_lines(partial, *patterns):
+    yield line
+
+def search_logs(session, project, flow, pattern, jobs=None, limit=100,
+  workers=8, cache=None):
+  """Search logs of a flow's most recent executions.
+
+  :param session: :class:`~azkaban.remote.Session` instance.
+  :param project: Project name.
+  :param flow: Flow name.
+  :param pattern: Regular expression (string or compiled).
+  :param jobs: List of job names. If specified, these jobs' logs will be
+    searched rather than the flow's.
+  :param limit: Maximum number of executions searched, most recent first.
+  :param workers: Maximum number of logs fetched concurrently.
+  :param cache: :class:`LogCache` instance. Logs of finished executions will
+    be read from it when available, and added to it otherwise.
+
+  Yields `(execution, job, lines, error)` tuples as each log is searched,
+  `execution` being the execution's entry from
+  :meth:`~azkaban.remote.Session.get_workflow_executions`, `job` the job name
+  (`None` for flow logs), and `lines` the list of matching lines. If an error
+  occurred while reading the logs, `lines` is `None` and `error` the exception
+  raised.
+
+  """
+  patterns = _compile(pattern)
+
+  def _search(task):
+    """Search a single log."""
+    execution, job = task
+    exec_id = execution['execId']
+    finished = is_final(execution.get('status'))
+    cached = cache.get(session, exec_id, job) if cache and finished else None
+    if cached:
+      _logger.debug('Searching cached logs at %s.', cached)
+      with io.open(cached, encoding='utf-8') as reader:
+        return list(_filter_lines(reader.read(), *patterns))
+    if cache and finished:
+      with cache.writer(session, exec_id, job) as writer:
+        return list(
+          iter_log_lines(session, exec_id, job, pattern, writer=writer)
+        )
+    return list(iter_log_lines(session, exec_id, job, pattern))
+
+  executions = session.iter_workflow_executions(project, flow, limit=limit)
+  tasks = (
+    (execution, job)
+    for execution in executions
+    for job in (jobs or [None])
+  )
+  for (execution, job), lines, error in concurrently(_search, tasks, workers):
+    if error:
+      _logger.warning(
+        'Unable to search logs of execution %s: %s', execution['execId'], error
+      )
+    yield execution, job, lines, error
+
+def _compile(pattern):
+  """Compile line and window patterns.
+
+  :param pattern: Regular expression (string or compiled), or `None`.
+
+  Returns a tuple `(line_pattern, window_pattern)`. The window pattern matches
+  any text containing a line matched by the line pattern (it can also match
+  more). It is only derived for plain literal patterns (e.g. `'Exception'`),
+  `None` otherwise: lookarounds, anchors, or classes such as `\s` can behave
+  differently once lines are joined, which would skip matching lines.
+
+  """
+  if pattern is None:
+    return None, None
+  if isinstance(pattern, string_types):
+    pattern = re.compile(pattern)
+  if _SPECIAL_CHARS.search(pattern.pattern):
+    return pattern, None
+  return pattern, pattern
+
+def _filter_lines(data, pattern, window_pattern=None):
+  """Split data into non-empty lines matching a pattern.
+
+  :param data: String.
+  :param pattern: Compiled regular expression or `None`.
+  :param window_pattern: Compiled regular expression, used to skip data which
+    doesn't contain any matching lines without splitting it.
+
+  """
+  if window_pattern and not window_pattern.search(data):
+    return
+  for line in data.split('\n'):
+    if line and (not pattern or pattern.search(line)):
+      yield line
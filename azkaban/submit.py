@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""Submission module.
+
+This contains the :class:`SubmissionQueue` class, which sits in front of
+:meth:`~azkaban.remote.Session.run_workflow` to avoid overloading executors
+when many runs are triggered at once (e.g. after an upstream release): runs are
+queued client-side and only submitted once the number of running executions
+is below the configured caps.
+
+"""
+
+from .remote import Poller
+from .util import Adapter, AzkabanError, concurrently
+from collections import defaultdict
+from threading import Lock
+import logging as lg
+
+
+_logger = lg.getLogger(__name__)
+
+
+class SubmissionQueue(object):
+
+  """Client-side queue of workflow runs, with concurrency caps.
+
+  :param session: :class:`~azkaban.remote.Session` instance.
+  :param max_running: Maximum number of executions submitted by this queue
+    running at once on the server. Unlimited by default.
+  :param max_per_project: Maximum number of running executions per project.
+    Unlimited by default.
+  :param max_per_flow: Maximum number of running executions per flow.
+    Unlimited by default.
+  :param poller: :class:`~azkaban.remote.Poller` instance used to track
+    completions. Sharing one (e.g. with other queues or consumers) avoids
+    polling the same executions several times. By default, a poller is created
+    for the duration of each call to :meth:`run`.
+  :param delay: Time in seconds between each status poll, only used if no
+    `poller` is specified.
+  :param workers: Maximum number of runs submitted concurrently (and of
+    concurrent status requests, if no `poller` is specified).
+
+  Runs are submitted in the order they were queued, except that runs blocked
+  by a project or flow cap don't prevent later runs from being submitted. Caps
+  only apply to executions submitted by this queue.
+
+  Usage:
+
+  .. code:: python
+
+    queue = SubmissionQueue(session, max_running=10, max_per_flow=1)
+    for run in runs:
+      queue.put(run['name'], run['flow'])
+    for run, status, error in queue.run():
+      pass # called as each execution finishes
+
+  """
+
+  def __init__(self, session, max_running=None, max_per_project=None,
+    max_per_flow=None, poller=None, delay=10, workers=8):
+    for name, cap in [
+      ('max_running', max_running),
+      ('max_per_project', max_per_project),
+      ('max_per_flow', max_per_flow),
+    ]:
+      if cap is not None and cap < 1:
+        raise AzkabanError('Invalid `%s` value: %r.', name, cap)
+    self.max_running = max_running
+    self.max_per_project = max_per_project
+    self.max_per_flow = max_per_flow
+    self.delay = delay
+    self.workers = workers
+    self._session = session
+    self._poller = poller
+    self._pending = []
+    self._lock = Lock()
+    self._logger = Adapter(repr(self), _logger)
+
+  def __repr__(self):
+    return '<%s(session=%r, max_running=%r)>' % (
+      self.__class__.__name__, self._session, self.max_running
+    )
+
+  def __len__(self):
+    with self._lock:
+      return len(self._pending)
+
+  def put(self, name, flow, **kwargs):
+    """Queue a run.
+
+    :param name: Project name.
+    :param flow: Flow name.
+    :param \*\*kwargs: Keyword arguments forwarded to
+      :meth:`~azkaban.remote.Session.run_workflow`.
+
+    This method is thread-safe and can be called while :meth:`run` is
+    consuming the queue.
+
+    """
+    with self._lock:
+      self._pending.append(dict(kwargs, name=name, flow=flow))
+
+  def run(self, callback=None):
+    """Submit queued runs as slots free up, until all have finished.
+
+    :param callback: Function called with arguments `run`, `exec_id` each time
+      a run is submitted.
+
+    Yields `(run, status, error)` tuples as executions finish, `run` being a
+    dictionary of :meth:`~azkaban.remote.Session.run_workflow` arguments and
+    `status` the execution's final status. If a run couldn't be submitted,
+    `status` is `None` and `error` the exception raised.
+
+    """
+    if self._poller:
+      for item in self._run(self._poller, callback):
+        yield item
+    else:
+      poller = Poller(self._session, delay=self.delay, workers=self.workers)
+      with poller:
+        for item in self._run(poller, callback):
+          yield item
+
+  def _run(self, poller, callback):
+    """Submission loop.
+
+    :param poller: :class:`~azkaban.remote.Poller` instance.
+    :param callback: Cf. :meth:`run`.
+
+    """
+    running = {}
+    projects = defaultdict(int)
+    flows = defaultdict(int)
+    while True:
+      results = concurrently(
+        lambda run: self._session.run_workflow(**run)['execid'],
+        self._pop_ready(running, projects, flows),
+        self.workers,
+      )
+      for run, exec_id, error in results:
+        if error: # reported to the consumer
+          self._logger.warning(
+            'Failed to submit %s/%s: %s', run['name'], run['flow'], error
+          )
+          yield run, None, error
+          continue
+        self._logger.info(
+          'Submitted %s/%s (execution %s).', run['name'], run['flow'], exec_id
+        )
+        running[exec_id] = run
+        projects[run['name']] += 1
+        flows[(run['name'], run['flow'])] += 1
+        if callback:
+          callback(run, exec_id)
+      if not running:
+        if len(self):
+          continue # all submissions failed, more runs can be submitted
+        break
+      # the timeout lets runs queued meanwhile be submitted if slots are free
+      for exec_id, status in poller.wait_any(running, self.delay).items():
+        run = running.pop(exec_id)
+        projects[run['name']] -= 1
+        flows[(run['name'], run['flow'])] -= 1
+        yield run, status, None
+
+  def _pop_ready(self, running, projects, flows):
+    """Remove the runs which can be submitted now from the queue.
+
+    :param running: Dictionary of running executions.
+    :param projects: Number of running executions keyed by project.
+    :param flows: Number of running executions keyed by `(project, flow)`.
+
+    """
+    ready = []
+    total = len(running)
+    projects = dict(projects)
+    flows = dict(flows)
+    with self._lock:
+      pending = []
+      for run in self._pending:
+        project = run['name']
+        flow = (project, run['flow'])
+        if (
+          (self.max_running is None or total < self.max_running) and
+          (
+            self.max_per_project is None or
+            projects.get(project, 0) < self.max_per_project
+          ) and
+          (self.max_per_flow is None or flows.get(flow, 0) < self.max_per_flow)
+        ):
+          ready.append(run)
+          total += 1
+          projects[project] = projects.get(project, 0) + 1
+          flows[flow] = flows.get(flow, 0) + 1
+        else:
+          pending.append(run)
+      self._pending = pending
+    return ready
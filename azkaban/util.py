@@ -8,16 +8,20 @@ from functools import wraps
 from itertools import chain
 from logging.handlers import TimedRotatingFileHandler
 from mimetypes import guess_type
-from os import close, remove
+from os import SEEK_END, close, remove
 from os.path import exists, expanduser
 from requests.packages.urllib3 import disable_warnings
 from requests.packages.urllib3.filepost import choose_boundary
-from six import b, string_types
+from six import b, reraise, string_types
 from six.moves.configparser import (NoOptionError, NoSectionError,
   ParsingError, RawConfigParser)
+from six.moves.queue import Empty, Full, Queue
 from tempfile import gettempdir, mkstemp
+from threading import Event, Lock, Thread
+from time import sleep, time
 from traceback import print_exc
 import logging as lg
+import mmap as _mmap
 import os.path as osp
 import re
 import sys
@@ -161,10 +165,23 @@ class MultipartForm(object):
 
   :param files: List of filepaths. For more control, each file can also be
     represented as a dictionary with keys `'path'`, `'name'`, and `'type'`.
+    Instead of a path, a dictionary can also have a `'fileobj'` key: a
+    seekable binary file object (e.g. `BytesIO`), streamed from its start. Its
+    `'name'` is then required.
   :param params: Optional dictionary of parameters that will be included in the
     form.
   :param callback: Arguments `cur_bytes`, `tot_bytes`, `index`.
   :param chunksize: Size of each streamed file chunk.
+  :param mmap: Stream files from a memory map rather than reading them (cf.
+    :func:`stream_file`). Combined with a large `chunksize` (e.g. 1 MB), this
+    makes streaming large files much cheaper.
+  :param callback_interval: Minimum time in seconds between two callback calls.
+    By default, the callback is called after each chunk. Otherwise, it is also
+    always called once each file has been fully streamed.
+
+  The exact number of file bytes streamed so far (regardless of
+  `callback_interval`) is available as :attr:`streamed_bytes`, e.g. to find out
+  how much of an interrupted upload was sent.
 
   Usage:
 
@@ -177,11 +194,15 @@ class MultipartForm(object):
 
   """
 
-  def __init__(self, files, params=None, callback=None, chunksize=4096):
+  def __init__(self, files, params=None, callback=None, chunksize=4096,
+    mmap=False, callback_interval=None):
     self._boundary = choose_boundary()
     self._params = params
     self._callback = callback
     self._chunksize = chunksize
+    self._mmap = mmap
+    self._callback_interval = callback_interval
+    self.streamed_bytes = 0
     # generate content type header
     self.headers = {
       'Content-Type': 'multipart/form-data; boundary=%s' % (self._boundary, )
@@ -191,58 +212,65 @@ class MultipartForm(object):
     for opts in files:
       if isinstance(opts, string_types):
         opts = {'path': opts}
-      opts.setdefault('name', opts.get('name') or osp.basename(opts['path']))
+      if 'fileobj' in opts:
+        if not opts.get('name'):
+          raise AzkabanError('Missing name for file object.')
+        opts['fileobj'].seek(0, SEEK_END)
+        opts['size'] = opts['fileobj'].tell()
+      else:
+        opts['name'] = opts.get('name') or osp.basename(opts['path'])
+        opts['size'] = osp.getsize(opts['path'])
       opts.setdefault('type', opts.get('type') or guess_type(opts['name'])[0])
       self._files.append(opts)
+    # lay out the body once, so that its length is known before streaming
+    self._parts = self._get_parts()
+    self.length = sum(
+      len(part) if isinstance(part, bytes) else self._files[part]['size']
+      for part in self._parts
+    )
+    self.headers['Content-Length'] = str(self.length)
+
+  def __len__(self):
+    # lets `requests` send the form with a fixed `Content-Length` rather than
+    # using chunked transfer encoding
+    return self.length
 
   def __iter__(self):
     def _generator(callback=self._callback):
       """Overall generator. Note the callback caching."""
       # set up counters used in the callback
-      cur_bytes = 0
+      counter = {'bytes': 0, 'time': 0}
       tot_bytes = self.size
-      # start the content body with the form parameters
-      if self._params:
-        params_content = b(''.join(
-          '%s%s' % (self._get_section_header(name), content)
-          for name, content in self._params.items()
-        ))
-      else:
-        params_content = b''
-      yield params_content
-      # follow up with the files
-      if len(self._files) == 1:
-        # simple case, only one file (included as any other form param)
-        file_opts = self._files[0]
-        yield b(self._get_section_header(
-          name='file',
-          filename=file_opts['name'],
-          content_type=file_opts['type'],
-        ))
-        for chunk in stream_file(file_opts['path'], self._chunksize):
-          cur_bytes += len(chunk)
+      self.streamed_bytes = 0
+
+      def _stream(index):
+        """Stream a file's chunks, calling the callback (throttled)."""
+        interval = self._callback_interval
+        opts = self._files[index]
+        file_bytes = 0
+        source = opts.get('fileobj') or opts['path']
+        for chunk in stream_file(source, self._chunksize, self._mmap):
+          file_bytes += len(chunk)
+          if file_bytes > opts['size']:
+            break # checked below, avoids sending more than announced
+          counter['bytes'] += len(chunk)
+          self.streamed_bytes = counter['bytes']
           yield chunk
-          if callback:
-            callback(cur_bytes, tot_bytes, 0)
-      else:
-        # we need to group all files in a single multipart/mixed section
-        file_boundary = choose_boundary()
-        yield b(self._get_section_header(
-          name='files',
-          content_type='multipart/mixed; boundary=%s' % (file_boundary, )
-        ))
-        for index, file_opts in enumerate(self._files):
-          yield b(self._get_section_header(
-            filename=file_opts['name'],
-            content_type=file_opts['type'],
-          ))
-          for chunk in stream_file(file_opts['path'], self._chunksize):
-            cur_bytes += len(chunk)
+          if callback and (not interval or time() >= counter['time']):
+            callback(counter['bytes'], tot_bytes, index)
+            if interval:
+              counter['time'] = time() + interval
+        if file_bytes != opts['size']:
+          raise AzkabanError('File changed while streaming: %s', opts['name'])
+        if callback and interval:
+          callback(counter['bytes'], tot_bytes, index)
+
+      for part in self._parts:
+        if isinstance(part, bytes):
+          yield part
+        else:
+          for chunk in _stream(part):
             yield chunk
-            if callback:
-              callback(cur_bytes, tot_bytes, index)
-        yield b('\r\n--%s--' % (file_boundary, ))
-      yield b('\r\n--%s--\r\n' % (self._boundary, ))
     return _generator()
 
   @property
@@ -250,10 +278,53 @@ class MultipartForm(object):
     """Total size of all the files to be streamed.
 
     Note that this doesn't include the bytes used for the header and
-    parameters.
+    parameters (cf. :attr:`length` for the size of the entire body).
+
+    """
+    return sum(d['size'] for d in self._files)
+
+  def _get_parts(self):
+    """Body layout.
+
+    Returns a list of parts, each either a bytestring or the index of a file
+    to stream.
 
     """
-    return sum(osp.getsize(d['path']) for d in self._files)
+    # start the content body with the form parameters
+    if self._params:
+      params_content = b(''.join(
+        '%s%s' % (self._get_section_header(name), content)
+        for name, content in self._params.items()
+      ))
+    else:
+      params_content = b''
+    parts = [params_content]
+    # follow up with the files
+    if len(self._files) == 1:
+      # simple case, only one file (included as any other form param)
+      file_opts = self._files[0]
+      parts.append(b(self._get_section_header(
+        name='file',
+        filename=file_opts['name'],
+        content_type=file_opts['type'],
+      )))
+      parts.append(0)
+    else:
+      # we need to group all files in a single multipart/mixed section
+      file_boundary = choose_boundary()
+      parts.append(b(self._get_section_header(
+        name='files',
+        content_type='multipart/mixed; boundary=%s' % (file_boundary, )
+      )))
+      for index, file_opts in enumerate(self._files):
+        parts.append(b(self._get_section_header(
+          filename=file_opts['name'],
+          content_type=file_opts['type'],
+        )))
+        parts.append(index)
+      parts.append(b('\r\n--%s--' % (file_boundary, )))
+    parts.append(b('\r\n--%s--\r\n' % (self._boundary, )))
+    return parts
 
   def _get_section_header(self, name=None, content_disposition='form-data',
     filename=None, content_type=None, boundary=None):
@@ -273,6 +344,43 @@ class MultipartForm(object):
     )
 
 
+class Throttle(object):
+
+  """Thread-safe limit on the rate of calls.
+
+  :param rate: Maximum number of calls per second.
+
+  Usage:
+
+  .. code:: python
+
+    throttle = Throttle(5)
+    for item in items:
+      throttle.wait() # at most 5 iterations per second, across all threads
+      process(item)
+
+  """
+
+  def __init__(self, rate):
+    if rate <= 0:
+      raise ValueError('Invalid rate: %r.' % (rate, ))
+    self.rate = rate
+    self._lock = Lock()
+    self._next = 0
+
+  def __repr__(self):
+    return '<%s(rate=%r)>' % (self.__class__.__name__, self.rate)
+
+  def wait(self):
+    """Block until the next call is allowed."""
+    with self._lock:
+      now = time()
+      delay = self._next - now
+      self._next = max(now, self._next) + 1. / self.rate
+    if delay > 0:
+      sleep(delay)
+
+
 @contextmanager
 def temppath():
   """Create a temporary filepath.
@@ -321,6 +429,68 @@ def catch(*error_classes):
     return wrapper
   return decorator
 
+def concurrently(func, items, workers=8):
+  """Apply a function to items from a bounded pool of threads.
+
+  :param func: Function called on each item.
+  :param items: Iterable of items. It is consumed lazily, such that at most
+    `workers` calls are in flight at any time.
+  :param workers: Maximum number of concurrent calls.
+
+  Yields `(item, result, error)` tuples as calls complete (so not necessarily
+  in the same order as `items`). If a call raised an exception, `error` is this
+  exception and `result` is `None`, otherwise `error` is `None`. Exceptions are
+  therefore reported per item, without interrupting the others. Closing the
+  generator early prevents any further calls from being started.
+
+  """
+  iterator = iter(items)
+  lock = Lock()
+  results = Queue()
+  stopped = Event()
+  failures = []
+
+  def _work():
+    """Worker thread target."""
+    try:
+      while not stopped.is_set():
+        with lock:
+          try:
+            item = next(iterator)
+          except StopIteration:
+            break
+          except Exception: # forwarded to the consumer
+            failures.append(sys.exc_info())
+            break
+        try:
+          result = func(item)
+        except Exception as err:
+          results.put((True, (item, None, err)))
+        else:
+          results.put((True, (item, result, None)))
+    finally:
+      results.put((False, None))
+
+  threads = [Thread(target=_work) for _ in range(max(1, workers))]
+  for thread in threads:
+    thread.daemon = True
+    thread.start()
+  try:
+    running = len(threads)
+    while running:
+      try:
+        ok, entry = results.get(timeout=0.1)
+      except Empty:
+        continue # lets the main thread handle interrupts
+      if ok:
+        yield entry
+      else:
+        running -= 1
+    if failures:
+      reraise(*failures[0])
+  finally:
+    stopped.set()
+
 def flatten(dct, sep='.'):
   """Flatten a nested dictionary.
 
@@ -351,6 +521,22 @@ def human_readable(size):
       return '%3.1f%s' % (size, suffix)
     size /= 1024.0
 
+def human_duration(seconds):
+  """Transform a duration from seconds to human readable format (e.g. 1h02m).
+
+  :param seconds: Duration in seconds.
+
+  """
+  seconds = int(round(seconds))
+  hours, seconds = divmod(seconds, 3600)
+  minutes, seconds = divmod(seconds, 60)
+  if hours:
+    return '%sh%02dm%02ds' % (hours, minutes, seconds)
+  elif minutes:
+    return '%sm%02ds' % (minutes, seconds)
+  else:
+    return '%ss' % (seconds, )
+
 def write_properties(options, path=None, header=None):
   """Write options to properties file.
 
@@ -408,14 +594,37 @@ def read_properties(*paths):
       raise AzkabanError('Unsupported properties file: %r', path)
   return opts
 
-def stream_file(path, chunksize):
+def stream_file(path, chunksize, mmap=False):
   """Get iterator over a file's contents.
 
-  :param path: Path to file.
+  :param path: Path to file. This can also be a seekable binary file object,
+    which will be streamed from its start.
   :param chunksize: Bytes per chunk.
+  :param mmap: Memory map the file and yield read-only `memoryview` slices of
+    it rather than reading it. This avoids copying its contents (and
+    allocating a new object per chunk's data), which makes streaming large
+    files significantly faster. Chunks remain valid after the iterator is
+    exhausted. Empty files, file objects, and platforms which don't support
+    memory mapping files, fall back to regular reads.
 
   """
+  if not isinstance(path, string_types):
+    path.seek(0)
+    for chunk in iter(lambda: path.read(chunksize), b''):
+      yield chunk
+    return
   with open(path, 'rb') as reader:
+    if mmap:
+      try:
+        view = memoryview(
+          _mmap.mmap(reader.fileno(), 0, access=_mmap.ACCESS_READ)
+        )
+      except (ValueError, TypeError, EnvironmentError):
+        pass # e.g. empty file or python 2's `mmap`
+      else:
+        for offset in range(0, len(view), chunksize):
+          yield view[offset:offset + chunksize]
+        return
     while True:
       chunk = reader.read(chunksize)
       if chunk:
@@ -423,6 +632,67 @@ def stream_file(path, chunksize):
       else:
         break
 
+def prefetch(iterable, size=1):
+  """Iterate over an iterable from a background thread.
+
+  :param iterable: Iterable to consume. It will be iterated over from a
+    separate daemon thread.
+  :param size: Maximum number of items fetched ahead of the consumer. Once this
+    many items are waiting, the background thread blocks until the consumer
+    catches up.
+
+  This lets the production of items (e.g. network calls) overlap with their
+  processing by the caller. Any exception raised while iterating is re-raised
+  in the consumer's thread, after all previously fetched items have been
+  yielded. Closing the returned generator early stops the background thread
+  at its next item.
+
+  """
+  queue = Queue(size)
+  stopped = Event()
+
+  def _put(entry):
+    """Enqueue an entry, giving up if the consumer went away."""
+    while not stopped.is_set():
+      try:
+        queue.put(entry, timeout=0.1)
+      except Full:
+        pass
+      else:
+        return True
+    return False
+
+  def _produce():
+    """Background thread target."""
+    try:
+      for item in iterable:
+        if not _put((True, item)):
+          return
+    except Exception: # forwarded to the consumer
+      _put((False, sys.exc_info()))
+    else:
+      _put((False, None))
+
+  thread = Thread(target=_produce)
+  thread.daemon = True
+  thread.start()
+  try:
+    while True:
+      try:
+        ok, value = queue.get(timeout=0.1)
+      except Empty:
+        if not thread.is_alive() and queue.empty():
+          break # shouldn't happen, but avoids hanging forever
+      else:
+        if ok:
+          yield value
+        elif value:
+          reraise(*value)
+        else:
+          break
+  finally:
+    stopped.set()
+
 def suppress_urllib_warnings():
   """Capture urllib warnings if possible, else disable them (python 2.6)."""
   try:
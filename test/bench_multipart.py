@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""Benchmark `MultipartForm` streaming throughput.
+
+Each configuration streams the same file through a local socket (drained by a
+separate thread), as an upload would. Run from the repository's root with
+`PYTHONPATH=. python test/bench_multipart.py [SIZE_MB]`.
+
+"""
+
+from azkaban.util import MultipartForm, temppath
+from threading import Thread
+from time import time
+import os
+import socket
+import sys
+
+
+_CONFIGURATIONS = [
+  ('default (4 KB)', {}),
+  ('1 MB chunks', {'chunksize': 1 << 20}),
+  ('1 MB chunks, throttled', {'chunksize': 1 << 20, 'callback_interval': 0.1}),
+  (
+    '1 MB chunks, throttled, mmap',
+    {'chunksize': 1 << 20, 'callback_interval': 0.1, 'mmap': True},
+  ),
+]
+
+
+def _stream(path, repeats=3, **kwargs):
+  """Best throughput (MB/s) over several runs."""
+  best = None
+  for _ in range(repeats):
+    sender, receiver = socket.socketpair()
+
+    def _drain():
+      while receiver.recv(1 << 20):
+        pass
+
+    thread = Thread(target=_drain)
+    thread.start()
+    start = time()
+    size = 0
+    form = MultipartForm([path], callback=lambda *args: None, **kwargs)
+    for chunk in form:
+      sender.sendall(chunk)
+      size += len(chunk)
+    sender.close()
+    thread.join()
+    receiver.close()
+    elapsed = time() - start
+    best = elapsed if best is None else min(best, elapsed)
+  return size / best / 1e6
+
+def main(size_mb=200):
+  """Print throughput of each configuration."""
+  with temppath() as path:
+    with open(path, 'wb') as writer:
+      for _ in range(size_mb):
+        writer.write(os.urandom(1 << 20))
+    baseline = None
+    for name, kwargs in _CONFIGURATIONS:
+      throughput = _stream(path, **kwargs)
+      baseline = baseline or throughput
+      sys.stdout.write(
+        '%-30s %8.0f MB/s (x%.1f)\n' % (name, throughput, throughput / baseline)
+      )
+
+if __name__ == '__main__':
+  main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,248 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""Shared test helpers."""
+
+from azkaban.util import AzkabanError
+from shutil import rmtree
+from tempfile import mkdtemp
+from threading import Lock
+
+
+class FakeSession(object):
+
+  """Offline session, holding a server's state in memory.
+
+  :param projects: Dictionary keyed by project name of dictionaries keyed by
+    flow name of lists of `(job, job_type)` tuples. Flows mapped to `None` fail
+    to be fetched.
+  :param versions: Dictionary of project versions keyed by project name,
+    included in the project listing.
+  :param executions: Dictionary keyed by execution ID of statuses (as returned
+    by :meth:`~azkaban.remote.Session.get_execution_status`). A list of
+    statuses is replayed, moving one step forward on each request (the last
+    status is then repeated). Executions mapped to `None` fail to be fetched.
+  :param running: Dictionary keyed by `(project, flow)` of lists of running
+    execution IDs. Flows mapped to `None` fail to be fetched.
+  :param logs: Dictionary keyed by execution ID of dictionaries keyed by job
+    name (`None` for the flow logs) of logs.
+  :param window: Maximum number of characters of logs served per request.
+  :param schedules: Dictionary keyed by project of dictionaries keyed by flow
+    of schedules (`None` for unscheduled flows).
+  :param slas: Dictionary keyed by schedule ID of SLAs.
+  :param outcome: Function called with each submitted run (dictionary of
+    :meth:`~azkaban.remote.Session.run_workflow` arguments), returning its
+    execution's final status. Submissions fail if it raises an exception. By
+    default, all executions succeed.
+  :param upload_errors: List of exceptions raised by successive uploads.
+
+  Executions submitted are considered running until their final status is
+  fetched. All calls are recorded (cf. :meth:`get_calls`).
+
+  """
+
+  url = 'http://foo:8081'
+
+  def __init__(self, projects=None, versions=None, executions=None,
+    running=None, logs=None, window=50000, schedules=None, slas=None,
+    outcome=None, upload_errors=None):
+    self.projects = projects or {}
+    self.versions = versions or {}
+    self.executions = executions or {}
+    self.running = running or {}
+    self.logs = logs or {}
+    self.window = window
+    self.schedules = schedules or {}
+    self.slas = slas or {}
+    self.outcome = outcome or (lambda run: 'SUCCEEDED')
+    self.upload_errors = list(upload_errors or [])
+    self.calls = []
+    self._status_calls = {}
+    self._lock = Lock()
+
+  def get_calls(self, method):
+    """Arguments of all calls to a method, in order.
+
+    :param method: Method name.
+
+    """
+    return [args for name, args in self.calls if name == method]
+
+  def _record(self, method, *args):
+    with self._lock:
+      self.calls.append((method, args))
+
+  def get_projects(self):
+    self._record('get_projects')
+    projects = []
+    for name in sorted(set(self.projects) | set(self.versions)):
+      project = {'projectName': name}
+      if self.versions.get(name) is not None:
+        project['version'] = self.versions[name]
+      projects.append(project)
+    return {'projects': projects}
+
+  def create_project(self, name, description):
+    self._record('create_project', name)
+    self.projects.setdefault(name, {})
+    self.versions[name] = 0
+
+  def upload_project(self, name, path, archive_name=None, callback=None,
+    validate=True):
+    self._record('upload_project', name, validate)
+    size = len(path.getvalue())
+    if callback:
+      callback(size // 2, size, 0)
+    if self.upload_errors:
+      raise self.upload_errors.pop(0)
+    if name not in self.projects:
+      raise AzkabanError("Project %s doesn't exist.", name)
+    if callback:
+      callback(size, size, 0)
+    self.versions[name] = self.versions.get(name, 0) + 1
+    return {'projectId': 1, 'version': self.versions[name]}
+
+  def get_workflows(self, name):
+    self._record('get_workflows', name)
+    flows = self.projects[name]
+    return {
+      'project': name,
+      'flows': [{'flowId': flow} for flow in sorted(flows)],
+    }
+
+  def get_workflow_info(self, name, flow):
+    self._record('get_workflow_info', name, flow)
+    jobs = self.projects[name][flow]
+    if jobs is None:
+      raise AzkabanError('Unavailable.')
+    return {
+      'nodes': [{'id': job, 'type': job_type} for job, job_type in jobs],
+    }
+
+  def get_running_workflows(self, project, flow):
+    self._record('get_running_workflows', project, flow)
+    exec_ids = self.running.get((project, flow), [])
+    if exec_ids is None:
+      raise AzkabanError('Unavailable.')
+    return {'execIds': list(exec_ids)} if exec_ids else {}
+
+  def run_workflow(self, name, flow, **kwargs):
+    run = dict(kwargs, name=name, flow=flow)
+    self._record('run_workflow', run)
+    status = self.outcome(run)
+    with self._lock:
+      exec_id = max(self.executions or [0]) + 1
+      self.executions[exec_id] = [
+        {'execid': exec_id, 'project': name, 'flowId': flow, 'nodes': [],
+         'status': 'RUNNING'},
+        {'execid': exec_id, 'project': name, 'flowId': flow, 'nodes': [],
+         'status': status},
+      ]
+      self.running.setdefault((name, flow), []).append(exec_id)
+    return {'project': name, 'flow': flow, 'execid': exec_id}
+
+  def cancel_execution(self, exec_id):
+    self._record('cancel_execution', exec_id)
+    for exec_ids in self.running.values():
+      if exec_ids and exec_id in exec_ids:
+        exec_ids.remove(exec_id)
+        return {}
+    raise AzkabanError('Execution %s is not running.', exec_id)
+
+  def get_execution_status(self, exec_id):
+    self._record('get_execution_status', exec_id)
+    statuses = self.executions.get(exec_id)
+    if statuses is None:
+      raise AzkabanError('Execution %s not found.', exec_id)
+    if not isinstance(statuses, list):
+      return statuses
+    with self._lock:
+      index = self._status_calls.get(exec_id, 0)
+      self._status_calls[exec_id] = index + 1
+    status = statuses[min(index, len(statuses) - 1)]
+    if index >= len(statuses) - 1:
+      for exec_ids in self.running.values():
+        if exec_ids and exec_id in exec_ids:
+          exec_ids.remove(exec_id)
+    return status
+
+  def get_execution_statuses(self, exec_ids, workers=8):
+    for exec_id in exec_ids:
+      try:
+        yield exec_id, self.get_execution_status(exec_id), None
+      except AzkabanError as err:
+        yield exec_id, None, err
+
+  def get_workflow_executions(self, project, flow, start=0, length=10):
+    self._record('get_workflow_executions', project, flow, start, length)
+    exec_ids = sorted(self.executions, reverse=True)[start:start + length]
+    return {'executions': [self._get_listing(i) for i in exec_ids]}
+
+  def iter_workflow_executions(self, project, flow, limit=None, after_id=None):
+    self._record('iter_workflow_executions', project, flow, limit, after_id)
+    exec_ids = sorted(
+      (i for i in self.executions if after_id is None or i > after_id),
+      reverse=True,
+    )
+    return [self._get_listing(i) for i in exec_ids[:limit]]
+
+  def _get_listing(self, exec_id):
+    """Execution, as listed by the server."""
+    statuses = self.executions[exec_id]
+    if isinstance(statuses, list):
+      statuses = statuses[-1]
+    listing = {'execId': exec_id}
+    if statuses:
+      for key in ('status', 'submitTime', 'startTime', 'endTime'):
+        if key in statuses:
+          listing[key] = statuses[key]
+    return listing
+
+  def get_execution_logs(self, exec_id, offset=0, limit=50000):
+    return self.get_job_logs(exec_id, None, offset, limit)
+
+  def get_job_logs(self, exec_id, job, offset=0, limit=50000):
+    self._record('get_job_logs', exec_id, job, offset)
+    limit = min(limit, self.window)
+    data = self.logs[exec_id].get(job, '')[offset:offset + limit]
+    return {'offset': offset, 'length': len(data), 'data': data}
+
+  def get_project_schedules(self, names, workers=8):
+    self._record('get_project_schedules', sorted(names))
+    return dict(
+      ((name, flow), schedule)
+      for name in names
+      for flow, schedule in (self.schedules.get(name) or {}).items()
+    )
+
+  def schedule_cron_workflow(self, name, flow, cron, timezone=None, **kwargs):
+    self._record('schedule_cron_workflow', name, flow, cron, kwargs)
+    return {'status': 'success'}
+
+  def remove_schedule(self, schedule_id):
+    self._record('remove_schedule', schedule_id)
+    return {'status': 'success'}
+
+  def get_slas(self, schedule_ids, workers=8):
+    for schedule_id in schedule_ids:
+      yield schedule_id, self.slas.get(schedule_id), None
+
+  def set_sla(self, schedule_id, email, settings):
+    self._record('set_sla', schedule_id, email, settings)
+    return {}
+
+
+class WithTempDir(object):
+
+  """Test class mixin, creating a temporary directory for each test.
+
+  Its path is available as `self.dpath`. Subclasses overriding `setup` or
+  `teardown` should call these methods.
+
+  """
+
+  def setup(self):
+    self.dpath = mkdtemp()
+
+  def teardown(self):
+    rmtree(self.dpath)
@@ -0,0 +1,197 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""Test Azkaban analysis module."""
+
+from azkaban.analysis import *
+from azkaban.util import AzkabanError
+from helpers import FakeSession
+from nose.tools import eq_, ok_, raises
+
+
+def _node(name, start, end, parents=None, status='SUCCEEDED'):
+  """Execution node with times in seconds."""
+  return {
+    'id': name,
+    'startTime': start * 1000 if start >= 0 else -1,
+    'endTime': end * 1000 if end >= 0 else -1,
+    'updateTime': end * 1000 if end >= 0 else -1,
+    'status': status,
+    'in': parents or [],
+  }
+
+
+class TestTimeline(object):
+
+  def setup(self):
+    # a -> b -> d
+    #   -> c ---^
+    self.nodes = [
+      _node('a', 0, 10),
+      _node('b', 12, 30, ['a']),
+      _node('c', 10, 15, ['a']),
+      _node('d', 30, 40, ['b', 'c']),
+    ]
+
+  def test_duration(self):
+    timeline = Timeline(self.nodes)
+    eq_(timeline.duration, 40)
+    eq_(timeline.jobs['b']['duration'], 18)
+
+  def test_critical_path(self):
+    eq_(Timeline(self.nodes).critical_path, ['a', 'b', 'd'])
+
+  def test_wait(self):
+    timeline = Timeline(self.nodes)
+    eq_(timeline.jobs['a']['wait'], 0)
+    eq_(timeline.jobs['b']['ready'], 10)
+    eq_(timeline.jobs['b']['wait'], 2)
+    eq_(timeline.jobs['c']['wait'], 0)
+    eq_(timeline.jobs['d']['wait'], 0)
+
+  def test_slack(self):
+    timeline = Timeline(self.nodes)
+    eq_(timeline.jobs['c']['slack'], 15)
+    eq_(timeline.jobs['b']['slack'], 0)
+    eq_(timeline.jobs['d']['slack'], 0)
+    eq_(timeline.jobs['a']['slack'], 2) # b waited for 2 seconds
+
+  def test_parallelism(self):
+    timeline = Timeline(self.nodes)
+    eq_(
+      timeline.parallelism,
+      [(0, 1), (10, 1), (12, 2), (15, 1), (30, 1), (40, 0)]
+    )
+    eq_(timeline.max_parallelism, 2)
+    eq_(timeline.average_parallelism, 43 / 40.)
+
+  def test_skipped_and_running(self):
+    nodes = self.nodes + [
+      _node('e', -1, -1, ['d'], 'READY'),
+      _node('f', 35, -1, ['c'], 'RUNNING'),
+    ]
+    timeline = Timeline(nodes, end=50000)
+    ok_('e' not in timeline.jobs)
+    eq_(timeline.jobs['f']['end'], 50)
+    eq_(timeline.critical_path, ['a', 'c', 'f'])
+
+  def test_explicit_dependencies(self):
+    nodes = [dict(n, **{'in': []}) for n in self.nodes]
+    timeline = Timeline(nodes, dependencies={'d': ['c']})
+    eq_(timeline.critical_path, ['c', 'd'])
+    timeline = Timeline(nodes, dependencies={'d': ['b', 'c'], 'b': ['a']})
+    eq_(timeline.critical_path, ['a', 'b', 'd'])
+
+  def test_from_status(self):
+    nodes = [
+      dict(n, startTime=n['startTime'] + 1000, endTime=n['endTime'] + 1000)
+      for n in self.nodes
+    ]
+    for node in nodes:
+      node['in'] = []
+    status = {'startTime': 0, 'endTime': 41000, 'nodes': nodes}
+    flow_info = {'nodes': [{'id': n['id'], 'in': n['in']} for n in self.nodes]}
+    timeline = Timeline.from_status(status, flow_info)
+    eq_(timeline.critical_path, ['a', 'b', 'd'])
+    eq_(timeline.jobs['a']['start'], 1)
+    eq_(timeline.jobs['a']['wait'], 1)
+
+  @raises(AzkabanError)
+  def test_no_jobs(self):
+    Timeline([_node('a', -1, -1)])
+
+
+def _status(exec_id, nodes, status='SUCCEEDED'):
+  """Execution status spanning its nodes."""
+  return {
+    'execid': exec_id,
+    'status': status,
+    'startTime': min(n['startTime'] for n in nodes),
+    'endTime': (
+      max(n['endTime'] for n in nodes) if status == 'SUCCEEDED' else -1
+    ),
+    'nodes': nodes,
+  }
+
+
+class TestRuntimeStats(object):
+
+  def setup(self):
+    # a -> b -> d
+    #   -> c ---^
+    self.stats = RuntimeStats([40, 20, 30], {
+      'a': [10, 10],
+      'b': [20, 10, 30],
+      'c': [5],
+      'd': [10],
+    })
+
+  def test_percentile(self):
+    eq_(self.stats.percentile(50), 30)
+    eq_(self.stats.percentile(100), 40)
+    eq_(self.stats.percentile(25, 'b'), 15)
+    eq_(self.stats.percentile(90, 'c'), 5)
+    eq_(self.stats.percentile(50, 'e'), None)
+
+  @raises(ValueError)
+  def test_invalid_percentile(self):
+    self.stats.percentile(101)
+
+  def test_remaining_running(self):
+    status = _status(1, [
+      _node('a', 0, 10),
+      _node('b', 10, -1, ['a'], 'RUNNING'),
+      _node('c', 10, 15, ['a']),
+      _node('d', -1, -1, ['b', 'c'], 'READY'),
+    ], 'RUNNING')
+    eq_(self.stats.remaining(status, now=20000), 20) # b ends at 30, d at 40
+    eq_(self.stats.remaining(status, now=35000), 10) # b overdue
+    eq_(self.stats.remaining(status, 100, now=20000), 30)
+
+  def test_remaining_not_started(self):
+    status = _status(1, [
+      _node('a', 0, -1, status='RUNNING'),
+      _node('b', -1, -1, status='READY'),
+      _node('c', -1, -1, status='READY'),
+      _node('d', -1, -1, status='READY'),
+    ], 'RUNNING')
+    dependencies = {'b': ['a'], 'c': ['a'], 'd': ['b', 'c']}
+    eq_(self.stats.remaining(status, dependencies=dependencies, now=0), 40)
+
+  def test_remaining_long_chain(self):
+    nodes = [_node('a', 0, -1, status='RUNNING')]
+    dependencies = {}
+    for index in range(5000):
+      nodes.append(_node('j%s' % (index, ), -1, -1, status='READY'))
+      dependencies['j%s' % (index, )] = [nodes[-2]['id']]
+    status = _status(1, nodes, 'RUNNING')
+    stats = RuntimeStats([], {'a': [10], 'j4999': [5]})
+    eq_(stats.remaining(status, dependencies=dependencies, now=0), 15)
+
+  @raises(AzkabanError)
+  def test_remaining_cyclic(self):
+    status = _status(1, [
+      _node('a', 0, -1, status='RUNNING'),
+      _node('b', -1, -1, status='READY'),
+      _node('c', -1, -1, status='READY'),
+    ], 'RUNNING')
+    dependencies = {'b': ['c'], 'c': ['b']}
+    self.stats.remaining(status, dependencies=dependencies, now=0)
+
+  def test_remaining_finished(self):
+    status = _status(1, [_node('a', 0, 10)])
+    eq_(self.stats.remaining(status), 0)
+
+  def test_from_session(self):
+    statuses = [
+      _status(3, [_node('a', 100, -1, status='RUNNING')], 'RUNNING'),
+      _status(2, [_node('a', 50, 70), _node('b', 70, 75, ['a'])]),
+      _status(1, [_node('a', 0, 10), _node('b', 10, 20, ['a'], 'FAILED')],
+        'FAILED'),
+      _status(0, [_node('a', -20, -10)]),
+    ]
+    session = FakeSession(executions=dict((s['execid'], s) for s in statuses))
+    stats = RuntimeStats.from_session(session, 'p', 'f', limit=3)
+    eq_(stats.jobs, ['a', 'b'])
+    eq_(stats.percentile(50), 25)
+    eq_(stats.percentile(50, 'a'), 20)
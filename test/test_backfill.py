@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""Test Azkaban backfill module."""
+
+from azkaban.backfill import *
+from azkaban.util import AzkabanError
+from datetime import date
+from helpers import FakeSession, WithTempDir
+from nose.tools import eq_, ok_, raises
+import json
+import os.path as osp
+
+
+def _session(outcomes=None):
+  """Session running flows quickly.
+
+  :param outcomes: Dictionary keyed by partition of lists of final statuses,
+    one per attempt. Partitions not found (or out of attempts) succeed.
+
+  """
+  outcomes = outcomes or {}
+
+  def _outcome(run):
+    statuses = outcomes.get(run['properties'].get('day')) or []
+    return statuses.pop(0) if statuses else 'SUCCEEDED'
+
+  return FakeSession(outcome=_outcome)
+
+
+def _partitions(session):
+  """Partitions submitted, in order."""
+  runs = session.get_calls('run_workflow')
+  return [run['properties']['day'] for run, in runs]
+
+
+class TestDateRange(object):
+
+  def test_strings(self):
+    eq_(
+      date_range('2016-02-27', '2016-03-01'),
+      ['2016-02-27', '2016-02-28', '2016-02-29', '2016-03-01'],
+    )
+
+  def test_dates(self):
+    eq_(
+      date_range(date(2016, 1, 1), date(2016, 1, 5), step=2, fmt='%Y%m%d'),
+      ['20160101', '20160103', '20160105'],
+    )
+
+  def test_empty(self):
+    eq_(date_range('2016-01-02', '2016-01-01'), [])
+
+  @raises(AzkabanError)
+  def test_invalid_date(self):
+    date_range('2016-01-01', '01/02/2016')
+
+
+class TestBackfill(WithTempDir):
+
+  def setup(self):
+    super(TestBackfill, self).setup()
+    self.path = osp.join(self.dpath, 'state.json')
+
+  def test_run(self):
+    session = _session()
+    partitions = date_range('2016-01-01', '2016-01-05')
+    backfill = Backfill(
+      session, 'pj', 'fl', partitions, properties={'day': '{partition}'},
+    )
+    states = backfill.run(max_running=2, delay=0.01)
+    eq_(sorted(_partitions(session)), partitions)
+    ok_(all(state['status'] == 'succeeded' for state in states.values()))
+
+  def test_retries(self):
+    session = _session({'a': ['FAILED'], 'b': ['KILLED', 'FAILED']})
+    backfill = Backfill(
+      session, 'pj', 'fl', ['a', 'b', 'c'], properties={'day': '{partition}'},
+    )
+    states = backfill.run(retries=1, delay=0.01)
+    eq_(states['a']['status'], 'succeeded')
+    eq_(states['a']['attempts'], 2)
+    eq_(states['b']['status'], 'failed')
+    eq_(states['b']['attempts'], 2)
+    eq_(states['c']['attempts'], 1)
+
+  def test_callback(self):
+    changes = []
+    backfill = Backfill(
+      _session(), 'pj', 'fl', ['a'], properties={'day': '{partition}'},
+    )
+    backfill.run(
+      delay=0.01,
+      callback=lambda partition, state: changes.append(state['status']),
+    )
+    eq_(changes, ['running', 'succeeded'])
+
+  def test_resume(self):
+    session = _session({'b': ['FAILED']})
+    backfill = Backfill(
+      session, 'pj', 'fl', ['a', 'b'], properties={'day': '{partition}'},
+      path=self.path,
+    )
+    eq_(backfill.run(delay=0.01)['b']['status'], 'failed')
+    with open(self.path) as reader:
+      eq_(json.load(reader)['a']['status'], 'succeeded')
+    session.calls = []
+    backfill = Backfill(
+      session, 'pj', 'fl', ['a', 'b'], properties={'day': '{partition}'},
+      path=self.path,
+    )
+    states = backfill.run(delay=0.01)
+    eq_(_partitions(session), ['b']) # only failed rerun
+    eq_(states['b']['status'], 'succeeded')
+
+  @raises(AzkabanError)
+  def test_invalid_state_file(self):
+    with open(self.path, 'w') as writer:
+      writer.write('foo')
+    Backfill(_session(), 'pj', 'fl', ['a'], path=self.path)
@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""Test Azkaban cron module."""
+
+from azkaban.cron import *
+from azkaban.util import AzkabanError
+from datetime import datetime, timedelta
+from nose.tools import eq_, ok_
+
+
+def _times(expression, start, count=3):
+  """Next fire times, formatted."""
+  return [
+    when.strftime('%Y-%m-%d %H:%M:%S')
+    for when in Cron(expression).next_times(start, count)
+  ]
+
+
+class TestCron(object):
+
+  def setup(self):
+    self.start = datetime(2026, 10, 18, 12, 0) # a sunday
+
+  def test_daily(self):
+    eq_(
+      _times('0 30 2 * * ?', self.start),
+      ['2026-10-19 02:30:00', '2026-10-20 02:30:00', '2026-10-21 02:30:00'],
+    )
+
+  def test_strictly_after(self):
+    eq_(_times('0 0 12 * * ?', self.start, 1), ['2026-10-19 12:00:00'])
+
+  def test_increments(self):
+    eq_(
+      _times('0 0/20 12 * * ?', self.start),
+      ['2026-10-18 12:20:00', '2026-10-18 12:40:00', '2026-10-19 12:00:00'],
+    )
+    eq_(
+      _times('*/30 * * * * ?', self.start),
+      ['2026-10-18 12:00:30', '2026-10-18 12:01:00', '2026-10-18 12:01:30'],
+    )
+
+  def test_names_and_wrapping_ranges(self):
+    eq_(
+      _times('0 0 12 ? jan,JUL FRI-MON', self.start, 4),
+      [
+        '2027-01-01 12:00:00', '2027-01-02 12:00:00', '2027-01-03 12:00:00',
+        '2027-01-04 12:00:00',
+      ],
+    )
+    eq_(
+      _times('0 0 23-1 * * ?', self.start),
+      ['2026-10-18 23:00:00', '2026-10-19 00:00:00', '2026-10-19 01:00:00'],
+    )
+
+  def test_last_day(self):
+    eq_(
+      _times('0 0 0 L * ?', self.start),
+      ['2026-10-31 00:00:00', '2026-11-30 00:00:00', '2026-12-31 00:00:00'],
+    )
+    eq_(_times('0 0 0 L-2 2 ?', self.start, 1), ['2027-02-26 00:00:00'])
+
+  def test_weekday(self):
+    # 2026-11-15 is a sunday, 2027-05-01 a saturday
+    eq_(_times('0 0 0 15W 11 ?', self.start, 1), ['2026-11-16 00:00:00'])
+    eq_(_times('0 0 0 1W 5 ?', self.start, 1), ['2027-05-03 00:00:00'])
+    eq_(_times('0 0 0 LW 10 ?', self.start, 1), ['2026-10-30 00:00:00'])
+
+  def test_nth_and_last_weekday(self):
+    eq_(
+      _times('0 0 0 ? * 6#3', self.start),
+      ['2026-11-20 00:00:00', '2026-12-18 00:00:00', '2027-01-15 00:00:00'],
+    )
+    eq_(
+      _times('0 0 0 ? * MONL', self.start),
+      ['2026-10-26 00:00:00', '2026-11-30 00:00:00', '2026-12-28 00:00:00'],
+    )
+
+  def test_years(self):
+    eq_(
+      _times('0 0 0 29 2 ? 2027-2040', self.start),
+      ['2028-02-29 00:00:00', '2032-02-29 00:00:00', '2036-02-29 00:00:00'],
+    )
+    eq_(_times('0 0 0 * * ? 2020', self.start), [])
+
+  def test_never(self):
+    eq_(_times('0 0 0 30 2 ?', self.start), [])
+
+  def test_matches(self):
+    cron = Cron('0 0/15 9-17 ? * MON-FRI')
+    ok_(cron.matches(datetime(2026, 10, 19, 9, 45)))
+    ok_(not cron.matches(datetime(2026, 10, 18, 9, 45)))
+    ok_(not cron.matches(datetime(2026, 10, 19, 18, 0)))
+
+  def test_iter_times_end(self):
+    times = list(
+      Cron('0 0 * * * ?').iter_times(self.start, datetime(2026, 10, 19))
+    )
+    eq_(len(times), 11)
+
+  def test_shift(self):
+    eq_(Cron('0 30 2 * * ?').shift(45).expression, '0 15 3 * * ?')
+    eq_(Cron('0 0 0 * * ?').shift(-30).expression, '0 30 23 * * ?')
+    eq_(Cron('0 0,30 * * * ?').shift(10).expression, '0 10,40 * * * ?')
+    ok_(Cron('0 0 0 ? * MON').shift(-30) is None) # would fire on sundays
+    ok_(Cron('0 0,50 1 * * ?').shift(20) is None) # not a product
+
+  def test_invalid(self):
+    for expression in [
+      '0 0 0 * *', # missing field
+      '0 0 0 * * *', # no `?`
+      '0 0 0 ? * ?',
+      '0 60 0 * * ?',
+      '0 0 0 32 * ?',
+      '0 0 0 ? * 8',
+      '0 0 0 ? * FOO',
+      '0 0 0 ? * 2#6',
+      '0 0 0 * * ? 1900',
+    ]:
+      try:
+        Cron(expression)
+      except AzkabanError:
+        pass
+      else:
+        raise AssertionError('%r should be invalid.' % (expression, ))
+
+
+class TestForecast(object):
+
+  def setup(self):
+    self.start = datetime(2026, 10, 18)
+    self.end = datetime(2026, 10, 19)
+    self.schedules = {
+      'a': ('0 0 2 * * ?', 3600),
+      'b': ('0 0 2 * * ?', 1800),
+      'c': ('0 30 2 * * ?', 3600),
+      'd': ('0 0/10 * * * ?', 0), # instantaneous
+    }
+
+  def test_curve(self):
+    forecast = Forecast(self.schedules, self.start, self.end)
+    eq_(forecast.curve(), [
+      (datetime(2026, 10, 18), 0),
+      (datetime(2026, 10, 18, 2), 2),
+      (datetime(2026, 10, 18, 3), 1),
+      (datetime(2026, 10, 18, 3, 30), 0),
+    ])
+    eq_(forecast.peak(), 2)
+    eq_(forecast.peak({'b': 1800}), 3)
+
+  def test_lookback(self):
+    schedules = {'a': ('0 0 23 * * ?', 7200)}
+    forecast = Forecast(schedules, self.start, self.end)
+    eq_(forecast.curve()[:2], [
+      (datetime(2026, 10, 18), 1),
+      (datetime(2026, 10, 18, 1), 0),
+    ])
+
+  def test_hotspots(self):
+    forecast = Forecast(self.schedules, self.start, self.end)
+    eq_(forecast.hotspots(1), [{
+      'start': datetime(2026, 10, 18, 2),
+      'end': datetime(2026, 10, 18, 3),
+      'peak': 2,
+      'keys': ['a', 'b', 'c'],
+    }])
+    eq_(forecast.overload(1), 3600)
+    eq_(forecast.hotspots(2), [])
+
+  def test_suggest_shifts(self):
+    forecast = Forecast(self.schedules, self.start, self.end)
+    suggestions = forecast.suggest_shifts(1, max_shift=120, step=30)
+    eq_(len(suggestions), 1)
+    suggestion = suggestions[0]
+    eq_(suggestion['overload'], 0)
+    shifts = {suggestion['key']: 60 * suggestion['minutes']}
+    eq_(forecast.peak(shifts), 1)
+    ok_(suggestion['cron'].matches(
+      datetime(2026, 10, 18, 2) +
+      timedelta(minutes=suggestion['minutes']) +
+      timedelta(minutes=30 if suggestion['key'] == 'c' else 0)
+    ))
@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""Test Azkaban deployment module."""
+
+from azkaban import remote
+from azkaban.deploy import *
+from azkaban.remote import Session
+from azkaban.util import AzkabanError
+from nose.tools import eq_, ok_, raises
+from requests import Request, Response
+from helpers import FakeSession, WithTempDir
+from io import BytesIO
+from requests.exceptions import HTTPError
+import json
+import os.path as osp
+
+
+def _http_error(code):
+  """HTTP error raised for a response with the given status code."""
+  response = Response()
+  response.status_code = code
+  return HTTPError(response=response)
+
+def _response(method, url, code, data=None):
+  """Server response, with an optional JSON body."""
+  response = Response()
+  response.status_code = code
+  response.url = url
+  response.request = Request(method, url).prepare()
+  response._content = json.dumps(data).encode('utf-8') if data else b''
+  return response
+
+
+class TestUploadLog(WithTempDir):
+
+  def setup(self):
+    super(TestUploadLog, self).setup()
+    self.path = osp.join(self.dpath, 'uploads.sqlite')
+    self.session = FakeSession(projects={'p1': {}}, versions={'p1': 3})
+
+  def test_never_uploaded(self):
+    with UploadLog(self.path) as log:
+      eq_(log.get('p1'), None)
+      eq_(log.get_current_version(self.session, 'p1', 'abc'), None)
+
+  def test_unchanged(self):
+    with UploadLog(self.path) as log:
+      log.record('p1', 'abc', 3)
+    with UploadLog(self.path) as log:
+      eq_(log.get('p1')[:2], ('abc', '3'))
+      eq_(log.get_current_version(self.session, 'p1', 'abc'), '3')
+
+  def test_changed(self):
+    with UploadLog(self.path) as log:
+      log.record('p1', 'abc', 3)
+      eq_(log.get_current_version(self.session, 'p1', 'def'), None)
+
+  def test_deleted_on_server(self):
+    with UploadLog(self.path) as log:
+      log.record('p1', 'abc', 3)
+      self.session.projects = {}
+      self.session.versions = {}
+      eq_(log.get_current_version(self.session, 'p1', 'abc'), None)
+
+
+class TestUploadArchive(object):
+
+  def setup(self):
+    self.reports = []
+
+  def _session(self, errors=None):
+    return FakeSession(
+      projects={'p1': {}}, versions={'p1': 3}, upload_errors=errors
+    )
+
+  def _upload(self, session, **kwargs):
+    return upload_archive(
+      session, 'p1', BytesIO(b'x' * 20), 'p1.zip', delay=0,
+      reporter=lambda *args: self.reports.append(args), **kwargs
+    )
+
+  def test_transient_failures(self):
+    session = self._session([
+      AzkabanError('Unable to connect to Azkaban server.'),
+      _http_error(502),
+    ])
+    eq_(self._upload(session)['version'], 4)
+    eq_([(n, sent) for n, sent, _ in self.reports], [(1, 10), (2, 10), (3, 20)])
+    eq_(self.reports[-1][2], None)
+    eq_(
+      [validate for _, validate in session.get_calls('upload_project')],
+      [True, False, False],
+    )
+
+  @raises(HTTPError)
+  def test_too_many_failures(self):
+    session = self._session([_http_error(503)] * 3)
+    self._upload(session, retries=2)
+
+  @raises(AzkabanError)
+  def test_permanent_failure(self):
+    session = self._session([_http_error(400)])
+    self._upload(session)
+
+  def test_create(self):
+    session = FakeSession()
+    eq_(self._upload(session, create=True)['version'], 1)
+    eq_(len(self.reports), 2)
+
+  @raises(AzkabanError)
+  def test_missing(self):
+    self._upload(FakeSession())
+
+
+class TestUploadArchiveSession(object):
+
+  """Uploads through an actual session, only stubbing out HTTP requests."""
+
+  def setup(self):
+    self.codes = [] # status codes of successive upload responses
+    self.uploads = []
+    self.validations = 0
+    self._azkaban_request = remote._azkaban_request
+
+    def _azkaban_request(method, url, client=None, **kwargs):
+      data = kwargs.get('data')
+      if not hasattr(data, 'headers'): # session validation
+        self.validations += 1
+        return _response(method, url, 200)
+      self.uploads.append(b''.join(data))
+      code = self.codes.pop(0) if self.codes else 200
+      return _response(method, url, code, {'projectId': 1, 'version': 4})
+
+    remote._azkaban_request = _azkaban_request
+    self.session = Session(url='http://foo:8081')
+    self.session.id = 'abc'
+
+  def teardown(self):
+    remote._azkaban_request = self._azkaban_request
+
+  def test_retry(self):
+    self.codes = [504]
+    reports = []
+    res = upload_archive(
+      self.session, 'p1', BytesIO(b'x' * 20), 'p1.zip', delay=0,
+      reporter=lambda *args: reports.append(args),
+    )
+    eq_(res['version'], 4)
+    eq_(self.validations, 1) # only before the first attempt
+    eq_(len(self.uploads), 2)
+    ok_(all(b'x' * 20 in upload for upload in self.uploads)) # same archive
+    eq_([(attempt, sent) for attempt, sent, _ in reports], [(1, 20), (2, 20)])
+
+  @raises(AzkabanError)
+  def test_permanent_failure(self):
+    self.codes = [400]
+    upload_archive(self.session, 'p1', BytesIO(b'x' * 20), 'p1.zip', delay=0)
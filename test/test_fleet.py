@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""Test Azkaban fleet module."""
+
+from azkaban.fleet import *
+from azkaban.util import AzkabanError, Config
+from helpers import FakeSession
+from nose.tools import eq_, ok_, raises
+from threading import Event
+import re
+
+
+def _session(running):
+  """Session with a single project.
+
+  :param running: Dictionary keyed by flow name of lists of running execution
+    IDs. Flows mapped to `None` fail to be fetched.
+
+  """
+  return FakeSession(
+    projects={'pj': dict((flow, []) for flow in running)},
+    running=dict((('pj', flow), ids) for flow, ids in running.items()),
+  )
+
+
+class TestFindRunningExecutions(object):
+
+  def test_all(self):
+    session = _session({'a': [3, 1], 'b': [], 'ab': [2]})
+    eq_(
+      find_running_executions(session, 'pj'),
+      [('a', 1), ('a', 3), ('ab', 2)],
+    )
+
+  def test_pattern(self):
+    session = _session({'a': [3, 1], 'b': [4], 'ab': [2]})
+    eq_(find_running_executions(session, 'pj', flows='a'), [('a', 1), ('a', 3)])
+    eq_(find_running_executions(session, 'pj', flows='a.*|b'), [
+      ('a', 1), ('a', 3), ('ab', 2), ('b', 4),
+    ])
+
+  def test_prefix_alternation(self):
+    session = _session({'load': [1], 'load_daily': [2], 'load_hourly': [3]})
+    for flows in ['load|load_daily', re.compile('LOAD|LOAD_DAILY', re.I)]:
+      eq_(
+        find_running_executions(session, 'pj', flows=flows),
+        [('load', 1), ('load_daily', 2)],
+      )
+
+  @raises(AzkabanError)
+  def test_error(self):
+    session = _session({'a': [1], 'b': None})
+    find_running_executions(session, 'pj')
+
+
+class TestScanRunningExecutions(object):
+
+  def test_listed(self):
+    session = _session({'a': [3, 1], 'b': [], 'ab': [2]})
+    eq_(scan_running_executions(session, workers=2), {
+      'executions': [('pj', 'a', 1), ('pj', 'a', 3), ('pj', 'ab', 2)],
+      'errors': {},
+    })
+
+  def test_flows(self):
+    session = _session({'a': [3, 1], 'b': None, 'ab': [2]})
+    scan = scan_running_executions(session, [('pj', 'b'), ('pj', 'ab')])
+    eq_(scan['executions'], [('pj', 'ab', 2)])
+    eq_(list(scan['errors']), [('pj', 'b')])
+
+
+class TestControlExecutions(object):
+
+  def test_cancel(self):
+    session = _session({'a': [1, 3]})
+    results = list(control_executions(session, [1, 2, 3], 'cancel', workers=2))
+    eq_(session.running, {('pj', 'a'): []})
+    errors = [exec_id for exec_id, _, error in results if error]
+    eq_(errors, [2])
+
+  @raises(ValueError)
+  def test_invalid_action(self):
+    control_executions(_session({}), [1], 'kill')
+
+
+class TestGetSessions(object):
+
+  def setup(self):
+    self.config = Config('/nonexistent/azkabanrc')
+    parser = self.config.parser
+    for alias, option, value in [
+      ('east', 'url', 'http://east:8081'),
+      ('west', 'url', 'http://west:8081'),
+      ('all', 'aliases', 'east, west, nested'),
+      ('nested', 'aliases', 'all, west'),
+    ]:
+      parser.add_section('alias.%s' % (alias, ))
+      parser.set('alias.%s' % (alias, ), option, value)
+
+  def test_aliases(self):
+    sessions = get_sessions(['east', 'west'], self.config)
+    eq_(sorted(sessions), ['east', 'west'])
+    eq_(sessions['west'].url, 'http://west:8081')
+
+  def test_group(self):
+    eq_(sorted(get_sessions(['all'], self.config)), ['east', 'west'])
+
+  @raises(AzkabanError)
+  def test_unknown_alias(self):
+    get_sessions(['east', 'north'], self.config)
+
+
+class TestFanOut(object):
+
+  def test_concurrent(self):
+    released = Event()
+
+    def _func(name):
+      if name == 'slow':
+        released.wait(5)
+        return 1
+      elif name == 'fast':
+        released.set() # the slow call only returns after this one started
+        return 2
+      raise AzkabanError('Unavailable.')
+
+    results = list(fan_out(
+      {'slow': 'slow', 'fast': 'fast', 'down': 'down'}, _func
+    ))
+    eq_(
+      sorted((alias, res) for alias, res, _ in results),
+      [('down', None), ('fast', 2), ('slow', 1)],
+    )
+    eq_([alias for alias, _, error in results if error], ['down'])
+    ok_(released.is_set())
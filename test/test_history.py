@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""Test Azkaban history module."""
+
+from azkaban.history import *
+from helpers import FakeSession, WithTempDir
+from nose.tools import eq_
+import os.path as osp
+
+
+def _status(exec_id, status, nodes):
+  """Execution status.
+
+  :param exec_id: Execution ID, also used as start time (in seconds).
+  :param status: Execution status.
+  :param nodes: List of `(job, status, duration)` tuples.
+
+  """
+  start = 1000 * exec_id
+  if status == 'RUNNING':
+    end = -1
+  else:
+    end = start + sum(duration for _, _, duration in nodes)
+  return {
+    'status': status,
+    'startTime': start,
+    'endTime': end,
+    'nodes': [
+      {
+        'id': job,
+        'status': job_status,
+        'startTime': start,
+        'endTime': start + duration if duration else -1,
+      }
+      for job, job_status, duration in nodes
+    ],
+  }
+
+
+class TestHistory(WithTempDir):
+
+  def setup(self):
+    super(TestHistory, self).setup()
+    self.path = osp.join(self.dpath, 'history.sqlite')
+    self.session = FakeSession(executions={
+      1: _status(1, 'SUCCEEDED', [
+        ('a', 'SUCCEEDED', 100), ('b', 'SUCCEEDED', 200),
+      ]),
+      2: _status(2, 'FAILED', [('a', 'SUCCEEDED', 150), ('b', 'FAILED', 50)]),
+      3: _status(3, 'RUNNING', [('a', 'RUNNING', None)]),
+    })
+
+  def _fetched(self):
+    """Execution IDs whose status was fetched."""
+    return sorted(
+      exec_id for exec_id, in self.session.get_calls('get_execution_status')
+    )
+
+  def test_sync(self):
+    with History(self.path) as history:
+      eq_(history.sync(self.session, 'p', 'f'), {'added': 3, 'updated': 0})
+      eq_(history.durations('p', 'f'), [(1, 0.3)])
+      eq_(history.durations('p', 'f', status=None), [(2, 0.2), (1, 0.3)])
+      eq_(history.durations('p', 'f', job='a'), [(2, 0.15), (1, 0.1)])
+      eq_(history.failures(), [(2, 'p', 'f', 'b', 'FAILED', 2000)])
+      eq_(history.failures(flow='g'), [])
+
+  def test_incremental_sync(self):
+    with History(self.path) as history:
+      history.sync(self.session, 'p', 'f')
+      self.session.calls = []
+      executions = self.session.executions
+      executions[3] = _status(3, 'SUCCEEDED', [('a', 'SUCCEEDED', 300)])
+      executions[4] = _status(4, 'SUCCEEDED', [('a', 'SUCCEEDED', 400)])
+      eq_(history.sync(self.session, 'p', 'f'), {'added': 1, 'updated': 1})
+      eq_(self._fetched(), [3, 4])
+      eq_(history.durations('p', 'f', job='a', limit=2), [(4, 0.4), (3, 0.3)])
+
+  def test_sync_limit(self):
+    with History(self.path) as history:
+      counts = history.sync(self.session, 'p', 'f', limit=1)
+      eq_(counts, {'added': 1, 'updated': 0})
+      executions = self.session.executions
+      for exec_id in [4, 5]:
+        executions[exec_id] = _status(exec_id, 'SUCCEEDED', [])
+      self.session.calls = []
+      eq_(
+        history.sync(self.session, 'p', 'f', limit=1),
+        {'added': 2, 'updated': 1},
+      )
+      eq_(self._fetched(), [3, 4, 5]) # no gap between new executions
+
+  def test_sync_error(self):
+    executions = self.session.executions
+    executions[2] = None
+    with History(self.path) as history:
+      eq_(history.sync(self.session, 'p', 'f'), {'added': 2, 'updated': 0})
+      executions[2] = _status(2, 'SUCCEEDED', [('a', 'SUCCEEDED', 100)])
+      self.session.calls = []
+      history.sync(self.session, 'p', 'f')
+      eq_(self._fetched(), [2, 3]) # failed fetch is retried
+      eq_(history.durations('p', 'f'), [(2, 0.1), (1, 0.3)])
+
+  def test_embedded_flows(self):
+    status = _status(4, 'FAILED', [])
+    status['nodes'] = [
+      {
+        'id': name,
+        'type': 'flow',
+        'status': job_status,
+        'nodes': [{'id': 'a', 'status': job_status, 'startTime': 4000}],
+      }
+      for name, job_status in [('s1', 'SUCCEEDED'), ('s2', 'FAILED')]
+    ]
+    self.session.executions = {4: status}
+    with History(self.path) as history:
+      history.sync(self.session, 'p', 'f')
+      eq_( # s2's job isn't overwritten by s1's, which has the same name
+        history.failures(after_time=0),
+        [(4, 'p', 'f', 's2:a', 'FAILED', 4000)],
+      )
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""Test Azkaban inventory module."""
+
+from azkaban.inventory import *
+from helpers import FakeSession, WithTempDir
+from nose.tools import eq_
+import os.path as osp
+
+
+class TestInventory(WithTempDir):
+
+  def setup(self):
+    super(TestInventory, self).setup()
+    self.path = osp.join(self.dpath, 'inventory.sqlite')
+    self.session = FakeSession(
+      projects={
+        'p1': {
+          'f1': [('a', 'command'), ('load_x', 'pig')],
+          'f2': [('a', 'command')],
+        },
+        'p2': {'f3': [('loadx', 'pig')]},
+      },
+    ) # like the server's, the project listing doesn't include versions
+
+  def _fetched(self):
+    """Projects whose flows were fetched."""
+    return sorted(name for name, in self.session.get_calls('get_workflows'))
+
+  def test_query(self):
+    with Inventory(self.path) as inventory:
+      summary = inventory.refresh(self.session, workers=2)
+      eq_((summary['crawled'], summary['skipped']), (2, 0))
+      eq_(
+        inventory.query(job='a'),
+        [('p1', 'f1', 'a', 'command'), ('p1', 'f2', 'a', 'command')],
+      )
+      eq_(
+        [row[:3] for row in inventory.query(job_type='pig')],
+        [('p1', 'f1', 'load_x'), ('p2', 'f3', 'loadx')],
+      )
+      eq_([row[2] for row in inventory.query(job='load_*')], ['load_x'])
+      eq_(len(inventory.query()), 4)
+
+  def test_flows(self):
+    with Inventory(self.path) as inventory:
+      inventory.refresh(self.session)
+      eq_(inventory.flows(), [('p1', 'f1'), ('p1', 'f2'), ('p2', 'f3')])
+      eq_(inventory.flows('p2'), [('p2', 'f3')])
+
+  def test_incremental_refresh(self):
+    with Inventory(self.path) as inventory:
+      inventory.refresh(self.session)
+    self.session.calls = []
+    projects = self.session.projects
+    projects['p2'] = {'f4': [('b', 'noop')]}
+    del projects['p1']
+    projects['p3'] = {'f5': [('c', 'noop')]}
+    with Inventory(self.path) as inventory:
+      summary = inventory.refresh(self.session)
+      eq_(self._fetched(), ['p3']) # p2 was crawled recently
+      eq_((summary['skipped'], summary['removed']), (1, 1))
+      eq_(
+        [row[:3] for row in inventory.query()],
+        [('p2', 'f3', 'loadx'), ('p3', 'f5', 'c')],
+      )
+      self.session.calls = []
+      inventory.refresh(self.session, max_age=0)
+      eq_(self._fetched(), ['p2', 'p3'])
+      eq_(
+        [row[:3] for row in inventory.query()],
+        [('p2', 'f4', 'b'), ('p3', 'f5', 'c')],
+      )
+
+  def test_refresh_all(self):
+    with Inventory(self.path) as inventory:
+      inventory.refresh(self.session)
+      self.session.calls = []
+      summary = inventory.refresh(self.session, max_age=None)
+      eq_(self._fetched(), ['p1', 'p2'])
+      eq_(summary['skipped'], 0)
+
+  def test_refresh_error(self):
+    with Inventory(self.path) as inventory:
+      inventory.refresh(self.session)
+      self.session.projects['p1'] = {'f1': None}
+      summary = inventory.refresh(self.session, max_age=0)
+      eq_(list(summary['errors']), ['p1'])
+      eq_(len(inventory.query(project='p1')), 3) # previous entries are kept
+      self.session.calls = []
+      inventory.refresh(self.session)
+      eq_(self._fetched(), ['p1']) # and retried next time
@@ -3,13 +3,16 @@
 
 """Test CLI."""
 
-from azkaban.__main__ import _parse_project, main
+from azkaban.__main__ import (_get_timezone, _load_batch, _parse_float,
+  _parse_project, main)
 from azkaban.util import AzkabanError
 from contextlib import contextmanager
 from nose.tools import *
 from shutil import rmtree
 from tempfile import mkdtemp
+from helpers import WithTempDir
 import imp
+import json
 import os
 import os.path as osp
 import sys
@@ -97,6 +100,75 @@ class TestParseProject(object):
   #   _parse_project(':bar', require_project=True)
 
 
+class TestParseFloat(object):
+
+  def test_fractional(self):
+    eq_(_parse_float('0.5', '--rate'), 0.5)
+    eq_(_parse_float('2', '--rate'), 2)
+
+  @raises(AzkabanError)
+  def test_invalid(self):
+    _parse_float('fast', '--rate')
+
+  @raises(AzkabanError)
+  def test_negative(self):
+    _parse_float('-1', '--rate')
+
+
+class TestLoadBatch(WithTempDir):
+
+  def _load(self, entries):
+    path = osp.join(self.dpath, 'batch.json')
+    with open(path, 'w') as writer:
+      json.dump(entries, writer)
+    return _load_batch(path, {'name': 'pj', 'properties': {'a': '1'}})
+
+  def test_runs(self):
+    runs = self._load([
+      {'flow': 'f1'},
+      {'project': 'pj2', 'flow': 'f2', 'properties': {'b': '2'}},
+    ])
+    eq_(runs, [
+      {'name': 'pj', 'flow': 'f1', 'properties': {'a': '1'}},
+      {'name': 'pj2', 'flow': 'f2', 'properties': {'a': '1', 'b': '2'}},
+    ])
+
+  @raises(AzkabanError)
+  def test_not_a_list(self):
+    self._load({'flow': 'f1'})
+
+  @raises(AzkabanError)
+  def test_invalid_run(self):
+    self._load(['f1'])
+
+  @raises(AzkabanError)
+  def test_invalid_properties(self):
+    self._load([{'flow': 'f1', 'properties': ['b']}])
+
+  @raises(AzkabanError)
+  def test_missing_flow(self):
+    self._load([{'name': 'pj2'}])
+
+
+class TestGetTimezone(object):
+
+  def test_shared(self):
+    eq_(_get_timezone([]), None)
+    eq_(_get_timezone([{'cron': '0 0 2 ? * *'}]), None)
+    eq_(
+      _get_timezone([{'timezone': 'UTC'}, {'timezone': 'UTC'}]),
+      'UTC',
+    )
+
+  @raises(AzkabanError)
+  def test_mixed(self):
+    _get_timezone([{'timezone': 'UTC'}, {'timezone': 'America/New_York'}])
+
+  @raises(AzkabanError)
+  def test_mixed_default(self):
+    _get_timezone([{'timezone': 'UTC'}, {}])
+
+
 class TestMain(object):
 
   pass # TODO: add test for the CLI
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""Test Azkaban notification module."""
+
+from azkaban.notify import *
+from azkaban.remote import Execution
+from helpers import FakeSession
+from nose.tools import eq_, ok_
+from threading import Thread
+from time import sleep, time
+import requests as rq
+
+
+class TestNotifier(object):
+
+  def setup(self):
+    self.notifier = Notifier(host='localhost')
+    self.notifier.start()
+    port = self.notifier._server.server_address[1]
+    self.url = 'http://localhost:%s' % (port, )
+
+  def teardown(self):
+    self.notifier.stop()
+
+  def notify(self, **params):
+    rq.get(self.url, params=params).raise_for_status()
+
+  def test_properties(self):
+    notifier = Notifier(address='http://foo:1234/')
+    properties = notifier.properties
+    eq_(
+      sorted(properties),
+      ['job.notification.completed.1.url', 'job.notification.started.1.url']
+    )
+    ok_(properties['job.notification.started.1.url'].startswith(
+      'http://foo:1234/?execid=?{executionId}&'
+    ))
+
+  def test_events(self):
+    self.notify(execid='12', job='foo', status='SUCCEEDED')
+    self.notify(execid='13', job='bar', status='RUNNING')
+    events = self.notifier.events(12)
+    eq_(len(events), 1)
+    eq_(events[0]['job'], 'foo')
+    eq_(events[0]['status'], 'SUCCEEDED')
+
+  def test_wait_timeout(self):
+    start = time()
+    eq_(self.notifier.wait(1, timeout=0.2), 0)
+    ok_(time() - start >= 0.2)
+
+  def test_wait_notified(self):
+    def _notify():
+      sleep(0.1)
+      self.notify(execid='2', job='bar', status='RUNNING') # other execution
+      sleep(0.1)
+      self.notify(execid='1', job='foo', status='RUNNING')
+    thread = Thread(target=_notify)
+    thread.start()
+    eq_(self.notifier.wait(1, timeout=10), 1)
+    thread.join()
+    eq_(self.notifier.wait(1, seen=0, timeout=10), 1)
+
+  def test_execution_wait(self):
+    session = FakeSession(executions={3: [
+      {'status': status, 'nodes': [{'id': 'foo', 'status': status}]}
+      for status in ['RUNNING', 'SUCCEEDED']
+    ]})
+    execution = Execution(session, 3, notifier=self.notifier)
+    thread = Thread(
+      target=lambda: self.notify(execid='3', job='foo', status='SUCCEEDED')
+    )
+    thread.start()
+    start = time()
+    eq_(execution.wait(delay=30)['status'], 'SUCCEEDED')
+    thread.join()
+    ok_(time() - start < 10)
+    eq_(len(session.get_calls('get_execution_status')), 2)
@@ -6,6 +6,8 @@
 from azkaban.project import *
 from azkaban.job import Job
 from azkaban.util import AzkabanError, flatten, temppath
+from hashlib import sha1
+from io import BytesIO
 from nose.tools import eq_, ok_, raises, nottest
 from nose.plugins.skip import SkipTest
 from os import pardir
@@ -210,6 +212,44 @@ class TestProjectBuild(_TestProject):
       finally:
         reader.close()
 
+  def test_build_digest(self):
+    self.project.add_job('foo', Job({'a': 2}))
+    self.project.add_file(__file__, 'this.py')
+    with temppath() as path:
+      digest = self.project.build(path)
+      sleep(1) # archive modification times change
+      eq_(self.project.build(path, overwrite=True), digest)
+      self.project.properties = {'bar': 123}
+      ok_(self.project.build(path, overwrite=True) != digest)
+
+  def test_build_digest_contents(self):
+    self.project.add_file(__file__, 'this.py')
+    with open(__file__, 'rb') as reader:
+      contents = reader.read()
+    expected = sha1(
+      ('this.py\0%s\n' % (sha1(contents).hexdigest(), )).encode('utf-8')
+    )
+    writer = BytesIO()
+    eq_(self.project.build(writer), expected.hexdigest())
+    reader = ZipFile(BytesIO(writer.getvalue()))
+    try:
+      eq_(reader.read('this.py'), contents)
+    finally:
+      reader.close()
+
+  def test_build_in_memory(self):
+    self.project.add_job('foo', Job({'a': 2}))
+    self.project.add_file(__file__, 'this.py')
+    writer = BytesIO()
+    digest = self.project.build(writer)
+    reader = ZipFile(BytesIO(writer.getvalue()))
+    try:
+      eq_(sorted(reader.namelist()), ['foo.job', 'this.py'])
+    finally:
+      reader.close()
+    with temppath() as path:
+      eq_(self.project.build(path), digest)
+
 
 class TestProjectProperties(_TestProject):
 
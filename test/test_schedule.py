@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""Test Azkaban schedule module."""
+
+from azkaban.schedule import *
+from azkaban.util import AzkabanError
+from helpers import FakeSession
+from nose.tools import eq_, ok_, raises
+
+
+def _session(schedules, slas=None):
+  """Session holding schedules in memory."""
+  return FakeSession(schedules=schedules, slas=slas)
+
+
+def _changes(session):
+  """Schedule and SLA updates sent, sorted."""
+  return sorted(
+    (method, ) + args for method, args in session.calls
+    if method in ('schedule_cron_workflow', 'remove_schedule', 'set_sla')
+  )
+
+
+class TestPlanSchedules(object):
+
+  def setup(self):
+    self.session = _session({
+      'p': {
+        'a': {'scheduleId': 1, 'cronExpression': '0 0 1 ? * *'},
+        'b': {
+          'scheduleId': 2,
+          'cronExpression': '0 0 2 ? * *',
+          'executionOptions': {'flowParameters': {'x': '1'}},
+        },
+        'c': {'scheduleId': 3, 'cronExpression': '0 0 3 ? * *'},
+        'd': None,
+      },
+    })
+
+  def test_up_to_date(self):
+    schedules = [
+      {'project': 'p', 'flow': 'a', 'cron': '0  0 1 ? * *'},
+      {'project': 'p', 'flow': 'b', 'cron': '0 0 2 ? * *',
+       'properties': {'x': 1}},
+      {'project': 'p', 'flow': 'c', 'cron': '0 0 3 ? * *'},
+    ]
+    eq_(plan_schedules(self.session, schedules), [])
+
+  def test_changes(self):
+    schedules = [
+      {'project': 'p', 'flow': 'a', 'cron': '0 0 4 ? * *'},
+      {'project': 'p', 'flow': 'b', 'cron': '0 0 2 ? * *',
+       'properties': {'x': 2}},
+      {'project': 'p', 'flow': 'd', 'cron': '0 0 5 ? * *'},
+    ]
+    changes = plan_schedules(self.session, schedules)
+    eq_(
+      [(c['action'], c['flow']) for c in changes],
+      [('update', 'a'), ('update', 'b'), ('remove', 'c'), ('create', 'd')],
+    )
+
+  def test_managed_projects(self):
+    changes = plan_schedules(self.session, [], projects=['p'])
+    eq_([c['flow'] for c in changes], ['a', 'b', 'c'])
+    eq_(plan_schedules(self.session, []), [])
+
+  @raises(AzkabanError)
+  def test_duplicate(self):
+    schedule = {'project': 'p', 'flow': 'a', 'cron': '0 0 4 ? * *'}
+    plan_schedules(self.session, [schedule, schedule])
+
+  @raises(AzkabanError)
+  def test_missing_cron(self):
+    plan_schedules(self.session, [{'project': 'p', 'flow': 'a'}])
+
+  @raises(AzkabanError)
+  def test_invalid_cron(self):
+    plan_schedules(
+      self.session, [{'project': 'p', 'flow': 'a', 'cron': '0 0 4 * * *'}]
+    )
+
+  @raises(AzkabanError)
+  def test_unknown_key(self):
+    plan_schedules(
+      self.session,
+      [{'project': 'p', 'flow': 'a', 'cron': '0 0 4 ? * *', 'foo': 1}],
+    )
+
+
+class TestApplySchedules(object):
+
+  def test_apply(self):
+    session = _session({
+      'p': {'a': {'scheduleId': 1, 'cronExpression': '0 0 1 ? * *'}},
+    })
+    schedules = [{
+      'project': 'p', 'flow': 'b', 'cron': '0 0 4 ? * *',
+      'timezone': 'UTC', 'properties': {'x': 1},
+    }]
+    changes = plan_schedules(session, schedules)
+    results = list(apply_schedules(session, changes, workers=2))
+    ok_(not any(error for _, _, error in results))
+    eq_(
+      _changes(session),
+      [
+        ('remove_schedule', 1),
+        (
+          'schedule_cron_workflow', 'p', 'b', '0 0 4 ? * *',
+          {'properties': {'x': 1}},
+        ),
+      ],
+    )
+
+
+class TestSlas(object):
+
+  def setup(self):
+    self.session = _session(
+      {
+        'p': {
+          'a': {'scheduleId': 1, 'cronExpression': '0 0 1 ? * *'},
+          'b': {'scheduleId': 2, 'cronExpression': '0 0 2 ? * *'},
+          'c': None,
+        },
+      },
+      {
+        1: {
+          'slaEmails': ['foo@bar.com'],
+          'settings': [
+            {'id': '', 'rule': 'SUCCESS', 'duration': '90m',
+             'actions': ['EMAIL']},
+            {'id': 'j', 'rule': 'FINISH', 'duration': '2h', 'actions': []},
+          ],
+        },
+      },
+    )
+
+  def test_export(self):
+    eq_(export_slas(self.session, ['p']), [{
+      'project': 'p',
+      'flow': 'a',
+      'emails': ['foo@bar.com'],
+      'settings': [',SUCCESS,01:30,true,false', 'j,FINISH,02:00,false,false'],
+    }])
+
+  def test_plan_up_to_date(self):
+    slas = export_slas(self.session, ['p'])
+    slas[0]['settings'].reverse()
+    eq_(plan_slas(self.session, slas), [])
+
+  def test_plan_changes(self):
+    slas = [
+      {'project': 'p', 'flow': 'a', 'emails': ['foo@bar.com'],
+       'settings': [',success,90m,true,false', 'j,FINISH,3h,false,false']},
+      {'project': 'p', 'flow': 'b', 'settings': [',SUCCESS,01:00,true,true']},
+    ]
+    changes = plan_slas(self.session, slas)
+    eq_([(c['flow'], c['schedule_id']) for c in changes], [('a', 1), ('b', 2)])
+    ok_(changes[1]['current'] is None)
+    list(apply_slas(self.session, changes))
+    eq_(
+      _changes(self.session),
+      [
+        (
+          'set_sla', 1, ['foo@bar.com'],
+          [',SUCCESS,01:30,true,false', 'j,FINISH,03:00,false,false'],
+        ),
+        ('set_sla', 2, [], [',SUCCESS,01:00,true,true']),
+      ],
+    )
+
+  @raises(AzkabanError)
+  def test_plan_unscheduled(self):
+    plan_slas(self.session, [{'project': 'p', 'flow': 'c', 'settings': []}])
+
+  @raises(AzkabanError)
+  def test_plan_invalid_duration(self):
+    plan_slas(
+      self.session,
+      [{'project': 'p', 'flow': 'a', 'settings': [',SUCCESS,1d,true,true']}],
+    )
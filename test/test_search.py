@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""Test Azkaban search module."""
+
+from azkaban import search
+from azkaban.search import *
+from helpers import FakeSession, WithTempDir
+from nose.tools import eq_, ok_
+
+
+def _session(logs):
+  """Session serving logs in small windows.
+
+  :param logs: Dictionary keyed by execution ID of dictionaries keyed by job
+    name (`None` for the flow logs) of logs.
+
+  """
+  return FakeSession(
+    executions=dict(
+      (exec_id, {'execid': exec_id, 'status': 'SUCCEEDED'})
+      for exec_id in logs
+    ),
+    logs=logs,
+    window=7,
+  )
+
+
+class TestIterLogLines(object):
+
+  def setup(self):
+    self.session = _session({
+      1: {None: 'first line\nERROR second line\nthird\n\nERROR last'},
+    })
+
+  def test_all_lines(self):
+    eq_(
+      list(iter_log_lines(self.session, 1)),
+      ['first line', 'ERROR second line', 'third', 'ERROR last']
+    )
+
+  def test_pattern(self):
+    eq_(
+      list(iter_log_lines(self.session, 1, pattern='sec')),
+      ['ERROR second line']
+    )
+
+  def test_anchored_pattern(self):
+    eq_(
+      list(iter_log_lines(self.session, 1, pattern='^ERROR')),
+      ['ERROR second line', 'ERROR last']
+    )
+
+
+  def test_lookahead_pattern(self):
+    # joined lines would put a newline after "line", rejecting the window
+    eq_(
+      list(iter_log_lines(self.session, 1, pattern=r'line(?!\s)')),
+      ['first line', 'ERROR second line'],
+    )
+
+  def test_window_patterns(self):
+    line_pattern, window_pattern = search._compile('ERROR')
+    ok_(window_pattern is line_pattern)
+    for pattern in [r'line(?!\s)', '^ERROR', r'last\Z', 'a|b']:
+      eq_(search._compile(pattern)[1], None)
+
+
+class TestSearchLogs(WithTempDir):
+
+  def setup(self):
+    super(TestSearchLogs, self).setup()
+    self.session = _session({
+      1: {None: 'all good\n', 'a': 'nothing'},
+      2: {None: 'NullPointerException\n', 'a': 'here too: Exception'},
+      3: {None: 'fine', 'a': 'oops\nIOException\n'},
+    })
+
+  def search(self, **kwargs):
+    results = search_logs(self.session, 'p', 'f', 'Exception', **kwargs)
+    return dict(
+      ((execution['execId'], job), lines)
+      for execution, job, lines, error in results
+    )
+
+  def test_flow_logs(self):
+    eq_(
+      self.search(),
+      {(1, None): [], (2, None): ['NullPointerException'], (3, None): []}
+    )
+
+  def test_job_logs(self):
+    eq_(
+      self.search(jobs=['a'], limit=2),
+      {(3, 'a'): ['IOException'], (2, 'a'): ['here too: Exception']}
+    )
+
+  def test_cache(self):
+    cache = LogCache(self.dpath)
+    first = self.search(jobs=['a'], cache=cache)
+    ok_(cache.get(self.session, 3, 'a'))
+    calls = len(self.session.get_calls('get_job_logs'))
+    eq_(self.search(jobs=['a'], cache=cache), first)
+    eq_(len(self.session.get_calls('get_job_logs')), calls)
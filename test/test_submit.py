@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""Test Azkaban submission module."""
+
+from azkaban.remote import Poller, Session
+from azkaban.submit import *
+from azkaban.util import AzkabanError
+from collections import defaultdict
+from helpers import FakeSession
+from nose.tools import eq_, ok_, raises
+from threading import Lock
+from time import sleep
+
+
+class _Session(FakeSession):
+
+  """Session tracking the maximum concurrency observed.
+
+  :param failing: Flows which fail to be submitted.
+
+  """
+
+  def __init__(self, failing=()):
+
+    def _outcome(run):
+      if run['flow'] in failing:
+        raise AzkabanError('Unavailable.')
+      return 'SUCCEEDED'
+
+    super(_Session, self).__init__(outcome=_outcome)
+    self.peaks = defaultdict(int)
+    self.submitting = 0
+
+  def run_workflow(self, name, flow, **kwargs):
+    with self._lock:
+      self.submitting += 1
+      self.peaks['submitting'] = max(self.peaks['submitting'], self.submitting)
+    sleep(0.01)
+    try:
+      res = super(_Session, self).run_workflow(name, flow, **kwargs)
+    finally:
+      with self._lock:
+        self.submitting -= 1
+    counts = defaultdict(int)
+    with self._lock:
+      for key, exec_ids in self.running.items():
+        counts[key[0]] += len(exec_ids)
+        counts[key] += len(exec_ids)
+        counts[None] += len(exec_ids)
+      for key, count in counts.items():
+        self.peaks[key] = max(self.peaks[key], count)
+    return res
+
+
+class _FakePoller(object):
+
+  """Poller finishing the oldest execution waited on."""
+
+  def __init__(self, session):
+    self.session = session
+
+  def wait_any(self, exec_ids, timeout=None):
+    exec_id = min(exec_ids)
+    while True:
+      status = self.session.get_execution_status(exec_id)
+      if status['status'] != 'RUNNING':
+        return {exec_id: status}
+
+
+class TestSubmissionQueue(object):
+
+  def setup(self):
+    self.session = _Session(failing=['bad'])
+    self.poller = _FakePoller(self.session)
+
+  def _run(self, queue):
+    for name, flow in [
+      ('p1', 'a'), ('p1', 'a'), ('p1', 'b'), ('p2', 'c'), ('p2', 'c'),
+      ('p2', 'bad'), ('p1', 'a'),
+    ]:
+      queue.put(name, flow, properties={'x': 1})
+    submitted = []
+    results = list(queue.run(callback=lambda run, _: submitted.append(run)))
+    eq_(len(results), 7)
+    eq_(len(submitted), 6)
+    eq_([run['flow'] for run, _, error in results if error], ['bad'])
+    ok_(all(run['properties'] == {'x': 1} for run, _, _ in results))
+    eq_(len(queue), 0)
+
+  def test_unlimited(self):
+    self._run(SubmissionQueue(self.session, poller=self.poller))
+    eq_(self.session.peaks[None], 6)
+
+  def test_workers(self):
+    queue = SubmissionQueue(self.session, poller=self.poller, workers=2)
+    self._run(queue)
+    eq_(self.session.peaks['submitting'], 2)
+
+  def test_max_running(self):
+    queue = SubmissionQueue(self.session, max_running=2, poller=self.poller)
+    self._run(queue)
+    eq_(self.session.peaks[None], 2)
+
+  def test_max_per_flow(self):
+    queue = SubmissionQueue(self.session, max_per_flow=1, poller=self.poller)
+    self._run(queue)
+    eq_(self.session.peaks[('p1', 'a')], 1)
+    eq_(self.session.peaks[None], 3) # other flows aren't blocked
+
+  def test_max_per_project(self):
+    queue = SubmissionQueue(
+      self.session, max_per_project=2, max_per_flow=1, poller=self.poller
+    )
+    self._run(queue)
+    eq_(self.session.peaks['p1'], 2)
+    eq_(self.session.peaks['p2'], 1)
+
+  @raises(AzkabanError)
+  def test_invalid_cap(self):
+    SubmissionQueue(self.session, max_running=0)
+
+
+class TestSubmissionQueueSession(object):
+
+  """Queue backed by an actual session and poller, stubbing out requests."""
+
+  class _Response(object):
+
+    def __init__(self, data):
+      self.data = data
+
+    def json(self):
+      return self.data
+
+  def setup(self):
+    test = self
+    self.submitted = []
+    self.polls = defaultdict(int)
+    self.running = set()
+    self.peak = 0
+    self.lock = Lock()
+
+    class _Session(Session):
+      def _request(self, method, endpoint, include_session='cookies', **kwargs):
+        with test.lock:
+          if method == 'POST':
+            data = kwargs['data']
+            if data['flow'] == 'bad':
+              return test._Response({'error': 'Flow not found.'})
+            test.submitted.append(data)
+            exec_id = len(test.submitted)
+            test.running.add(exec_id)
+            test.peak = max(test.peak, len(test.running))
+            return test._Response({'execid': exec_id})
+          exec_id = kwargs['params']['execid']
+          test.polls[exec_id] += 1
+          if test.polls[exec_id] < 2:
+            return test._Response({'execid': exec_id, 'status': 'RUNNING'})
+          test.running.discard(exec_id)
+          return test._Response({'execid': exec_id, 'status': 'SUCCEEDED'})
+
+    self.session = _Session(url='http://foo:8081')
+
+  def test_run(self):
+    with Poller(self.session, delay=0.01) as poller:
+      queue = SubmissionQueue(
+        self.session, max_running=2, poller=poller, delay=0.01
+      )
+      for flow in ['a', 'b', 'bad', 'c', 'd']:
+        queue.put('p', flow, properties={'x': 1})
+      results = list(queue.run())
+    eq_(len(results), 5)
+    eq_([run['flow'] for run, _, error in results if error], ['bad'])
+    eq_(
+      sorted(status['status'] for _, status, error in results if not error),
+      ['SUCCEEDED'] * 4,
+    )
+    eq_(sorted(data['flow'] for data in self.submitted), ['a', 'b', 'c', 'd'])
+    ok_(all(data['flowOverride[x]'] == 1 for data in self.submitted))
+    eq_(self.peak, 2)
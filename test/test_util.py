@@ -5,8 +5,11 @@
 
 from azkaban.util import *
 from contextlib import contextmanager
+from io import BytesIO
 from nose.tools import eq_, ok_, raises, nottest
 from six import u
+from threading import Lock, current_thread
+from time import sleep, time
 
 
 class TestFlatten(object):
@@ -23,6 +26,19 @@ class TestFlatten(object):
     eq_(flatten(dct), {'a': 1, 'b.c': 3})
 
 
+class TestHumanDuration(object):
+
+  def test_seconds(self):
+    eq_(human_duration(0), '0s')
+    eq_(human_duration(59.6), '1m00s')
+
+  def test_minutes(self):
+    eq_(human_duration(61), '1m01s')
+
+  def test_hours(self):
+    eq_(human_duration(3 * 3600 + 65), '3h01m05s')
+
+
 class TestConfig(object):
 
   @raises(AzkabanError)
@@ -119,6 +135,73 @@ class TestMultipartForm(object):
       ok_(b'name="foo"' in content)
       ok_(b'bar' in content)
 
+  def test_mmap(self):
+    with temppath() as path:
+      with open(path, 'wb') as writer:
+        writer.write(b'HAI' * 1000)
+      form = MultipartForm([path], chunksize=7, mmap=True)
+      content = self.get_form_content(form)
+      form._mmap = False
+      eq_(content, self.get_form_content(form))
+
+  def test_empty_file_mmap(self):
+    with temppath() as path:
+      open(path, 'w').close()
+      content = self.get_form_content(MultipartForm([path], mmap=True))
+      ok_(content.endswith(b'--\r\n'))
+
+  def test_callback_interval(self):
+    with temppath() as path:
+      with open(path, 'wb') as writer:
+        writer.write(b'HAI' * 1000)
+      calls = []
+      form = MultipartForm(
+        [path, path],
+        callback=lambda *args: calls.append(args),
+        chunksize=10,
+        callback_interval=60,
+      )
+      self.get_form_content(form)
+      eq_(calls, [(10, 6000, 0), (3000, 6000, 0), (6000, 6000, 1)])
+
+  def test_length(self):
+    with temppath() as path:
+      with open(path, 'wb') as writer:
+        writer.write(b'HAI' * 1000)
+      for form in [
+        MultipartForm([path]),
+        MultipartForm([path, path], params={'a': 1, 'b': u'\xe9'}),
+        MultipartForm([path], mmap=True, chunksize=64),
+      ]:
+        eq_(len(form), len(self.get_form_content(form)))
+        eq_(form.headers['Content-Length'], str(len(form)))
+
+  def test_file_object(self):
+    with temppath() as path:
+      with open(path, 'wb') as writer:
+        writer.write(b'HAI' * 1000)
+      form = MultipartForm([{'path': path, 'name': 'foo'}], chunksize=64)
+      content = self.get_form_content(form)
+      with open(path, 'rb') as reader:
+        form._files[0]['fileobj'] = reader
+        eq_(self.get_form_content(form), content)
+        eq_(self.get_form_content(form), content) # streamed from the start
+        eq_(len(MultipartForm([{'fileobj': reader, 'name': 'foo'}])), len(form))
+
+  @raises(AzkabanError)
+  def test_file_object_missing_name(self):
+    MultipartForm([{'fileobj': BytesIO(b'HAI')}])
+
+  @raises(AzkabanError)
+  def test_file_changed(self):
+    with temppath() as path:
+      with open(path, 'wb') as writer:
+        writer.write(b'HAI')
+      form = MultipartForm([path])
+      with open(path, 'ab') as writer:
+        writer.write(b'!')
+      self.get_form_content(form)
+
 
 class TestReadProperties(object):
 
@@ -154,3 +237,106 @@ class TestReadProperties(object):
     contents = 'a\=b = 5\nfoo\ bar :ja\n'
     with self.temp_properties(contents) as path:
       eq_(read_properties(path), {'a=b': '5', 'foo bar': 'ja'})
+
+
+class TestPrefetch(object):
+
+  def test_order(self):
+    eq_(list(prefetch(range(10), 3)), list(range(10)))
+
+  def test_empty(self):
+    eq_(list(prefetch([])), [])
+
+  def test_background_thread(self):
+    threads = []
+    def _gen():
+      for i in range(3):
+        threads.append(current_thread())
+        yield i
+    eq_(list(prefetch(_gen())), [0, 1, 2])
+    ok_(all(t is not current_thread() for t in threads))
+
+  def test_bounded(self):
+    produced = []
+    def _gen():
+      for i in range(100):
+        produced.append(i)
+        yield i
+    items = prefetch(_gen(), 2)
+    eq_(next(items), 0)
+    sleep(0.3)
+    ok_(len(produced) <= 4) # one consumed, two queued, one blocked
+    items.close()
+
+  @raises(ValueError)
+  def test_error(self):
+    def _gen():
+      yield 1
+      raise ValueError('boom')
+    items = prefetch(_gen())
+    eq_(next(items), 1)
+    next(items)
+
+
+class TestConcurrently(object):
+
+  def test_results(self):
+    results = list(concurrently(lambda i: 2 * i, range(20), workers=4))
+    eq_(sorted(results), [(i, 2 * i, None) for i in range(20)])
+
+  def test_errors(self):
+    def _func(i):
+      if i % 2:
+        raise ValueError(i)
+      return i
+    results = dict(
+      (item, (result, error))
+      for item, result, error in concurrently(_func, range(4))
+    )
+    eq_(results[0], (0, None))
+    ok_(isinstance(results[1][1], ValueError))
+    eq_(results[2], (2, None))
+
+  def test_bounded(self):
+    lock = Lock()
+    state = {'running': 0, 'peak': 0}
+    def _func(i):
+      with lock:
+        state['running'] += 1
+        state['peak'] = max(state['peak'], state['running'])
+      sleep(0.01)
+      with lock:
+        state['running'] -= 1
+    eq_(len(list(concurrently(_func, range(20), workers=3))), 20)
+    ok_(1 < state['peak'] <= 3)
+
+  def test_early_close(self):
+    calls = []
+    def _func(i):
+      calls.append(i)
+      sleep(0.01)
+    results = concurrently(_func, range(1000), workers=2)
+    next(results)
+    results.close()
+    sleep(0.05)
+    ok_(len(calls) < 10)
+
+
+class TestThrottle(object):
+
+  def test_rate(self):
+    throttle = Throttle(50)
+    start = time()
+    for _ in range(11):
+      throttle.wait()
+    ok_(time() - start >= 0.19)
+
+  def test_concurrent_rate(self):
+    throttle = Throttle(100)
+    start = time()
+    list(concurrently(lambda _: throttle.wait(), range(21), workers=4))
+    ok_(time() - start >= 0.19)
+
+  @raises(ValueError)
+  def test_invalid_rate(self):
+    Throttle(0)